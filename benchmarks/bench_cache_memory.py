@@ -0,0 +1,67 @@
+"""
+Benchmark of memory per cached repository in the ranked prefix.
+- models: list of GARepository models (with nested owner model, datetime and per-instance __dict__)
+- compact: CompactRepos, columnar storage with interned strings and epoch times
+
+Reports memory allocated for the prefix in process (tracemalloc), size of its pickle
+(it's kept by the shared cache and estimates size in the bounded memory cache),
+and time to materialize the top 100 from the compact form.
+
+Run from the root of the repository:
+    python -m benchmarks.bench_cache_memory
+"""
+import argparse
+import json
+import pickle
+import time
+import tracemalloc
+
+from github_searcher.schemas.github_api import GARepositoriesSearchResponse, GARepository
+from github_searcher.services.compact_repos import CompactRepos
+
+from benchmarks.utils import gen_github_item
+
+
+def receive_repos(count: int) -> list[GARepository]:
+    """
+    Repos, parsed as they are received from GithubAPI
+    """
+    body = json.dumps({"items": [gen_github_item(rank) for rank in range(count)]}).encode()
+    return GARepositoriesSearchResponse.model_validate_json(body).items
+
+
+def measure_memory(build) -> int:
+    """
+    :return: memory, allocated by the built object and kept after building, bytes
+    """
+    tracemalloc.start()
+    try:
+        value = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del value
+    return size
+
+
+def main(count: int):
+    print(f"{'storage':>8} {'B/repo':>8} {'pickle B/repo':>14}")
+    models_size = measure_memory(lambda: receive_repos(count))
+    repos = receive_repos(count)
+    compact_size = measure_memory(lambda: CompactRepos(receive_repos(count)))
+    compact = CompactRepos(repos)
+    print(f"{'models':>8} {models_size / count:>8.0f} {len(pickle.dumps(repos)) / count:>14.0f}")
+    print(f"{'compact':>8} {compact_size / count:>8.0f} {len(pickle.dumps(compact)) / count:>14.0f}")
+    print(f"memory reduction: {models_size / compact_size:.1f}x")
+
+    repeats = 1000
+    st_time = time.perf_counter()
+    for _ in range(repeats):
+        compact.slice(0, 100)
+    print(f"materialize top 100: {(time.perf_counter() - st_time) / repeats * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000, help="number of repos in the prefix")
+    main(parser.parse_args().count)
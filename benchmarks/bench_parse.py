@@ -0,0 +1,75 @@
+"""
+Benchmark of parsing one page of GithubAPI search response: time per page and peak memory.
+- dict: json.loads of the whole body into dicts, then GARepositoriesSearchResponse(**response_json)
+- bytes: GARepositoriesSearchResponse.model_validate_json(body), one pass from bytes,
+  fields, which are not in the schema, are skipped
+
+Run from the root of the repository:
+    python -m benchmarks.bench_parse
+"""
+from typing import Callable
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from github_searcher.schemas.github_api import GARepositoriesSearchResponse
+
+from benchmarks.utils import gen_github_item
+
+
+def gen_page_body(per_page: int) -> bytes:
+    return json.dumps({
+        "total_count": 1000000,
+        "incomplete_results": False,
+        "items": [gen_github_item(rank) for rank in range(per_page)],
+    }).encode()
+
+
+def parse_dict(body: bytes) -> GARepositoriesSearchResponse:
+    return GARepositoriesSearchResponse(**json.loads(body))
+
+
+def parse_bytes(body: bytes) -> GARepositoriesSearchResponse:
+    return GARepositoriesSearchResponse.model_validate_json(body)
+
+
+def measure_time(parse: Callable[[bytes], GARepositoriesSearchResponse], body: bytes, repeats: int) -> float:
+    """
+    :return: milliseconds per page
+    """
+    parse(body)
+    st_time = time.perf_counter()
+    for _ in range(repeats):
+        parse(body)
+    return (time.perf_counter() - st_time) / repeats * 1000
+
+
+def measure_peak_memory(parse: Callable[[bytes], GARepositoriesSearchResponse], body: bytes) -> int:
+    """
+    :return: peak of allocated memory while parsing, bytes
+    """
+    tracemalloc.start()
+    try:
+        parse(body)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(repeats: int):
+    print(f"{'per_page':>8} {'body KiB':>9} {'parser':>7} {'ms/page':>9} {'peak KiB':>9}")
+    for per_page in (30, 100):
+        body = gen_page_body(per_page)
+        assert parse_dict(body) == parse_bytes(body)
+        for name, parse in (("dict", parse_dict), ("bytes", parse_bytes)):
+            ms = measure_time(parse, body, repeats)
+            peak = measure_peak_memory(parse, body)
+            print(f"{per_page:>8} {len(body) / 1024:>9.1f} {name:>7} {ms:>9.3f} {peak / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=500, help="number of parses per measurement")
+    main(parser.parse_args().repeats)
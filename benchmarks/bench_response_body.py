@@ -0,0 +1,110 @@
+"""
+Benchmark of cache hits of top K handlers: requests per second on one core.
+- models: handler returns list[GARepository], FastAPI validates it against response_model and encodes to JSON
+- bytes: handler returns pre-serialized JSON body, kept next to the cached entry
+
+Run from the root of the repository:
+    python -m benchmarks.bench_response_body
+"""
+from fastapi import FastAPI, Response
+
+import argparse
+import asyncio
+import time
+
+from github_searcher.clients.cache.bounded_memory_cache import BoundedMemoryCache
+from github_searcher.schemas.github_api import GARepository
+from github_searcher.services.repos_json_encoder import ReposJsonEncoder
+from github_searcher.services.repos_searching import ReposSearchingService
+from github_searcher.services.search_args import SearchArgs
+
+from benchmarks.utils import InstantGithubAPIClient
+
+
+def build_app(service: ReposSearchingService) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/models", response_model=list[GARepository])
+    async def models(k: int = 100):
+        return await service.get_top_k_popular_repos(
+            session=None,
+            args=SearchArgs(created_from=None, lang=None),
+            k=k,
+        )
+
+    @app.get("/bytes", response_model=list[GARepository])
+    async def raw(k: int = 100):
+        body = await service.get_top_k_popular_repos_json(
+            session=None,
+            args=SearchArgs(created_from=None, lang=None),
+            k=k,
+        )
+        return Response(content=body.content, media_type="application/json")
+
+    return app
+
+
+async def call(app: FastAPI, path: str, query: bytes) -> int:
+    """
+    Call ASGI application directly, without any HTTP client overhead.
+    :return: status code of response
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query,
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 1),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(app: FastAPI, path: str, k: int, requests: int) -> float:
+    query = f"k={k}".encode()
+    # Warm up the cache and the serialized body
+    for _ in range(10):
+        await call(app, path, query)
+
+    st_time = time.perf_counter()
+    for _ in range(requests):
+        assert await call(app, path, query) == 200
+    return requests / (time.perf_counter() - st_time)
+
+
+async def main(requests: int):
+    print(f"{'k':>5} {'encoder':>9} {'models rps':>12} {'bytes rps':>12} {'speedup':>8}")
+    for encoder in ("pydantic", "orjson"):
+        for k in (10, 50, 100):
+            service = ReposSearchingService(
+                api_client=InstantGithubAPIClient(),
+                cache=BoundedMemoryCache(max_size=1024),
+                json_encoder=ReposJsonEncoder(backend=encoder),
+            )
+            app = build_app(service)
+            models_rps = await measure(app, "/models", k, requests)
+            bytes_rps = await measure(app, "/bytes", k, requests)
+            print(f"{k:>5} {encoder:>9} {models_rps:>12.0f} {bytes_rps:>12.0f} {bytes_rps / models_rps:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="number of requests per measurement")
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,102 @@
+from datetime import date, datetime, timedelta
+
+from github_searcher.clients.github.search_repos_page import PageValidators, SearchReposPage
+from github_searcher.schemas.github_api import GARepository
+
+
+def gen_github_item(rank: int) -> dict:
+    """
+    Item of GithubAPI search response with all fields, which GithubAPI returns.
+    """
+    return {
+        "id": 1000000 + rank,
+        "node_id": f"MDEwOlJlcG9zaXRvcnk{rank}",
+        "name": f"repo-{rank}",
+        "full_name": f"owner-{rank % 50}/repo-{rank}",
+        "private": False,
+        "owner": {
+            "login": f"owner-{rank % 50}",
+            "id": 2000000 + rank % 50,
+            "node_id": "MDQ6VXNlcjE=",
+            "avatar_url": "https://avatars.githubusercontent.com/u/1?v=4",
+            "gravatar_id": "",
+            "url": f"https://api.github.com/users/owner-{rank % 50}",
+            "html_url": f"https://github.com/owner-{rank % 50}",
+            "type": "User",
+            "site_admin": False,
+        },
+        "html_url": f"https://github.com/owner-{rank % 50}/repo-{rank}",
+        "description": "A benchmark repository with a reasonably long description of what it does.",
+        "fork": False,
+        "url": f"https://api.github.com/repos/owner-{rank % 50}/repo-{rank}",
+        "created_at": (datetime(2015, 1, 1) + timedelta(days=rank)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "updated_at": "2024-03-01T00:00:00Z",
+        "pushed_at": "2024-03-01T00:00:00Z",
+        "git_url": f"git://github.com/owner-{rank % 50}/repo-{rank}.git",
+        "ssh_url": f"git@github.com:owner-{rank % 50}/repo-{rank}.git",
+        "clone_url": f"https://github.com/owner-{rank % 50}/repo-{rank}.git",
+        "homepage": "https://example.com",
+        "size": 12345,
+        "stargazers_count": 500000 - rank,
+        "watchers_count": 500000 - rank,
+        "language": ["Python", "Go", "C", "Rust"][rank % 4],
+        "has_issues": True,
+        "has_projects": True,
+        "has_downloads": True,
+        "has_wiki": True,
+        "has_pages": False,
+        "forks_count": 1000,
+        "archived": False,
+        "disabled": False,
+        "open_issues_count": 100,
+        "license": {"key": "mit", "name": "MIT License", "spdx_id": "MIT"},
+        "topics": ["benchmark", "github", "search"],
+        "visibility": "public",
+        "forks": 1000,
+        "open_issues": 100,
+        "watchers": 500000 - rank,
+        "default_branch": "main",
+        "score": 1.0,
+    }
+
+
+class InstantGithubAPIClient:
+    """
+    Client, which returns generated pages immediately, to measure only the service overhead.
+    """
+    async def search_repos(
+            self,
+            session,
+            page_id: int | None = None,
+            created_from: date | None = None,
+            lang: str | None = None,
+            per_page: int | None = None,
+    ) -> list[GARepository]:
+        page_id = page_id or 1
+        per_page = per_page or 30
+        first_rank = (page_id - 1) * per_page
+        return [
+            GARepository(**gen_github_item(rank))
+            for rank in range(first_rank, first_rank + per_page)
+        ]
+
+    async def search_repos_page(
+            self,
+            session,
+            page_id: int | None = None,
+            created_from: date | None = None,
+            lang: str | None = None,
+            per_page: int | None = None,
+            validators: PageValidators | None = None,
+            background: bool = False,
+            created_to: date | None = None,
+            stars_max: int | None = None,
+    ) -> SearchReposPage:
+        items = await self.search_repos(
+            session=session,
+            page_id=page_id,
+            created_from=created_from,
+            lang=lang,
+            per_page=per_page,
+        )
+        return SearchReposPage(items=items, validators=PageValidators())
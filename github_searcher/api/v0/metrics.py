@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+
+from github_searcher.metrics import metrics
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get(
+    "/metrics",
+)
+async def get_metrics() -> dict:
+    """
+    Handler to get current metrics of the service.
+    """
+    return metrics.snapshot()
@@ -1,19 +1,69 @@
 from aiohttp import ClientSession
 from datetime import date
-from fastapi import APIRouter, Depends, Query
-from typing import Annotated
+from fastapi import APIRouter, Depends, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from http import HTTPStatus
+from typing import Annotated, AsyncIterator
 
 from github_searcher.deps import (
+    get_batch_searcher,
     get_repos_searching_service,
     get_client_session,
 )
+from github_searcher.exceptions import NotExistedLanguageException, SearchMaxResultsException
+from github_searcher.schemas.api import BatchSearchRequest, BatchSearchResult
 from github_searcher.schemas.github_api import GARepository
+from github_searcher.services.batch_search import BatchSearcher
+from github_searcher.services.page_planner import SEARCH_RESULTS_LIMIT
 from github_searcher.services.repos_searching import ReposSearchingService
+from github_searcher.services.response_body import ResponseBody
 from github_searcher.services.search_args import SearchArgs
 
 api_v0_router = APIRouter()
 
 
+def _etag_matches(etag: str, if_none_match: str | None) -> bool:
+    """
+    Check If-None-Match header against the entity tag (weak comparison, as RFC 9110 requires for it).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag
+        for tag in if_none_match.split(",")
+    )
+
+
+def _json_response(body: ResponseBody, if_none_match: str | None = None) -> Response:
+    """
+    Send already serialized body as is, without validation against response_model and encoding.
+    The body is sent with its ETag and max-age, matching the time it's fresh in the cache,
+    or without the body at all (304), if the client already has it.
+    """
+    headers = {
+        "ETag": body.etag,
+        "Cache-Control": f"max-age={body.max_age()}",
+    }
+    if _etag_matches(body.etag, if_none_match):
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED,
+            headers=headers,
+        )
+    return Response(
+        content=body.content,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+async def _prepend(first: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in chunks:
+        yield chunk
+
+
 @api_v0_router.get(
     "/repos/popular",
     response_model=list[GARepository],
@@ -24,12 +74,13 @@ async def get_repos_by_popularity(
         created_from: date | None = Query(None, description="Date to filter repos created from (Optional)"),
         language: str | None = Query(None, description="Filter the language of repos (Optional)"),
         page_id: int | None = Query(None, ge=1, description="The number of page with results to receive (Optional)"),
+        if_none_match: str | None = Header(None, description="ETag of the already received response (Optional)"),
 ):
     """
     Handler to get the repos list, sorted desc by number of starts.
     Because the search result could be very big, the response is paginated.
     """
-    return await repos_searching_service.get_popular_repos(
+    body = await repos_searching_service.get_popular_repos_json(
         session=session,
         args=SearchArgs(
             created_from=created_from,
@@ -37,29 +88,51 @@ async def get_repos_by_popularity(
             page_id=page_id,
         ),
     )
+    return _json_response(body, if_none_match)
 
 
 @api_v0_router.get(
-    "/repos/top10",
+    "/repos/top",
     response_model=list[GARepository],
 )
-async def get_top10_repos(
+async def get_top_k_repos(
         repos_searching_service: Annotated[ReposSearchingService, Depends(get_repos_searching_service)],
         session: Annotated[ClientSession, Depends(get_client_session)],
+        k: int = Query(100, ge=1, le=SEARCH_RESULTS_LIMIT, description="Number of repos to receive (Optional)"),
         created_from: date | None = Query(None, description="Date to filter repos created from (Optional)"),
         language: str | None = Query(None, description="Filter the language of repos (Optional)"),
+        if_none_match: str | None = Header(None, description="ETag of the already received response (Optional)"),
 ):
     """
-    Handler to get top 10 repositories.
+    Handler to get top K repositories (up to the search results limit).
+    Repos are requested by the fewest upstream pages of the max size, which are requested concurrently.
     """
-    return await repos_searching_service.get_top_k_popular_repos(
+    body = await repos_searching_service.get_top_k_popular_repos_json(
         session=session,
-        k=10,
         args=SearchArgs(
             created_from=created_from,
             lang=language,
         ),
+        k=k,
     )
+    return _json_response(body, if_none_match)
+
+
+@api_v0_router.get(
+    "/repos/top10",
+    response_model=list[GARepository],
+)
+async def get_top10_repos(
+        repos_searching_service: Annotated[ReposSearchingService, Depends(get_repos_searching_service)],
+        session: Annotated[ClientSession, Depends(get_client_session)],
+        created_from: date | None = Query(None, description="Date to filter repos created from (Optional)"),
+        language: str | None = Query(None, description="Filter the language of repos (Optional)"),
+        if_none_match: str | None = Header(None, description="ETag of the already received response (Optional)"),
+):
+    """
+    Handler to get top 10 repositories (alias of top K).
+    """
+    return await get_top_k_repos(repos_searching_service, session, 10, created_from, language, if_none_match)
 
 
 @api_v0_router.get(
@@ -71,18 +144,12 @@ async def get_top50_repos(
         session: Annotated[ClientSession, Depends(get_client_session)],
         created_from: date | None = Query(None, description="Date to filter repos created from (Optional)"),
         language: str | None = Query(None, description="Filter the language of repos (Optional)"),
+        if_none_match: str | None = Header(None, description="ETag of the already received response (Optional)"),
 ):
     """
-       Handler to get top 50 repositories.
-   """
-    return await repos_searching_service.get_top_k_popular_repos(
-        session=session,
-        args=SearchArgs(
-            created_from=created_from,
-            lang=language,
-        ),
-        k=50,
-    )
+    Handler to get top 50 repositories (alias of top K).
+    """
+    return await get_top_k_repos(repos_searching_service, session, 50, created_from, language, if_none_match)
 
 
 @api_v0_router.get(
@@ -94,17 +161,69 @@ async def get_top100_repos(
         session: Annotated[ClientSession, Depends(get_client_session)],
         created_from: date | None = Query(None, description="Date to filter repos created from (Optional)"),
         language: str | None = Query(None, description="Filter the language of repos (Optional)"),
+        if_none_match: str | None = Header(None, description="ETag of the already received response (Optional)"),
+):
+    """
+    Handler to get top 100 repositories (alias of top K).
+    """
+    return await get_top_k_repos(repos_searching_service, session, 100, created_from, language, if_none_match)
+
+
+@api_v0_router.get(
+    "/repos/top/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "Repos, one JSON object per line"}},
+)
+async def stream_top_k_repos(
+        repos_searching_service: Annotated[ReposSearchingService, Depends(get_repos_searching_service)],
+        session: Annotated[ClientSession, Depends(get_client_session)],
+        k: int = Query(100, ge=1, le=SEARCH_RESULTS_LIMIT, description="Number of repos to receive (Optional)"),
+        created_from: date | None = Query(None, description="Date to filter repos created from (Optional)"),
+        language: str | None = Query(None, description="Filter the language of repos (Optional)"),
 ):
     """
-       Handler to get top 100 repositories.
-   """
-    return await repos_searching_service.get_top_k_popular_repos(
+    Handler to stream top K repositories as NDJSON.
+    Repos are sent in the rank order, as soon as every upstream page is received,
+    and requests of the remaining pages are cancelled, when the client disconnects.
+    """
+    chunks = repos_searching_service.stream_top_k_popular_repos_ndjson(
         session=session,
         args=SearchArgs(
             created_from=created_from,
             lang=language,
         ),
-        k=100,
+        k=k,
+    )
+    # Errors before the first chunk are answered with the status, as by other handlers.
+    try:
+        first = await anext(chunks, b"")
+    except (SearchMaxResultsException, NotExistedLanguageException):
+        first = b""
+    return StreamingResponse(
+        content=_prepend(first, chunks),
+        media_type="application/x-ndjson",
     )
 
 
+@api_v0_router.post(
+    "/repos/batch",
+    response_model=list[BatchSearchResult],
+)
+async def search_repos_batch(
+        batch_searcher: Annotated[BatchSearcher, Depends(get_batch_searcher)],
+        session: Annotated[ClientSession, Depends(get_client_session)],
+        request: BatchSearchRequest,
+):
+    """
+    Handler to execute several searches (popular repos on the page, or top K repos) in one request.
+    Identical searches are executed once, the rest concurrently.
+    Results are in the order of searches, every result has repos or its own error.
+    """
+    content = await batch_searcher.search(
+        session=session,
+        specs=request.searches,
+    )
+    return Response(
+        content=content,
+        media_type="application/json",
+    )
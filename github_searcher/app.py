@@ -1,12 +1,23 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
 import logging
 
+from github_searcher.api.v0.metrics import metrics_router
 from github_searcher.api.v0.repos_searching import api_v0_router
 from github_searcher.configs.logger_config import LogConfig
+from github_searcher.deps import (
+    cache,
+    cache_warmer,
+    client_session_manager,
+    index_crawler,
+    repos_index,
+    repos_searching_service,
+)
 from github_searcher.exceptions import (
     GithubApiRateLimitException,
+    GithubApiUnavailableException,
     NotExistedLanguageException,
     SearchMaxResultsException,
 )
@@ -24,7 +35,33 @@ Service for searching popular repositories on Github.
 """
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open shared resources on startup and release them on shutdown.
+    """
+    await client_session_manager.start()
+    if repos_index is not None:
+        repos_index.open()
+    if cache_warmer is not None:
+        cache_warmer.start()
+    if index_crawler is not None:
+        index_crawler.start()
+    yield
+    if index_crawler is not None:
+        await index_crawler.close()
+    if cache_warmer is not None:
+        await cache_warmer.close()
+    await repos_searching_service.close()
+    await client_session_manager.close()
+    if cache is not None:
+        await cache.close()
+    if repos_index is not None:
+        repos_index.close()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Github Searcher",
     description=description,
     summary="Web-service to search repos",
@@ -44,6 +81,10 @@ app.include_router(
     router=api_v0_router,
     prefix="/api/v0",
 )
+app.include_router(
+    router=metrics_router,
+    prefix="/api/v0",
+)
 
 
 @app.exception_handler(GithubApiRateLimitException)
@@ -55,6 +96,14 @@ async def unicorn_exception_handler(request: Request, exc: GithubApiRateLimitExc
     )
 
 
+@app.exception_handler(GithubApiUnavailableException)
+async def unicorn_exception_handler(request: Request, exc: GithubApiUnavailableException):
+    return JSONResponse(
+        status_code=503,
+        content={"message": exc.message},
+    )
+
+
 @app.exception_handler(SearchMaxResultsException)
 async def unicorn_exception_handler(request: Request, exc: SearchMaxResultsException):
     """
@@ -0,0 +1,193 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import pickle
+import time
+
+from github_searcher.metrics import metrics
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float | None
+    size: int
+    frequency: int = 1
+
+
+class BoundedMemoryCache:
+    """
+    In-process cache, bounded by number of entries and approximate size of values in bytes.
+    When a bound is exceeded, entries are evicted by policy:
+    - lru: the least recently used entry
+    - lfu: the least frequently used entry (the least recently used among equal)
+    Size of value is reported by its nbytes attribute, or estimated by size of its pickle at the moment of set.
+    Sizes are not estimated at all, if the cache is not bounded by bytes.
+    Supports cache protocol.
+    """
+    _max_size: int
+    _max_bytes: int | None
+    _ttl: float | None
+    _policy: Literal["lru", "lfu"]
+    _name: str
+    _entries: dict[str, _Entry]
+    # Order of eviction for LRU policy: from the least recently used
+    _lru: OrderedDict[str, None]
+    # Order of eviction for LFU policy: frequency -> keys from the least recently used
+    _lfu: dict[int, OrderedDict[str, None]]
+    _resident_bytes: int
+    _evictions: int
+
+    def __init__(
+            self,
+            max_size: int = 256,
+            max_bytes: int | None = None,
+            ttl: float | None = None,
+            policy: Literal["lru", "lfu"] = "lru",
+            name: str = "memory_cache",
+    ):
+        """
+        :param max_size: max number of entries
+        :param max_bytes: approximate max size of all values, bytes (None - no limit)
+        :param ttl: default TTL of entries, seconds (None - no expiration)
+        :param policy: eviction policy, lru or lfu
+        :param name: name of the cache in metrics
+        """
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy {policy}")
+        self._max_size = max_size
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._policy = policy
+        self._name = name
+        self._entries = {}
+        self._lru = OrderedDict()
+        self._lfu = {}
+        self._resident_bytes = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def resident_bytes(self) -> int:
+        return self._resident_bytes
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
+
+    def _estimate_size(self, value: Any) -> int:
+        if self._max_bytes is None:
+            return 0
+        size = getattr(value, "nbytes", None)
+        if size is not None:
+            return size
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return 0
+
+    def _report(self):
+        metrics.set(f"{self._name}_entries", len(self._entries))
+        metrics.set(f"{self._name}_resident_bytes", self._resident_bytes)
+
+    def _touch(self, key: str, entry: _Entry):
+        if self._policy == "lru":
+            self._lru.move_to_end(key)
+            return
+        bucket = self._lfu[entry.frequency]
+        del bucket[key]
+        if not bucket:
+            del self._lfu[entry.frequency]
+        entry.frequency += 1
+        self._lfu.setdefault(entry.frequency, OrderedDict())[key] = None
+
+    def _link(self, key: str, entry: _Entry):
+        if self._policy == "lru":
+            self._lru[key] = None
+        else:
+            self._lfu.setdefault(entry.frequency, OrderedDict())[key] = None
+
+    def _remove(self, key: str) -> _Entry | None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        if self._policy == "lru":
+            del self._lru[key]
+        else:
+            bucket = self._lfu[entry.frequency]
+            del bucket[key]
+            if not bucket:
+                del self._lfu[entry.frequency]
+        self._resident_bytes -= entry.size
+        return entry
+
+    def _victim(self) -> str:
+        if self._policy == "lru":
+            return next(iter(self._lru))
+        return next(iter(self._lfu[min(self._lfu)]))
+
+    def _evict(self, size: int):
+        """
+        Evict entries to make room for a new entry.
+        :param size: size of the new entry
+        """
+        while self._entries and (
+                len(self._entries) + 1 > self._max_size
+                or (self._max_bytes is not None and self._resident_bytes + size > self._max_bytes)
+        ):
+            self._remove(self._victim())
+            self._evictions += 1
+            metrics.inc(f"{self._name}_evictions")
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self._report()
+            return default
+        self._touch(key, entry)
+        return entry.value
+
+    async def set(self, key: str, value: Any, ttl: float | None = None) -> bool:
+        ttl = self._ttl if ttl is None else ttl
+        entry = _Entry(
+            value=value,
+            expires_at=time.monotonic() + ttl if ttl is not None else None,
+            size=self._estimate_size(value),
+        )
+        previous = self._remove(key)
+        if previous is not None:
+            # Replaced value keeps popularity of the key
+            entry.frequency = previous.frequency
+        if self._max_bytes is not None and entry.size > self._max_bytes:
+            # Value doesn't fit into the cache at all.
+            self._report()
+            return False
+
+        self._evict(entry.size)
+        self._entries[key] = entry
+        self._link(key, entry)
+        self._resident_bytes += entry.size
+        self._report()
+        return True
+
+    async def delete(self, key: str) -> int:
+        deleted = self._remove(key) is not None
+        self._report()
+        return 1 if deleted else 0
+
+    async def clear(self) -> bool:
+        self._entries.clear()
+        self._lru.clear()
+        self._lfu.clear()
+        self._resident_bytes = 0
+        self._report()
+        return True
+
+    async def close(self):
+        pass
@@ -0,0 +1,89 @@
+from aiocache import Cache
+
+import logging
+
+from github_searcher.clients.cache.bounded_memory_cache import BoundedMemoryCache
+from github_searcher.clients.cache.cache_protocol import CacheProtocol
+from github_searcher.clients.cache.memcached_cache import IntegerTtlMemcachedCache
+from github_searcher.clients.cache.two_tier_cache import TwoTierCache
+from github_searcher.clients.cache.serializers import SERIALIZERS
+from github_searcher.configs.cache_config import CacheConfig
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_cache(config: CacheConfig) -> CacheProtocol | None:
+    """
+    Build cache client based on config.
+    Shared backends require optional dependencies: redis (redis backend) or aiomcache (memcached backend).
+
+    :param config: cache config
+    :return: cache client or None, if cache is disabled
+    """
+    if not config.enable:
+        return None
+
+    logger.info(f"Use {config.backend} cache backend")
+    if config.backend == "memory":
+        return BoundedMemoryCache(
+            max_size=config.memory_max_size,
+            max_bytes=config.memory_max_bytes,
+            policy=config.memory_policy,
+            name="memory_cache",
+        )
+
+    shared_cache = _build_shared_cache(config)
+    if not config.l1_enable:
+        return shared_cache
+
+    logger.info(f"Use in-process L1 cache in front of {config.backend} cache")
+    return TwoTierCache(
+        l1=BoundedMemoryCache(
+            max_size=config.l1_max_size,
+            max_bytes=config.l1_max_bytes,
+            ttl=config.l1_ttl,
+            policy=config.memory_policy,
+            name="l1_cache",
+        ),
+        l2=shared_cache,
+        l1_ttl=config.l1_ttl,
+        invalidation_interval=config.l1_invalidation_interval,
+    )
+
+
+def _build_shared_cache(config: CacheConfig) -> CacheProtocol:
+    """
+    Build client of shared cache (redis or memcached).
+
+    :param config: cache config
+    :return: cache client
+    """
+    serializer = SERIALIZERS[config.serializer]()
+    if config.backend == "redis":
+        if Cache.REDIS is None:
+            raise RuntimeError("Redis cache backend requires redis package to be installed")
+        return Cache(
+            Cache.REDIS,
+            endpoint=config.endpoint,
+            port=config.port or 6379,
+            db=config.db,
+            password=config.password,
+            pool_max_size=config.pool_size,
+            create_connection_timeout=config.connect_timeout,
+            namespace=config.namespace,
+            serializer=serializer,
+        )
+    if config.backend == "memcached":
+        if IntegerTtlMemcachedCache is None:
+            raise RuntimeError("Memcached cache backend requires aiomcache package to be installed")
+        # TTLs from configs are floats, memcached accepts only integer ones
+        return Cache(
+            IntegerTtlMemcachedCache,
+            endpoint=config.endpoint,
+            port=config.port or 11211,
+            pool_size=config.pool_size,
+            namespace=config.namespace,
+            serializer=serializer,
+        )
+    raise ValueError(f"Unknown cache backend {config.backend}")
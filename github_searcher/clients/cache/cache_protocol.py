@@ -16,3 +16,15 @@ class CacheProtocol(Protocol):
         Put data for cache. Arguments are not specified for support different clients
         """
         raise NotImplementedError
+
+    async def delete(self, *args, **kwargs) -> Any:
+        """
+        Delete data from cache. Arguments are not specified for support different clients
+        """
+        raise NotImplementedError
+
+    async def close(self, *args, **kwargs) -> Any:
+        """
+        Release connections of the client
+        """
+        raise NotImplementedError
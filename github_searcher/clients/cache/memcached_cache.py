@@ -0,0 +1,33 @@
+from aiocache.base import SENTINEL
+
+import math
+
+try:
+    from aiocache.backends.memcached import MemcachedCache
+except ImportError:
+    # Memcached backend requires aiomcache package
+    MemcachedCache = None
+
+
+def integer_ttl(ttl):
+    """
+    Round TTL up to whole seconds, so the entry doesn't expire earlier than requested
+    """
+    if ttl is None or ttl is SENTINEL:
+        return ttl
+    return math.ceil(ttl)
+
+
+if MemcachedCache is not None:
+    class IntegerTtlMemcachedCache(MemcachedCache):
+        """
+        Memcached cache, which accepts float TTLs (as they come from configs).
+        Memcached supports only integer expiration times, and aiomcache rejects floats.
+        """
+        def _get_ttl(self, ttl):
+            return integer_ttl(super()._get_ttl(ttl))
+
+        async def _expire(self, key, ttl, _conn=None):
+            return await super()._expire(key, integer_ttl(ttl), _conn=_conn)
+else:
+    IntegerTtlMemcachedCache = None
@@ -0,0 +1,33 @@
+from aiocache.serializers import BaseSerializer, PickleSerializer
+
+import pickle
+import zlib
+
+
+class CompressedPickleSerializer(BaseSerializer):
+    """
+    Pickle serializer, which compresses pickled values with zlib.
+    Reduces memory of shared cache and traffic to it in exchange for CPU.
+    """
+    DEFAULT_ENCODING = None
+
+    def __init__(self, *args, level: int = 1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._level = level
+
+    def dumps(self, value) -> bytes:
+        return zlib.compress(
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            self._level,
+        )
+
+    def loads(self, value: bytes | None):
+        if value is None:
+            return None
+        return pickle.loads(zlib.decompress(value))
+
+
+SERIALIZERS = {
+    "pickle": PickleSerializer,
+    "pickle_zlib": CompressedPickleSerializer,
+}
@@ -0,0 +1,106 @@
+from typing import Any
+
+import logging
+import time
+import uuid
+
+from github_searcher.clients.cache.cache_protocol import CacheProtocol
+from github_searcher.clients.cache.bounded_memory_cache import BoundedMemoryCache
+
+
+logger = logging.getLogger(__name__)
+
+
+class TwoTierCache:
+    """
+    Cache with two tiers, supports cache protocol.
+    L1 is a small bounded in-process cache with short TTL, L2 is a shared cache (e.g. Redis).
+    Writes go to both tiers, L1 hits don't touch L2 at all.
+
+    Coordination between workers: deletes replace a generation token in L2.
+    Each worker checks the token at most once per invalidation interval
+    and drops its L1, when the token is changed. Updates of values are propagated
+    to other workers' L1 by its short TTL.
+    """
+    GENERATION_KEY = "__l1_generation__"
+
+    _l1: BoundedMemoryCache
+    _l2: CacheProtocol
+    _l1_ttl: float
+    _invalidation_interval: float
+    _generation: str | None
+    _generation_checked_at: float
+
+    def __init__(
+            self,
+            l1: BoundedMemoryCache,
+            l2: CacheProtocol,
+            l1_ttl: float = 5,
+            invalidation_interval: float = 1,
+    ):
+        """
+        :param l1: in-process cache
+        :param l2: shared cache
+        :param l1_ttl: max TTL of L1 entries, seconds
+        :param invalidation_interval: seconds between checks of generation token in L2
+        """
+        self._l1 = l1
+        self._l2 = l2
+        self._l1_ttl = l1_ttl
+        self._invalidation_interval = invalidation_interval
+        self._generation = None
+        self._generation_checked_at = float("-inf")
+
+    async def _check_generation(self):
+        """
+        Drop L1, if entries were invalidated by any worker.
+        """
+        now = time.monotonic()
+        if now - self._generation_checked_at < self._invalidation_interval:
+            return
+        self._generation_checked_at = now
+        generation = await self._l2.get(self.GENERATION_KEY)
+        if generation != self._generation:
+            logger.debug(f"TwoTierCache: L2 generation is changed to {generation}, drop L1")
+            await self._l1.clear()
+        self._generation = generation
+
+    async def _bump_generation(self):
+        # Random token instead of counter, because it can't return to a seen value after clear of L2.
+        self._generation = uuid.uuid4().hex
+        await self._l2.set(self.GENERATION_KEY, self._generation)
+        self._generation_checked_at = time.monotonic()
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        await self._check_generation()
+        value = await self._l1.get(key)
+        if value is not None:
+            return value
+
+        value = await self._l2.get(key)
+        if value is None:
+            return default
+        await self._l1.set(key, value, ttl=self._l1_ttl)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float | None = None) -> bool:
+        result = await self._l2.set(key, value, ttl=ttl)
+        l1_ttl = self._l1_ttl if ttl is None else min(ttl, self._l1_ttl)
+        await self._l1.set(key, value, ttl=l1_ttl)
+        return result
+
+    async def delete(self, key: str) -> int:
+        await self._l1.delete(key)
+        result = await self._l2.delete(key)
+        await self._bump_generation()
+        return result
+
+    async def clear(self) -> bool:
+        await self._l1.clear()
+        await self._l2.clear()
+        await self._bump_generation()
+        return True
+
+    async def close(self):
+        await self._l1.close()
+        await self._l2.close()
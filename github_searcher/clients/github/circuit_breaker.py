@@ -0,0 +1,103 @@
+from enum import Enum
+
+import logging
+import time
+
+from github_searcher.exceptions import GithubApiUnavailableException
+from github_searcher.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for calls to GithubAPI.
+    After several consecutive failures the circuit is opened, and calls fail fast without going to GithubAPI.
+    After the recovery time one probe call is allowed (half open): its success closes the circuit,
+    its failure opens it again.
+    """
+    _failure_threshold: int
+    _recovery_time: float
+    _name: str
+
+    _state: CircuitState
+    _failures: int
+    _opened_at: float
+    # Time when the probe call of the half open circuit was started (0, if it's not in flight)
+    _probe_started_at: float
+
+    def __init__(self, failure_threshold: int = 5, recovery_time: float = 30, name: str = "github_circuit"):
+        """
+        :param failure_threshold: number of consecutive failures, which opens the circuit
+        :param recovery_time: seconds after opening, until the probe call is allowed
+        :param name: prefix of metrics names
+        """
+        self._failure_threshold = failure_threshold
+        self._recovery_time = recovery_time
+        self._name = name
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at = 0.0
+
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    def is_open(self, now: float | None = None) -> bool:
+        """
+        Check that calls are not allowed (the recovery time is not passed,
+        or the probe call of the half open circuit is in flight)
+        """
+        now = time.time() if now is None else now
+        if self._state == CircuitState.OPEN:
+            return now - self._opened_at < self._recovery_time
+        # The probe call could be lost (e.g. cancelled), so the next probe is allowed after the recovery time.
+        return self._state == CircuitState.HALF_OPEN and now - self._probe_started_at < self._recovery_time
+
+    def _set_state(self, state: CircuitState):
+        if state != self._state:
+            logger.warning(f"Circuit {self._name} is {state.value}")
+            self._state = state
+        metrics.set(f"{self._name}_open", int(state != CircuitState.CLOSED))
+
+    def before_call(self):
+        """
+        Check that the call is allowed
+        :raise GithubApiUnavailableException: if the circuit is open
+        """
+        now = time.time()
+        if self.is_open(now):
+            metrics.inc(f"{self._name}_rejected")
+            raise GithubApiUnavailableException()
+        if self._state == CircuitState.OPEN:
+            self._set_state(CircuitState.HALF_OPEN)
+        if self._state == CircuitState.HALF_OPEN:
+            self._probe_started_at = now
+
+    def on_success(self):
+        self._failures = 0
+        self._probe_started_at = 0.0
+        self._set_state(CircuitState.CLOSED)
+
+    def on_failure(self):
+        self._failures += 1
+        self._probe_started_at = 0.0
+        if self._state == CircuitState.HALF_OPEN or self._failures >= self._failure_threshold:
+            self._opened_at = time.time()
+            metrics.inc(f"{self._name}_opened")
+            self._set_state(CircuitState.OPEN)
+
+    def on_skipped(self):
+        """
+        The allowed call was not made (e.g. it was rejected locally), so it doesn't say anything about GithubAPI,
+        and the probe call of the half open circuit is allowed again
+        """
+        self._probe_started_at = 0.0
@@ -2,6 +2,7 @@ from aiohttp import ClientSession
 from datetime import date
 from typing import Protocol
 
+from github_searcher.clients.github.search_repos_page import PageValidators, SearchReposPage
 from github_searcher.schemas.github_api import GARepository
 
 
@@ -15,6 +16,7 @@ class GithubAPIClientProtocol(Protocol):
             page_id: int | None = None,
             created_from: date | None = None,
             lang: str | None = None,
+            per_page: int | None = None,
     ) -> list[GARepository]:
         """
         Method to search in github repos
@@ -22,6 +24,34 @@ class GithubAPIClientProtocol(Protocol):
         :param page_id: number of page which need to get
         :param created_from: data to search repos created after
         :param lang: language to search repos written with
+        :param per_page: number of repos per page (max 100, GithubAPI default is 30)
         :return: list of repos
         """
         raise NotImplementedError
+
+    async def search_repos_page(
+            self,
+            session: ClientSession,
+            page_id: int | None = None,
+            created_from: date | None = None,
+            lang: str | None = None,
+            per_page: int | None = None,
+            validators: PageValidators | None = None,
+            background: bool = False,
+            created_to: date | None = None,
+            stars_max: int | None = None,
+    ) -> SearchReposPage:
+        """
+        Method to search in github repos with revalidation of the previous response
+        :param session: session for making request
+        :param page_id: number of page which need to get
+        :param created_from: data to search repos created after
+        :param lang: language to search repos written with
+        :param per_page: number of repos per page (max 100, GithubAPI default is 30)
+        :param validators: validators of the previous response for the same page
+        :param background: request is not awaited by clients (could be deprioritized)
+        :param created_to: data to search repos created before or on (to shard the search)
+        :param stars_max: max number of stars of repos (to shard the search)
+        :return: page of repos (without items, if it's not modified)
+        """
+        raise NotImplementedError
@@ -1,13 +1,27 @@
-from aiohttp import ClientSession
+from aiohttp import ClientError, ClientSession
 from datetime import date
+from http import HTTPStatus
+from pydantic import ValidationError
+from typing import Awaitable, Callable, TypeVar
 
+import asyncio
+import json
 import logging
+import time
 
+from github_searcher.clients.github.circuit_breaker import CircuitBreaker
+from github_searcher.clients.github.latency_window import LatencyWindow
+from github_searcher.clients.github.request_policy import RequestPolicy
+from github_searcher.clients.github.search_repos_page import PageValidators, SearchReposPage
+from github_searcher.clients.github.token_pool import TokenPool
 from github_searcher.clients.github.url_builder import GithubAPIUrlBuilder
 from github_searcher.exceptions import (
     GithubApiRateLimitException,
+    GithubApiRateLimitRejectedException,
+    GithubApiUnavailableException,
     SearchMaxResultsException,
 )
+from github_searcher.metrics import metrics
 from github_searcher.schemas.github_api import (
     GARepository,
     GARepositoriesSearchResponse,
@@ -16,15 +30,44 @@ from github_searcher.schemas.github_api import (
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class CustomAsyncGithubAPIClient:
     """
-    Custom asynchronius client
+    Custom asynchronius client.
+    Every request is made with the token, chosen from the pool by remaining quota,
+    and is admitted by the rate limit budget of the token.
+    Failed requests are retried by the request policy, and while GithubAPI is failing,
+    the circuit breaker rejects requests without sending them.
     """
-    _token: str | None
+    # Statuses, after which the request is repeated with another token
+    REFUSED_STATUSES = (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN, HTTPStatus.TOO_MANY_REQUESTS)
+    # Errors, after which the request is retried (5xx responses raise ClientResponseError)
+    RETRIABLE_ERRORS = (ClientError, asyncio.TimeoutError)
+
+    _token_pool: TokenPool
+    _request_policy: RequestPolicy
+    _circuit_breaker: CircuitBreaker
+    _latencies: LatencyWindow
 
-    def __init__(self, token: str | None = None):
-        self._token = token
+    def __init__(
+            self,
+            token: str | None = None,
+            token_pool: TokenPool | None = None,
+            request_policy: RequestPolicy | None = None,
+            circuit_breaker: CircuitBreaker | None = None,
+    ):
+        """
+        :param token: GithubAPI token, if the pool is not provided
+        :param token_pool: pool of GithubAPI tokens
+        :param request_policy: timeouts, retries and hedging of requests
+        :param circuit_breaker: circuit breaker for requests
+        """
+        self._token_pool = token_pool if token_pool is not None else TokenPool(tokens=[token] if token else None)
+        self._request_policy = request_policy or RequestPolicy()
+        self._circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._latencies = LatencyWindow()
 
     @staticmethod
     def _check_rate_limit_msg(msg: str) -> bool:
@@ -48,39 +91,242 @@ class CustomAsyncGithubAPIClient:
             elif CustomAsyncGithubAPIClient._check_search_result_limit(msg):
                 raise SearchMaxResultsException()
 
-    async def search_repos(
+    async def search_repos_page(
         self,
         session: ClientSession,
         page_id: int = 0,
         created_from: date | None = None,
         lang: str | None = None,
-    ) -> list[GARepository]:
+        per_page: int | None = None,
+        validators: PageValidators | None = None,
+        background: bool = False,
+        created_to: date | None = None,
+        stars_max: int | None = None,
+    ) -> SearchReposPage:
         """
         Main method to search through github repos, using aiohttp to connect to API.
-        If token is provided, apply for requests (increases rate limits to API)
+        If tokens are provided, apply for requests (increases rate limits to API).
+        If the token is refused or rate limited, the request is repeated with another token from the pool.
+        Failed requests (5xx, connection errors, timeouts) are retried with backoff.
+        If validators of the previous response are provided, the request is conditional:
+        on 304 Not Modified the body is not downloaded and parsed.
 
-        :param session: session for making request
+        :param session: shared session for making request, keeps pool of connections
         :param page_id: number of page which need to get
         :param created_from: data to search repos created after
         :param lang: language to search repos written with
-        :return: list of repos
+        :param per_page: number of repos per page (max 100, GithubAPI default is 30)
+        :param validators: ETag and Last-Modified of the previous response for the same page
+        :param background: request is not awaited by clients (is deprioritized near rate limit exhaustion)
+        :param created_to: data to search repos created before or on (to shard the search)
+        :param stars_max: max number of stars of repos (to shard the search)
+        :return: page of repos with its validators
         """
         url = GithubAPIUrlBuilder.get_search_repositories_url(
             page_id=page_id,
             created_from=created_from,
             lang=lang,
+            per_page=per_page,
+            created_to=created_to,
+            stars_max=stars_max,
+        )
+        headers = {}
+        if validators and validators.etag:
+            headers["If-None-Match"] = validators.etag
+        if validators and validators.last_modified:
+            headers["If-Modified-Since"] = validators.last_modified
+
+        return await self._call(
+            request=lambda: self._request_page(session, url, headers, validators, background),
+            background=background,
         )
-        headers = {
-            "Authorization": f"Bearer {self._token}"
-        } if self._token else {}
-
-        logger.debug(f"CustomAsyncGithubAPIClient: GET {url}")
-        api_response = await session.get(
-            url=url,
-            headers=headers,
+
+    async def _request_page(
+        self,
+        session: ClientSession,
+        url: str,
+        headers: dict[str, str],
+        validators: PageValidators | None,
+        background: bool,
+    ) -> SearchReposPage:
+        """
+        One attempt to get the page of repos.
+        If the token is refused or rate limited, the request is repeated with another token from the pool.
+        """
+        for attempt in range(len(self._token_pool)):
+            token = self._token_pool.choose()
+            logger.debug(f"CustomAsyncGithubAPIClient: GET {url} with {token.name}")
+            # Response is released back to the session's connection pool on exit.
+            async with token.budget.admit(background=background), session.get(
+                url=url,
+                headers={**headers, **token.headers},
+            ) as api_response:
+                self._token_pool.update(token, api_response.status, api_response.headers)
+                if (
+                        api_response.status in self.REFUSED_STATUSES
+                        and attempt < len(self._token_pool) - 1
+                        and self._token_pool.has_usable(exclude=token)
+                ):
+                    metrics.inc("github_token_retries")
+                    continue
+                if api_response.status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                    api_response.raise_for_status()
+                if api_response.status == HTTPStatus.NOT_MODIFIED:
+                    logger.debug(f"CustomAsyncGithubAPIClient: not modified {url}")
+                    return SearchReposPage(
+                        items=None,
+                        validators=validators,
+                        not_modified=True,
+                    )
+                body = await api_response.read()
+                response_validators = PageValidators(
+                    etag=api_response.headers.get("ETag"),
+                    last_modified=api_response.headers.get("Last-Modified"),
+                )
+            break
+        try:
+            # Body is parsed in one pass from bytes, only fields of the schema are built, the rest are skipped.
+            parsed_response = GARepositoriesSearchResponse.model_validate_json(body)
+        except ValidationError as e:
+            # Error responses don't match the schema, they are checked for known errors.
+            try:
+                response = json.loads(body)
+            except ValueError:
+                # Not JSON at all (e.g. an error page of a proxy)
+                logger.warning(f"CustomAsyncGithubAPIClient: not JSON response {body[:100]!r}")
+                raise GithubApiUnavailableException() from e
+            if isinstance(response, dict):
+                self._check_response(response)
+            raise
+        return SearchReposPage(
+            items=parsed_response.items,
+            validators=response_validators,
+            total_count=parsed_response.total_count,
         )
-        response_json = await api_response.json()
-        self._check_response(response_json)
-        parsed_response = GARepositoriesSearchResponse(**response_json)
-        return parsed_response.items
 
+    def _hedge_delay(self) -> float | None:
+        """
+        Seconds after which the second request is sent (None, if requests are not hedged)
+        """
+        if not self._request_policy.hedge or len(self._latencies) < self._request_policy.hedge_min_samples:
+            return None
+        return self._latencies.quantile(self._request_policy.hedge_quantile)
+
+    async def _attempt(self, request: Callable[[], Awaitable[T]], timeout: float) -> T:
+        st_time = time.monotonic()
+        result = await asyncio.wait_for(request(), timeout=timeout)
+        self._latencies.observe(time.monotonic() - st_time)
+        return result
+
+    async def _hedged(self, request: Callable[[], Awaitable[T]], timeout: float, background: bool) -> T:
+        """
+        Make the attempt, and if it's slower than the most of requests, send the second one.
+        The first successful response is returned, the other request is cancelled.
+        Background requests are not hedged, because nobody waits for them.
+        """
+        delay = None if background else self._hedge_delay()
+        if delay is None or delay >= timeout:
+            return await self._attempt(request, timeout)
+
+        first = asyncio.ensure_future(self._attempt(request, timeout))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                metrics.inc("github_hedged_requests")
+                tasks.add(asyncio.ensure_future(self._attempt(request, timeout - delay)))
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            metrics.inc("github_hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _call(self, request: Callable[[], Awaitable[T]], background: bool = False) -> T:
+        """
+        Call GithubAPI with timeouts, retries with backoff and hedging, through the circuit breaker.
+
+        :param request: function, which makes one attempt
+        :param background: request is not awaited by clients
+        :raise GithubApiUnavailableException: if the circuit is open, or all attempts failed
+        """
+        policy = self._request_policy
+        self._circuit_breaker.before_call()
+        deadline = time.monotonic() + policy.total_timeout
+        retry = 0
+        while True:
+            timeout = min(policy.attempt_timeout, deadline - time.monotonic())
+            try:
+                result = await self._hedged(request, timeout, background)
+            except self.RETRIABLE_ERRORS as e:
+                metrics.inc("github_request_failures")
+                self._circuit_breaker.on_failure()
+                backoff = policy.backoff(retry)
+                if (
+                        retry >= policy.retries
+                        or time.monotonic() + backoff >= deadline
+                        or self._circuit_breaker.is_open()
+                ):
+                    logger.warning(f"CustomAsyncGithubAPIClient: request failed after {retry + 1} attempts: {e!r}")
+                    raise GithubApiUnavailableException() from e
+                logger.info(f"CustomAsyncGithubAPIClient: retry in {backoff:.2f} seconds after error {e!r}")
+                metrics.inc("github_request_retries")
+                retry += 1
+                await asyncio.sleep(backoff)
+                continue
+            except GithubApiRateLimitRejectedException:
+                # The request was not sent to GithubAPI
+                self._circuit_breaker.on_skipped()
+                raise
+            except (GithubApiRateLimitException, SearchMaxResultsException):
+                # GithubAPI is available, it just refused the request
+                self._circuit_breaker.on_success()
+                raise
+            except GithubApiUnavailableException:
+                # GithubAPI answered with an unusable response
+                self._circuit_breaker.on_failure()
+                raise
+            except Exception:
+                # GithubAPI answered, but the response doesn't match the schema (e.g. unknown error)
+                self._circuit_breaker.on_success()
+                raise
+            except BaseException:
+                # The call is cancelled, so it doesn't say anything about GithubAPI
+                self._circuit_breaker.on_skipped()
+                raise
+            self._circuit_breaker.on_success()
+            return result
+
+    async def search_repos(
+        self,
+        session: ClientSession,
+        page_id: int = 0,
+        created_from: date | None = None,
+        lang: str | None = None,
+        per_page: int | None = None,
+    ) -> list[GARepository]:
+        """
+        Search through github repos without revalidation.
+
+        :param session: shared session for making request, keeps pool of connections
+        :param page_id: number of page which need to get
+        :param created_from: data to search repos created after
+        :param lang: language to search repos written with
+        :param per_page: number of repos per page (max 100, GithubAPI default is 30)
+        :return: list of repos
+        """
+        page = await self.search_repos_page(
+            session=session,
+            page_id=page_id,
+            created_from=created_from,
+            lang=lang,
+            per_page=per_page,
+        )
+        return page.items
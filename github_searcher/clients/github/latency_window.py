@@ -0,0 +1,29 @@
+from collections import deque
+
+import math
+
+
+class LatencyWindow:
+    """
+    Latencies of the last requests to estimate their quantiles.
+    """
+    _latencies: deque[float]
+
+    def __init__(self, size: int = 100):
+        self._latencies = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+    def observe(self, latency: float):
+        self._latencies.append(latency)
+
+    def quantile(self, q: float) -> float | None:
+        """
+        :param q: quantile in [0, 1]
+        :return: latency, which the share q of the last requests didn't exceed (None, if there are no requests)
+        """
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(max(math.ceil(q * len(ordered)) - 1, 0), len(ordered) - 1)]
@@ -0,0 +1,209 @@
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Mapping
+
+import asyncio
+import logging
+import time
+
+from github_searcher.exceptions import GithubApiRateLimitRejectedException
+from github_searcher.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBudget:
+    """
+    Budget of GithubAPI requests of one token, shared by all requests of the process with this token.
+    The budget is tracked by rate limit headers of every response (X-RateLimit-Remaining, X-RateLimit-Reset,
+    Retry-After), and requests are admitted before they are sent:
+    - while the budget is exhausted (or Retry-After is not passed), requests are queued until the reset,
+      if it's not too long to wait, otherwise they are rejected without going to GithubAPI;
+    - when a few requests are left, they are paced evenly until the reset;
+    - background requests don't use the last requests of the budget, which are left for clients.
+    """
+    _background_reserve: int
+    _pace_threshold: int
+    _max_wait: float
+    _name: str
+
+    _limit: int | None
+    # Remaining requests in the current window, None if unknown
+    _remaining: int | None
+    # Time when the current window is reset
+    _reset_at: float
+    # Time until requests are not allowed (Retry-After)
+    _blocked_until: float
+    # Admitted requests without response yet
+    _in_flight: int
+    # Time of the next request, when requests are paced
+    _next_slot: float
+
+    def __init__(
+            self,
+            background_reserve: int = 3,
+            pace_threshold: int = 5,
+            max_wait: float = 5,
+            name: str = "github_rate_limit",
+    ):
+        """
+        :param background_reserve: number of remaining requests, which are not used by background requests
+        :param pace_threshold: number of remaining requests, from which requests are paced until the reset
+        :param max_wait: max seconds a request is queued or paced, before it's rejected
+        :param name: prefix of metrics names
+        """
+        self._background_reserve = background_reserve
+        self._pace_threshold = pace_threshold
+        self._max_wait = max_wait
+        self._name = name
+        self._limit = None
+        self._remaining = None
+        self._reset_at = 0.0
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self._next_slot = 0.0
+
+    @staticmethod
+    def _parse_int(value: str | None) -> int | None:
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _parse_retry_after(value: str | None, now: float) -> float | None:
+        """
+        Retry-After is either delay in seconds, or HTTP date
+        """
+        if value is None:
+            return None
+        try:
+            return now + float(value)
+        except ValueError:
+            pass
+        try:
+            return parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    @property
+    def limit(self) -> int | None:
+        return self._limit
+
+    @property
+    def reset_at(self) -> float:
+        return self._reset_at
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def available(self, now: float | None = None) -> int | None:
+        """
+        Number of requests, which could be sent before the reset (None, if it's unknown)
+        """
+        now = time.time() if now is None else now
+        if self._remaining is None or self._reset_at <= now:
+            # The window is reset, the budget is full again
+            return None
+        return self._remaining - self._in_flight
+
+    def is_low(self, now: float | None = None) -> bool:
+        """
+        Check that only reserved requests are left, so background requests are not admitted
+        """
+        now = time.time() if now is None else now
+        if self._blocked_until > now:
+            return True
+        available = self.available(now)
+        return available is not None and available <= self._background_reserve
+
+    def update(self, headers: Mapping[str, str], now: float | None = None):
+        """
+        Update the budget by rate limit headers of GithubAPI response
+        """
+        now = time.time() if now is None else now
+        limit = self._parse_int(headers.get("X-RateLimit-Limit"))
+        remaining = self._parse_int(headers.get("X-RateLimit-Remaining"))
+        reset_at = self._parse_int(headers.get("X-RateLimit-Reset"))
+        blocked_until = self._parse_retry_after(headers.get("Retry-After"), now)
+
+        if limit is not None:
+            self._limit = limit
+        if remaining is not None and reset_at is not None:
+            if reset_at != self._reset_at or self._remaining is None:
+                self._remaining = remaining
+                self._reset_at = reset_at
+            else:
+                # Responses of concurrent requests come in any order, the budget only decreases in the window.
+                self._remaining = min(self._remaining, remaining)
+        if blocked_until is not None:
+            self._blocked_until = max(self._blocked_until, blocked_until)
+
+        if self._limit is not None:
+            metrics.set(f"{self._name}_limit", self._limit)
+        if self._remaining is not None:
+            metrics.set(f"{self._name}_remaining", self._remaining)
+            metrics.set(f"{self._name}_reset_at", self._reset_at)
+
+    def wait_time(self, now: float | None = None) -> float:
+        """
+        Seconds until requests are allowed again
+        """
+        now = time.time() if now is None else now
+        wait = self._blocked_until - now
+        available = self.available(now)
+        if available is not None and available <= 0:
+            wait = max(wait, self._reset_at - now)
+        return max(wait, 0.0)
+
+    def _reject(self, reason: str):
+        metrics.inc("github_requests_rejected")
+        logger.warning(f"GithubAPI request is rejected: {reason}")
+        raise GithubApiRateLimitRejectedException()
+
+    async def _acquire(self, background: bool):
+        wait = self.wait_time()
+        while wait > 0:
+            if background or wait > self._max_wait:
+                self._reject(f"rate limit is exhausted for {wait:.1f} seconds")
+            metrics.inc("github_requests_queued")
+            await asyncio.sleep(wait)
+            wait = self.wait_time()
+
+        now = time.time()
+        available = self.available(now)
+        if background and self.is_low(now):
+            self._reject(f"{available} requests are reserved for clients")
+
+        delay = 0.0
+        if available is not None and available <= self._pace_threshold:
+            slot = max(now, self._next_slot)
+            delay = slot - now
+            if delay > self._max_wait:
+                self._reject(f"next request could be sent in {delay:.1f} seconds")
+            self._next_slot = slot + (self._reset_at - now) / available
+        # Request is counted, while it's waiting, so concurrent requests see the reduced budget.
+        self._in_flight += 1
+        if delay > 0:
+            metrics.inc("github_requests_paced")
+            try:
+                await asyncio.sleep(delay)
+            except BaseException:
+                self._in_flight -= 1
+                raise
+
+    @asynccontextmanager
+    async def admit(self, background: bool = False) -> AsyncIterator[None]:
+        """
+        Wait until the request could be sent, and count it as in flight until the response.
+        :param background: request is not awaited by clients, so it's rejected first near exhaustion
+        """
+        await self._acquire(background)
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
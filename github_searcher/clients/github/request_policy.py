@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+
+import random
+
+
+@dataclass(frozen=True)
+class RequestPolicy:
+    """
+    Timeouts, retries and hedging of requests to GithubAPI.
+    """
+    # Seconds to wait for one attempt
+    attempt_timeout: float = 10
+    # Seconds to wait for the request with all its attempts
+    total_timeout: float = 30
+    # Number of retries after failed attempts (5xx, connection errors and timeouts)
+    retries: int = 2
+    # Seconds to wait before the first retry, doubled for every next retry
+    backoff_base: float = 0.2
+    # Max seconds to wait before retry
+    backoff_max: float = 2
+    # Send the second request, if the first one is slower than the quantile of latencies
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    # Min number of observed latencies to estimate the quantile
+    hedge_min_samples: int = 20
+
+    def backoff(self, retry: int) -> float:
+        """
+        Seconds to wait before the retry (exponential backoff with full jitter,
+        so retries of concurrent requests are spread in time)
+        :param retry: number of the retry, starting from 0
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** retry))
@@ -0,0 +1,28 @@
+from dataclasses import dataclass
+
+from github_searcher.schemas.github_api import GARepository
+
+
+@dataclass(frozen=True)
+class PageValidators:
+    """
+    Validators of GithubAPI response, used to revalidate the page by conditional request.
+    """
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def __bool__(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+@dataclass(frozen=True)
+class SearchReposPage:
+    """
+    One page of GithubAPI search results with its validators.
+    If the page is not modified since the validators were received, items are not provided.
+    """
+    items: list[GARepository] | None
+    validators: PageValidators
+    not_modified: bool = False
+    # Number of all results of the search (None, if it's not known)
+    total_count: int | None = None
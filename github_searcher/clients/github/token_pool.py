@@ -0,0 +1,184 @@
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Mapping
+
+import logging
+import time
+
+from github_searcher.clients.github.rate_limit_budget import RateLimitBudget
+from github_searcher.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledToken:
+    """
+    GithubAPI token (None for anonymous requests) with its own rate limit budget.
+    """
+    token: str | None
+    budget: RateLimitBudget
+    # Name of the token in logs and metrics (the token itself is secret)
+    name: str
+    # Time until the token is not used
+    quarantined_until: float = 0.0
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    def is_quarantined(self, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        return self.quarantined_until > now
+
+
+class TokenPool:
+    """
+    Pool of GithubAPI tokens, each with its own rate limit quota.
+    For every request the pool chooses the token, which could be used soonest,
+    with the most remaining quota and the earliest reset, so the total quota is used evenly.
+    Tokens, which are refused (401, 403) or rate limited, are quarantined temporarily.
+    """
+    _tokens: list[PooledToken]
+    _quarantine_time: float
+
+    def __init__(
+            self,
+            tokens: list[str] | None = None,
+            quarantine_time: float = 300,
+            background_reserve: int = 3,
+            pace_threshold: int = 5,
+            max_wait: float = 5,
+    ):
+        """
+        :param tokens: GithubAPI tokens (requests are anonymous, if there are no tokens)
+        :param quarantine_time: seconds, while a refused token is not used
+        :param background_reserve: number of remaining requests of a token, which are not used by background requests
+        :param pace_threshold: number of remaining requests of a token, from which its requests are paced
+        :param max_wait: max seconds a request is queued or paced, before it's rejected
+        """
+        self._quarantine_time = quarantine_time
+        self._tokens = [
+            PooledToken(
+                token=token,
+                budget=RateLimitBudget(
+                    background_reserve=background_reserve,
+                    pace_threshold=pace_threshold,
+                    max_wait=max_wait,
+                    name=f"github_token_{i}_rate_limit",
+                ),
+                name=f"github_token_{i}",
+            )
+            for i, token in enumerate(list(dict.fromkeys(tokens or [])) or [None])
+        ]
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    @property
+    def tokens(self) -> list[PooledToken]:
+        return self._tokens
+
+    def _usable(self, now: float) -> list[PooledToken]:
+        return [token for token in self._tokens if not token.is_quarantined(now)]
+
+    def choose(self) -> PooledToken:
+        """
+        Choose the token for the next request.
+        If all tokens are quarantined, the token, which is released first, is chosen.
+        """
+        now = time.time()
+        usable = self._usable(now)
+        if not usable:
+            return min(self._tokens, key=lambda token: token.quarantined_until)
+
+        def rank(token: PooledToken) -> tuple:
+            available = token.budget.available(now)
+            return (
+                token.budget.wait_time(now),
+                -(available if available is not None else float("inf")),
+                token.budget.in_flight,
+                token.budget.reset_at,
+            )
+        return min(usable, key=rank)
+
+    def has_usable(self, exclude: PooledToken | None = None) -> bool:
+        """
+        Check that there is a token (besides the excluded one), which could be used without waiting
+        """
+        now = time.time()
+        return any(
+            token is not exclude and token.budget.wait_time(now) == 0
+            for token in self._usable(now)
+        )
+
+    def is_low(self, now: float | None = None) -> bool:
+        """
+        Check that only reserved requests are left for all usable tokens
+        """
+        now = time.time() if now is None else now
+        return all(token.budget.is_low(now) for token in self._usable(now))
+
+    def remaining_share(self, now: float | None = None) -> float:
+        """
+        Share of the total quota of usable tokens, which is not used in the current windows
+        (tokens, which quota is not known yet, are not counted)
+        """
+        now = time.time() if now is None else now
+        usable = self._usable(now)
+        if not usable:
+            return 0.0
+        total = remaining = 0
+        for token in usable:
+            limit = token.budget.limit
+            if limit is None:
+                continue
+            available = token.budget.available(now)
+            total += limit
+            remaining += limit if available is None else max(available, 0)
+        return remaining / total if total else 1.0
+
+    def window(self, now: float | None = None) -> tuple[int, float] | None:
+        """
+        Total quota of usable tokens and the time, when the last of their current windows is reset
+        (None, if the quota is not known yet)
+        """
+        now = time.time() if now is None else now
+        known = [token.budget for token in self._usable(now) if token.budget.limit is not None]
+        if not known:
+            return None
+        return sum(budget.limit for budget in known), max(budget.reset_at for budget in known)
+
+    def _quarantine(self, token: PooledToken, until: float, reason: str):
+        token.quarantined_until = max(token.quarantined_until, until)
+        metrics.inc(f"{token.name}_quarantines")
+        metrics.set(f"{token.name}_quarantined_until", token.quarantined_until)
+        logger.warning(f"GithubAPI token {token.name} is quarantined for {until - time.time():.0f} seconds: {reason}")
+
+    def update(self, token: PooledToken, status: int, headers: Mapping[str, str]):
+        """
+        Update the token by GithubAPI response
+        :param token: token, which was used for the request
+        :param status: status of the response
+        :param headers: headers of the response
+        """
+        now = time.time()
+        token.budget.update(headers, now)
+        metrics.inc(f"{token.name}_requests")
+
+        if status == HTTPStatus.UNAUTHORIZED:
+            self._quarantine(token, now + self._quarantine_time, "bad credentials")
+        elif status in (HTTPStatus.FORBIDDEN, HTTPStatus.TOO_MANY_REQUESTS):
+            wait = token.budget.wait_time(now)
+            if wait > 0:
+                self._quarantine(token, now + wait, "rate limit exceeded")
+            else:
+                self._quarantine(token, now + self._quarantine_time, "forbidden")
+
+        remaining = [
+            token.budget.available(now)
+            for token in self._usable(now)
+        ]
+        if all(available is not None for available in remaining):
+            metrics.set("github_rate_limit_remaining", sum(remaining))
@@ -1,4 +1,5 @@
-from datetime import date
+from datetime import date, timedelta
+from urllib.parse import quote
 
 import os
 
@@ -16,6 +17,8 @@ class GithubAPIUrlBuilder:
         GITHUB_API_SEARCH_URL,
         "repositories",
     )
+    # Max number of results per page, supported by GithubAPI
+    MAX_PER_PAGE = 100
 
     @classmethod
     def _search_query(
@@ -23,24 +26,36 @@ class GithubAPIUrlBuilder:
         page_id: int | None = None,
         created_from: date | None = None,
         lang: str | None = None,
+        per_page: int | None = None,
+        created_to: date | None = None,
+        stars_max: int | None = None,
     ) -> str:
         """
         Build search query in GithibAPI required format.
         :param page_id: number of page which need to get
         :param created_from: data to search repos created after
         :param lang: language to search repos written with
+        :param per_page: number of results per page (max 100)
+        :param created_to: data to search repos created before or on
+        :param stars_max: max number of stars of repos
         :return: query
         """
+        if per_page is not None and not 1 <= per_page <= cls.MAX_PER_PAGE:
+            raise ValueError(f"per_page should be in range [1, {cls.MAX_PER_PAGE}], got {per_page}")
 
         # Without filter on starts, GithubAPI produces invalid response.
         q = [
             "is:public",
-            "stars:>1",
+            f"stars:2..{stars_max}" if stars_max is not None else "stars:>1",
         ]
-        if created_from:
+        if created_to:
+            created_after = (created_from + timedelta(days=1)).strftime('%Y-%m-%d') if created_from else "*"
+            q.append(f"created:{created_after}..{created_to.strftime('%Y-%m-%d')}")
+        elif created_from:
             q.append(f"created:>{created_from.strftime('%Y-%m-%d')}")
         if lang:
-            q.append(f"language:{lang}")
+            # Languages like c++ and c# have characters, which are special in URLs
+            q.append(f"language:{quote(lang, safe='')}")
 
         query = [
             '+'.join(q),
@@ -48,6 +63,8 @@ class GithubAPIUrlBuilder:
             "order=desc",
         ]
 
+        if per_page:
+            query.append(f"per_page={per_page}")
         if page_id:
             query.append(f"page={page_id}")
 
@@ -59,17 +76,26 @@ class GithubAPIUrlBuilder:
         page_id: int | None = None,
         created_from: date | None = None,
         lang: str | None = None,
+        per_page: int | None = None,
+        created_to: date | None = None,
+        stars_max: int | None = None,
     ) -> str:
         """
         Build URL of searching in Githib.
         :param page_id: number of page which need to get
         :param created_from: data to search repos created after
         :param lang: language to search repos written with
+        :param per_page: number of results per page (max 100)
+        :param created_to: data to search repos created before or on
+        :param stars_max: max number of stars of repos
         :return: URL for GET request
         """
         q = cls._search_query(
             page_id=page_id,
             created_from=created_from,
             lang=lang,
+            per_page=per_page,
+            created_to=created_to,
+            stars_max=stars_max,
         )
         return f"{cls.GITHUB_API_SEARCH_REPOSITORIES_URL}?q={q}"
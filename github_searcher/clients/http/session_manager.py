@@ -0,0 +1,73 @@
+from aiohttp import ClientSession, TCPConnector
+
+import asyncio
+import logging
+
+from github_searcher.configs.http_client_config import HttpClientConfig
+
+
+logger = logging.getLogger(__name__)
+
+
+class ClientSessionManager:
+    """
+    Owner of the single aiohttp session, shared by the whole application.
+    The session keeps a pool of connections, so TLS handshakes and DNS lookups
+    are made once and reused between requests.
+    """
+    _config: HttpClientConfig
+    _session: ClientSession | None
+    _loop: asyncio.AbstractEventLoop | None
+
+    def __init__(self, config: HttpClientConfig):
+        self._config = config
+        self._session = None
+        self._loop = None
+
+    def _create_session(self) -> ClientSession:
+        connector = TCPConnector(
+            limit=self._config.pool_size,
+            limit_per_host=self._config.limit_per_host,
+            keepalive_timeout=self._config.keepalive_timeout,
+            ttl_dns_cache=self._config.dns_cache_ttl,
+            use_dns_cache=True,
+        )
+        return ClientSession(connector=connector)
+
+    async def start(self) -> ClientSession:
+        """
+        Open the session, if it is not opened yet.
+        :return: opened session
+        """
+        return self.get_session()
+
+    def get_session(self) -> ClientSession:
+        """
+        Get the shared session. The session is created lazily,
+        and re-created if the previous one was closed or its event loop was closed.
+        :raise RuntimeError: if the session is used from another event loop, while its own loop is alive
+        :return: opened session
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._loop is not loop:
+            if not self._loop.is_closed():
+                raise RuntimeError("Client session is bound to another running event loop, close it first")
+            # Connections of the closed loop could not be used or closed gracefully anymore,
+            # so the session is released without them.
+            logger.debug("ClientSessionManager: release client session of the closed event loop")
+            self._session.detach()
+        if self._session is None or self._session.closed:
+            logger.debug("ClientSessionManager: open new client session")
+            self._session = self._create_session()
+            self._loop = loop
+        return self._session
+
+    async def close(self):
+        """
+        Close the session and all pooled connections.
+        """
+        if self._session is not None and not self._session.closed:
+            logger.debug("ClientSessionManager: close client session")
+            await self._session.close()
+        self._session = None
+        self._loop = None
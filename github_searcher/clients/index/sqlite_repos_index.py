@@ -0,0 +1,331 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Iterable
+
+import logging
+import sqlite3
+import time
+
+from github_searcher.metrics import metrics
+from github_searcher.schemas.github_api.repository import GARepository, RepositoryOwnerModel
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexedSlice:
+    """
+    Repos, answered from the index, and the time of the crawl, which stored them.
+    """
+    repos: list[GARepository]
+    crawled_at: float
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """
+    Freshness watermark of one crawled scope (language and creation window).
+    """
+    lang: str | None
+    created_from: date | None
+    # Number of stored repos, and the flag that there are no more repos after them
+    depth: int
+    complete: bool
+    crawled_at: float
+
+
+class SqliteReposIndex:
+    """
+    Local materialized index of the most popular repos, kept in SQLite.
+
+    The index consists of scopes (language and creation window): every scope holds the top repos
+    of its search, as they were ranked by GithubAPI at the crawl time, and its freshness watermark.
+    A query (created_from, language) is answered by a scope of the same language with the window,
+    which includes created_from: repos of the scope created since created_from are exactly the top
+    of the query, while there are enough of them (or the scope is complete).
+    Scopes older than the max staleness are not used, so requests fall back to GithubAPI.
+
+    Queries are served by the index on (language, window, created_at, stars) and take well under
+    a millisecond, so they are run in the event loop.
+
+    The database is opened on startup in the thread of the event loop, and is used only from it.
+    Workers could share the database file: only one of them crawls at a time, holding the crawl lock row.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scopes (
+            language TEXT NOT NULL,
+            window_start REAL NOT NULL,
+            depth INTEGER NOT NULL,
+            complete INTEGER NOT NULL,
+            crawled_at REAL NOT NULL,
+            PRIMARY KEY (language, window_start)
+        );
+        CREATE TABLE IF NOT EXISTS repos (
+            language TEXT NOT NULL,
+            window_start REAL NOT NULL,
+            rank INTEGER NOT NULL,
+            id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            full_name TEXT NOT NULL,
+            owner TEXT NOT NULL,
+            description TEXT,
+            created_at REAL NOT NULL,
+            naive INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            stars INTEGER NOT NULL,
+            watchers INTEGER NOT NULL,
+            repo_language TEXT,
+            PRIMARY KEY (language, window_start, rank)
+        );
+        CREATE INDEX IF NOT EXISTS repos_language_created_at_stars
+            ON repos (language, window_start, created_at, stars);
+        CREATE TABLE IF NOT EXISTS crawl_lock (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+    """
+    REPO_COLUMNS = "id, name, full_name, owner, description, created_at, naive, url, stars, watchers, repo_language"
+
+    _path: str
+    _connection: sqlite3.Connection | None
+    _max_staleness: float
+
+    def __init__(self, path: str = ":memory:", max_staleness: float = 3600):
+        """
+        :param path: path of SQLite database
+        :param max_staleness: seconds after the crawl, while the scope is used
+        """
+        self._path = path
+        self._connection = None
+        self._max_staleness = max_staleness
+
+    def open(self):
+        """
+        Open the database and create its schema, if it's not opened yet.
+        """
+        if self._connection is not None:
+            return
+        self._connection = sqlite3.connect(self._path)
+        self._connection.executescript(self.SCHEMA)
+
+    @staticmethod
+    def _language_key(lang: str | None) -> str:
+        # GithubAPI language qualifier is case-insensitive
+        return lang.lower() if lang else ""
+
+    @staticmethod
+    def _window_start(created_from: date | None) -> float:
+        # GithubAPI searches repos created after the date, so the window starts on the next day.
+        if created_from is None:
+            return 0.0
+        return datetime.combine(created_from + timedelta(days=1), dt_time(), tzinfo=timezone.utc).timestamp()
+
+    @staticmethod
+    def _created_from(window_start: float) -> date | None:
+        if not window_start:
+            return None
+        return datetime.fromtimestamp(window_start, tz=timezone.utc).date() - timedelta(days=1)
+
+    @staticmethod
+    def _to_row(
+            language: str,
+            window_start: float,
+            rank: int,
+            repo: GARepository,
+    ) -> tuple:
+        created_at = repo.created_at
+        naive = created_at.tzinfo is None
+        if naive:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return (
+            language, window_start, rank,
+            repo.id, repo.name, repo.full_name, repo.owner.login, repo.description,
+            created_at.timestamp(), naive, repo.url, repo.stars, repo.watchers, repo.language,
+        )
+
+    @staticmethod
+    def _from_row(row: tuple) -> GARepository:
+        repo_id, name, full_name, owner, description, created_at, naive, url, stars, watchers, language = row
+        created_at = datetime.fromtimestamp(created_at, tz=timezone.utc)
+        if naive:
+            created_at = created_at.replace(tzinfo=None)
+        # Values were validated, when repos were received from GithubAPI.
+        return GARepository.model_construct(
+            id=repo_id,
+            name=name,
+            full_name=full_name,
+            owner=RepositoryOwnerModel.model_construct(login=owner),
+            description=description,
+            created_at=created_at,
+            url=url,
+            stars=stars,
+            watchers=watchers,
+            language=language,
+        )
+
+    def replace_scope(
+            self,
+            lang: str | None,
+            created_from: date | None,
+            repos: Iterable[GARepository],
+            complete: bool,
+            crawled_at: float | None = None,
+    ):
+        """
+        Replace repos of the scope by the new crawl in one transaction, and move its watermark.
+
+        :param lang: language of the scope (None for all languages)
+        :param created_from: start of the creation window of the scope (None for all time)
+        :param repos: repos in the order of GithubAPI ranks
+        :param complete: there are no more repos after them
+        :param crawled_at: time, when the crawl was started
+        """
+        language = self._language_key(lang)
+        window_start = self._window_start(created_from)
+        rows = [
+            self._to_row(language, window_start, rank, repo)
+            for rank, repo in enumerate(repos)
+        ]
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM repos WHERE language = ? AND window_start = ?",
+                (language, window_start),
+            )
+            self._connection.executemany(
+                f"INSERT INTO repos (language, window_start, rank, {self.REPO_COLUMNS}) "
+                f"VALUES ({', '.join('?' * 14)})",
+                rows,
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO scopes (language, window_start, depth, complete, crawled_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (language, window_start, len(rows), complete, time.time() if crawled_at is None else crawled_at),
+            )
+        logger.info(f"Index scope {language or '*'};{created_from} is replaced by {len(rows)} repos")
+
+    def query(
+            self,
+            created_from: date | None,
+            lang: str | None,
+            start: int,
+            end: int,
+            now: float | None = None,
+    ) -> IndexedSlice | None:
+        """
+        Get repos with ranks in [start, end) for the filter, if a fresh scope answers it.
+
+        :param created_from: min creation date of repos
+        :param lang: language of repos
+        :param start: rank of the first repo (zero-based)
+        :param end: rank after the last repo
+        :return: repos and the crawl time, or None, if the index doesn't answer the query
+        """
+        now = time.time() if now is None else now
+        if start >= end:
+            return None
+        language = self._language_key(lang)
+        created_at = self._window_start(created_from)
+        # The narrowest fresh window first: it holds the most repos of the query.
+        scopes = self._connection.execute(
+            "SELECT window_start, complete, crawled_at FROM scopes "
+            "WHERE language = ? AND window_start <= ? AND crawled_at >= ? "
+            "ORDER BY window_start DESC",
+            (language, created_at, now - self._max_staleness),
+        ).fetchall()
+        for window_start, complete, crawled_at in scopes:
+            where = "WHERE language = ? AND window_start = ? AND created_at >= ?"
+            params = (language, window_start, created_at)
+            if not complete:
+                # The scope answers the query only if it holds the repo of the last requested rank.
+                covered = self._connection.execute(
+                    f"SELECT 1 FROM repos {where} ORDER BY stars DESC, rank LIMIT 1 OFFSET ?",
+                    (*params, end - 1),
+                ).fetchone()
+                if covered is None:
+                    continue
+            rows = self._connection.execute(
+                f"SELECT {self.REPO_COLUMNS} FROM repos {where} ORDER BY stars DESC, rank LIMIT ? OFFSET ?",
+                (*params, end - start, start),
+            ).fetchall()
+            metrics.observe("index_served_age_seconds", now - crawled_at)
+            return IndexedSlice(
+                repos=[self._from_row(row) for row in rows],
+                crawled_at=crawled_at,
+            )
+        return None
+
+    def prune(self, keep: Iterable[tuple[str | None, date | None]], now: float | None = None) -> int:
+        """
+        Delete stale scopes, which are not crawled anymore (e.g. rolling windows of previous days),
+        with their repos, so the index doesn't grow with every day.
+        Scopes, which are still fresh, are kept, while they answer queries.
+
+        :param keep: language and start of the creation window of crawled scopes
+        :return: number of deleted scopes
+        """
+        now = time.time() if now is None else now
+        kept = {(self._language_key(lang), self._window_start(created_from)) for lang, created_from in keep}
+        stale = [
+            scope
+            for scope in self._connection.execute(
+                "SELECT language, window_start FROM scopes WHERE crawled_at < ?",
+                (now - self._max_staleness,),
+            ).fetchall()
+            if scope not in kept
+        ]
+        with self._connection:
+            self._connection.executemany("DELETE FROM repos WHERE language = ? AND window_start = ?", stale)
+            self._connection.executemany("DELETE FROM scopes WHERE language = ? AND window_start = ?", stale)
+        if stale:
+            logger.info(f"{len(stale)} stale scopes are deleted from the index")
+        return len(stale)
+
+    def watermarks(self) -> list[Watermark]:
+        """
+        :return: freshness watermarks of all crawled scopes
+        """
+        rows = self._connection.execute(
+            "SELECT language, window_start, depth, complete, crawled_at FROM scopes"
+        ).fetchall()
+        return [
+            Watermark(
+                lang=language or None,
+                created_from=self._created_from(window_start),
+                depth=depth,
+                complete=bool(complete),
+                crawled_at=crawled_at,
+            )
+            for language, window_start, depth, complete, crawled_at in rows
+        ]
+
+    def acquire_crawl_lock(self, owner: str, ttl: float, now: float | None = None) -> bool:
+        """
+        Take or prolong the crawl lock, if it's free, expired or already held by the owner.
+
+        :param owner: unique name of the crawler
+        :param ttl: seconds, while the lock is held without prolongation
+        :return: True, if the owner holds the lock
+        """
+        now = time.time() if now is None else now
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO crawl_lock (id, owner, expires_at) VALUES (0, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE crawl_lock.owner = excluded.owner OR crawl_lock.expires_at < ?",
+                (owner, now + ttl, now),
+            )
+        return cursor.rowcount == 1
+
+    def release_crawl_lock(self, owner: str):
+        """
+        Release the crawl lock, if it's held by the owner.
+        """
+        with self._connection:
+            self._connection.execute("DELETE FROM crawl_lock WHERE id = 0 AND owner = ?", (owner,))
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
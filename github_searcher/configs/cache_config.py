@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -5,7 +7,55 @@ class CacheConfig(BaseSettings):
     """
     Config to define cache settings.
     First of all, define is cache enable or not.
+    Then define the backend: in-process memory or shared (redis, memcached) for several workers.
     """
     model_config = SettingsConfigDict(env_prefix='CACHE_')
 
     enable: bool = False
+    # Seconds while cached result is fresh
+    soft_ttl: float = 60
+    # Seconds while stale cached result could be served (and refreshed in background)
+    hard_ttl: float = 600
+
+    backend: Literal["memory", "redis", "memcached"] = "memory"
+    # Host and port of shared cache (port by default is defined by backend)
+    endpoint: str = "127.0.0.1"
+    port: int | None = None
+    # Redis specific settings
+    db: int = 0
+    password: str | None = None
+    # Max number of connections to shared cache
+    pool_size: int = 10
+    # Seconds to wait for connection to shared cache
+    connect_timeout: float | None = None
+    # Serializer of values for shared cache (the memory backend keeps objects as is)
+    serializer: Literal["pickle", "pickle_zlib"] = "pickle"
+    # Prefix of keys, separates the service keys in shared cache
+    namespace: str = "github_searcher"
+
+    # Bounds of in-process memory backend: max number of entries and approximate size in bytes
+    memory_max_size: int = 10_000
+    memory_max_bytes: int | None = 256 * 1024 * 1024
+    # Eviction policy of in-process caches (memory backend and L1)
+    memory_policy: Literal["lru", "lfu"] = "lru"
+
+    # In-process L1 cache in front of shared backend
+    l1_enable: bool = False
+    # Max number of entries in L1 and their approximate size in bytes
+    l1_max_size: int = 256
+    l1_max_bytes: int | None = 32 * 1024 * 1024
+    # Seconds to keep entries in L1
+    l1_ttl: float = 5
+    # Seconds between checks of invalidations made by other workers
+    l1_invalidation_interval: float = 1
+
+    # Background warming of the hottest filters before they become stale
+    warm_enable: bool = False
+    # Number of the hottest filters to keep warm
+    warm_top_n: int = 20
+    # Seconds between warming rounds
+    warm_interval: float = 5
+    # Seconds before cached result becomes stale, when it's refreshed
+    warm_lead_time: float = 15
+    # Max share of Github rate limit quota of every window, used for warming
+    warm_budget_share: float = 0.2
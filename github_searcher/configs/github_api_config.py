@@ -9,3 +9,33 @@ class GithubAPIConfig(BaseSettings):
     model_config = SettingsConfigDict(env_prefix='GITHUB_API_')
 
     token: str = ""
+    # Several tokens to use the quota of all of them (JSON list)
+    tokens: list[str] = []
+    # Seconds while a refused token is not used
+    token_quarantine_time: float = 300
+    # Number of remaining requests of a token, which are not used for background refreshes of cache
+    rate_limit_background_reserve: int = 3
+    # Number of remaining requests of a token, from which requests are paced evenly until the rate limit reset
+    rate_limit_pace_threshold: int = 5
+    # Max seconds a request waits for the rate limit reset, before it's rejected with 429
+    rate_limit_max_wait: float = 5
+    # Seconds to wait for one attempt of request
+    attempt_timeout: float = 10
+    # Seconds to wait for request with all its attempts
+    total_timeout: float = 30
+    # Number of retries after 5xx, connection errors and timeouts
+    retries: int = 2
+    # Seconds to wait before the first retry (doubled for every next retry, with jitter)
+    backoff_base: float = 0.2
+    # Max seconds to wait before retry
+    backoff_max: float = 2
+    # Send the second request, if the first one is slower than p95 of requests
+    hedge_enable: bool = False
+    # Number of consecutive failures, after which requests are rejected without sending
+    circuit_failure_threshold: int = 5
+    # Seconds, after which the probe request is sent to check that GithubAPI is recovered
+    circuit_recovery_time: float = 30
+
+    @property
+    def all_tokens(self) -> list[str]:
+        return [token for token in [self.token, *self.tokens] if token]
@@ -0,0 +1,18 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class HttpClientConfig(BaseSettings):
+    """
+    Config for the shared HTTP client session.
+    Defines connection pool of the session, used for requests to GithubAPI.
+    """
+    model_config = SettingsConfigDict(env_prefix='HTTP_CLIENT_')
+
+    # Total number of simultaneously opened connections
+    pool_size: int = 100
+    # Number of simultaneously opened connections to the same host (0 - no limit)
+    limit_per_host: int = 20
+    # Seconds to keep idle connection opened for reuse
+    keepalive_timeout: float = 30.0
+    # Seconds to keep resolved DNS entries
+    dns_cache_ttl: int = 300
@@ -0,0 +1,27 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class IndexConfig(BaseSettings):
+    """
+    Config of the local materialized index of the most popular repos.
+    The index is filled by the background crawler, and popular / top K requests are answered from it,
+    while it's fresh enough.
+    """
+    model_config = SettingsConfigDict(env_prefix='INDEX_')
+
+    enable: bool = False
+    # Path of SQLite database (":memory:" to keep the index in memory)
+    path: str = "github_searcher_index.sqlite3"
+    # Crawled languages ("" for all languages)
+    languages: list[str] = ["", "python", "javascript", "typescript", "java", "go", "rust", "c++"]
+    # Crawled creation windows: days before the crawl (null for all time)
+    windows_days: list[int | None] = [None, 30, 365]
+    # Number of the most popular repos crawled for every language and window
+    # (more than 1000 repos are crawled by the search, sharded by dates and stars)
+    depth: int = 300
+    # Seconds between crawling rounds
+    interval: float = 600
+    # Seconds after the crawl, while the index is used (requests go to GithubAPI after it)
+    max_staleness: float = 3600
+    # Max share of Github rate limit budget, used for crawling
+    budget_share: float = 0.5
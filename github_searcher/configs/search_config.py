@@ -0,0 +1,25 @@
+from typing import Literal
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class SearchConfig(BaseSettings):
+    """
+    Config to define how the service searches repos through GithubAPI.
+    """
+    model_config = SettingsConfigDict(env_prefix='SEARCH_')
+
+    # Max number of pages, requested from GithubAPI concurrently for one top K request
+    max_concurrent_pages: int = 4
+    # Encoder of JSON responses (orjson requires orjson package)
+    json_encoder: Literal["pydantic", "orjson"] = "pydantic"
+    # Max number of serialized responses, kept in memory for cache hits
+    responses_cache_size: int = 1024
+    # Max number of searches of batches, executed concurrently
+    batch_max_concurrency: int = 8
+    # Number of creation date ranges, into which searches deeper than 1000 results are split
+    crawl_date_shards: int = 4
+    # Additional aliases of languages (alias to GithubAPI name), e.g. {"golang": "go"}
+    language_aliases: dict[str, str] = {}
+    # Granularity of created_from in cache keys ("day" for exact dates), repos are filtered by the exact date
+    created_from_granularity: Literal["day", "week", "month"] = "day"
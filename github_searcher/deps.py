@@ -1,26 +1,109 @@
-from aiocache import Cache
 from aiohttp import ClientSession
-from fastapi import Depends
-from typing import Annotated
 
 from github_searcher.clients.github.client_protocol import GithubAPIClientProtocol
+from github_searcher.clients.cache.cache_factory import build_cache
 from github_searcher.clients.cache.cache_protocol import CacheProtocol
+from github_searcher.clients.github.circuit_breaker import CircuitBreaker
 from github_searcher.clients.github.custom_async_client import CustomAsyncGithubAPIClient
+from github_searcher.clients.github.request_policy import RequestPolicy
+from github_searcher.clients.github.token_pool import TokenPool
+from github_searcher.clients.http.session_manager import ClientSessionManager
+from github_searcher.clients.index.sqlite_repos_index import SqliteReposIndex
 from github_searcher.configs.github_api_config import GithubAPIConfig
 from github_searcher.configs.cache_config import CacheConfig
+from github_searcher.configs.http_client_config import HttpClientConfig
+from github_searcher.configs.index_config import IndexConfig
+from github_searcher.configs.search_config import SearchConfig
+from github_searcher.services.access_stats import AccessStats
+from github_searcher.services.batch_search import BatchSearcher
+from github_searcher.services.cache_warmer import CacheWarmer
+from github_searcher.services.index_crawler import IndexCrawler
+from github_searcher.services.repos_json_encoder import ReposJsonEncoder
 from github_searcher.services.repos_searching import ReposSearchingService
+from github_searcher.services.search_args_canonicalizer import SearchArgsCanonicalizer
 
 
 # TODO reformat with dependency injector
-# TODO choose cache backend based on configs
-cache = Cache() if CacheConfig().enable else None
+cache_config = CacheConfig()
+github_api_config = GithubAPIConfig()
+search_config = SearchConfig()
+index_config = IndexConfig()
+cache = build_cache(cache_config)
+client_session_manager = ClientSessionManager(
+    config=HttpClientConfig(),
+)
+token_pool = TokenPool(
+    tokens=github_api_config.all_tokens,
+    quarantine_time=github_api_config.token_quarantine_time,
+    background_reserve=github_api_config.rate_limit_background_reserve,
+    pace_threshold=github_api_config.rate_limit_pace_threshold,
+    max_wait=github_api_config.rate_limit_max_wait,
+)
+circuit_breaker = CircuitBreaker(
+    failure_threshold=github_api_config.circuit_failure_threshold,
+    recovery_time=github_api_config.circuit_recovery_time,
+)
 github_api_client = CustomAsyncGithubAPIClient(
-    token=GithubAPIConfig().token,
+    token_pool=token_pool,
+    request_policy=RequestPolicy(
+        attempt_timeout=github_api_config.attempt_timeout,
+        total_timeout=github_api_config.total_timeout,
+        retries=github_api_config.retries,
+        backoff_base=github_api_config.backoff_base,
+        backoff_max=github_api_config.backoff_max,
+        hedge=github_api_config.hedge_enable,
+    ),
+    circuit_breaker=circuit_breaker,
 )
+# Access frequency of filters is collected only for cache warming
+access_stats = AccessStats() if cache is not None and cache_config.warm_enable else None
+repos_index = SqliteReposIndex(
+    path=index_config.path,
+    max_staleness=index_config.max_staleness,
+) if index_config.enable else None
 repos_searching_service = ReposSearchingService(
     api_client=github_api_client,
     cache=cache,
+    max_concurrent_pages=search_config.max_concurrent_pages,
+    soft_ttl=cache_config.soft_ttl,
+    hard_ttl=cache_config.hard_ttl,
+    json_encoder=ReposJsonEncoder(backend=search_config.json_encoder),
+    responses_cache_size=search_config.responses_cache_size,
+    token_pool=token_pool,
+    circuit_breaker=circuit_breaker,
+    access_stats=access_stats,
+    repos_index=repos_index,
+    date_shards=search_config.crawl_date_shards,
+    canonicalizer=SearchArgsCanonicalizer(
+        language_aliases=search_config.language_aliases,
+        created_from_granularity=search_config.created_from_granularity,
+    ),
 )
+batch_searcher = BatchSearcher(
+    service=repos_searching_service,
+    max_concurrency=search_config.batch_max_concurrency,
+)
+cache_warmer = CacheWarmer(
+    service=repos_searching_service,
+    access_stats=access_stats,
+    get_session=client_session_manager.get_session,
+    token_pool=token_pool,
+    top_n=cache_config.warm_top_n,
+    interval=cache_config.warm_interval,
+    lead_time=cache_config.warm_lead_time,
+    budget_share=cache_config.warm_budget_share,
+) if access_stats is not None else None
+index_crawler = IndexCrawler(
+    service=repos_searching_service,
+    index=repos_index,
+    get_session=client_session_manager.get_session,
+    token_pool=token_pool,
+    languages=index_config.languages,
+    windows_days=index_config.windows_days,
+    depth=index_config.depth,
+    interval=index_config.interval,
+    budget_share=index_config.budget_share,
+) if repos_index is not None else None
 
 
 def get_cache() -> CacheProtocol:
@@ -32,10 +115,12 @@ def get_github_api_client() -> GithubAPIClientProtocol:
 
 
 async def get_client_session() -> ClientSession:
-    async with ClientSession() as session:
-        yield session
+    return client_session_manager.get_session()
 
 
 def get_repos_searching_service() -> ReposSearchingService:
     return repos_searching_service
 
+
+def get_batch_searcher() -> BatchSearcher:
+    return batch_searcher
@@ -2,6 +2,12 @@ class GithubApiRateLimitException(Exception):
     message = "Github API rate limit exceeded, please provide auth token."
 
 
+class GithubApiRateLimitRejectedException(GithubApiRateLimitException):
+    """
+    The request is rejected by the local rate limit budget, before it's sent to GithubAPI
+    """
+
+
 class NotExistedLanguageException(Exception):
     message = "No repos for language found in Github"
 
@@ -9,3 +15,6 @@ class NotExistedLanguageException(Exception):
 class SearchMaxResultsException(Exception):
     message = "Only the first 1000 search results are available"
 
+
+class GithubApiUnavailableException(Exception):
+    message = "Github API is unavailable, please try again later."
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+
+import threading
+
+
+@dataclass
+class Summary:
+    """
+    Aggregation of observed values.
+    """
+    count: int = 0
+    sum: float = 0.0
+    min: float | None = None
+    max: float | None = None
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """
+    Simple in-process registry of service metrics: counters, gauges and summaries.
+    """
+    _counters: dict[str, float]
+    _gauges: dict[str, float]
+    _summaries: dict[str, Summary]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._summaries = {}
+
+    def inc(self, name: str, value: float = 1):
+        """
+        Increase counter by value
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set(self, name: str, value: float):
+        """
+        Set current value of gauge
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """
+        Add observed value to summary
+        """
+        with self._lock:
+            self._summaries.setdefault(name, Summary()).observe(value)
+
+    def counter(self, name: str) -> float:
+        return self._counters.get(name, 0)
+
+    def gauge(self, name: str) -> float | None:
+        return self._gauges.get(name)
+
+    def summary(self, name: str) -> Summary:
+        return self._summaries.get(name, Summary())
+
+    def snapshot(self) -> dict:
+        """
+        Current values of all metrics
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {
+                    name: summary.as_dict()
+                    for name, summary in self._summaries.items()
+                },
+            }
+
+
+metrics = Metrics()
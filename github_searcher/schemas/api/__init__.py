@@ -0,0 +1,6 @@
+from .batch_search import (
+    BatchSearchError,
+    BatchSearchRequest,
+    BatchSearchResult,
+    BatchSearchSpec,
+)
@@ -0,0 +1,49 @@
+from datetime import date
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from github_searcher.schemas.github_api.repository import GARepository
+
+
+# Max number of searches in one batch
+MAX_BATCH_SIZE = 100
+
+
+class BatchSearchSpec(BaseModel):
+    """
+    Schema of one search of the batch: popular repos on the page, or top K repos
+    """
+    model_config = ConfigDict(frozen=True)
+
+    created_from: date | None = Field(None, description="Date to filter repos created from (Optional)")
+    language: str | None = Field(None, description="Filter the language of repos (Optional)")
+    page_id: int | None = Field(None, ge=1, description="The number of page with popular repos (Optional)")
+    k: int | None = Field(None, ge=1, le=1000, description="Number of top repos instead of the page (Optional)")
+
+    @model_validator(mode="after")
+    def check_page_or_k(self) -> "BatchSearchSpec":
+        if self.page_id is not None and self.k is not None:
+            raise ValueError("Only one of page_id and k could be specified")
+        return self
+
+
+class BatchSearchRequest(BaseModel):
+    """
+    Schema of the batch of searches
+    """
+    searches: list[BatchSearchSpec] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchSearchError(BaseModel):
+    """
+    Schema of the error of one search of the batch
+    """
+    status: int
+    message: str
+
+
+class BatchSearchResult(BaseModel):
+    """
+    Schema of the result of one search of the batch: repos or the error
+    """
+    repos: list[GARepository] | None = None
+    error: BatchSearchError | None = None
@@ -4,5 +4,7 @@ from pydantic import BaseModel
 
 
 class GARepositoriesSearchResponse(BaseModel):
+    # Number of all results of the search (only the first 1000 are available by pages)
+    total_count: int | None = None
     items: list[GARepository]
 
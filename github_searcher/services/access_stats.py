@@ -0,0 +1,95 @@
+from dataclasses import dataclass, replace
+
+import heapq
+
+from github_searcher.services.search_args import SearchArgs
+
+
+@dataclass
+class AccessRecord:
+    """
+    Accesses to one filter: its arguments, decayed number of accesses and the deepest requested rank.
+    """
+    args: SearchArgs
+    count: float
+    end: int
+
+
+class AccessStats:
+    """
+    Access frequency of filters (created_from, language), to find the hottest ones.
+    Counts are decayed periodically, so the stats follow the recent traffic.
+    """
+    _records: dict[str, AccessRecord]
+    # Min-heap of (count, key) to find the rarest filter.
+    # Entries are pushed on every access, entries with outdated counts are skipped.
+    _heap: list[tuple[float, str]]
+    _max_keys: int
+    _decay: float
+    _min_count: float
+
+    def __init__(self, max_keys: int = 10_000, decay: float = 0.9, min_count: float = 0.01):
+        """
+        :param max_keys: max number of tracked filters (the rarest are forgotten first)
+        :param decay: multiplier of counts on every decay
+        :param min_count: count, below which the filter is forgotten
+        """
+        self._records = {}
+        self._heap = []
+        self._max_keys = max_keys
+        self._decay = decay
+        self._min_count = min_count
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def record(self, args: SearchArgs, end: int):
+        """
+        Count access to the filter
+        :param args: search arguments (page_id and per_page are ignored)
+        :param end: rank after the last requested repo
+        """
+        record = self._records.get(args.filter_key)
+        if record is None:
+            if len(self._records) >= self._max_keys:
+                self._forget_rarest()
+            record = AccessRecord(
+                args=replace(args, page_id=1, per_page=None),
+                count=0,
+                end=end,
+            )
+            self._records[args.filter_key] = record
+        record.count += 1
+        record.end = max(record.end, end)
+        heapq.heappush(self._heap, (record.count, args.filter_key))
+        if len(self._heap) > 2 * len(self._records):
+            self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [(record.count, key) for key, record in self._records.items()]
+        heapq.heapify(self._heap)
+
+    def _forget_rarest(self):
+        while self._heap:
+            count, key = heapq.heappop(self._heap)
+            record = self._records.get(key)
+            if record is not None and record.count == count:
+                del self._records[key]
+                return
+
+    def decay(self):
+        """
+        Decrease counts, and forget filters, which are not accessed anymore
+        """
+        for key in list(self._records):
+            record = self._records[key]
+            record.count *= self._decay
+            if record.count < self._min_count:
+                del self._records[key]
+        self._rebuild_heap()
+
+    def hottest(self, n: int) -> list[AccessRecord]:
+        """
+        :return: N most accessed filters, from the hottest one
+        """
+        return heapq.nlargest(n, self._records.values(), key=lambda record: record.count)
@@ -0,0 +1,93 @@
+from aiohttp import ClientSession
+from http import HTTPStatus
+
+import asyncio
+import json
+import logging
+
+from github_searcher.exceptions import (
+    GithubApiRateLimitException,
+    GithubApiUnavailableException,
+    NotExistedLanguageException,
+    SearchMaxResultsException,
+)
+from github_searcher.metrics import metrics
+from github_searcher.schemas.api import BatchSearchSpec
+from github_searcher.services.repos_searching import ReposSearchingService
+from github_searcher.services.search_args import SearchArgs
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchSearcher:
+    """
+    Executor of batches of searches.
+    Identical searches of the batch are executed once, the rest are executed concurrently through the service,
+    so they share its cache, coalescing of GithubAPI requests and the rate limit budget.
+    The concurrency limit is shared by all batches.
+    The result of every search is its serialized JSON body, or its own error,
+    so one failed search doesn't fail the batch.
+    """
+    _service: ReposSearchingService
+    _semaphore: asyncio.Semaphore
+
+    def __init__(self, service: ReposSearchingService, max_concurrency: int = 8):
+        """
+        :param service: service to execute searches
+        :param max_concurrency: max number of searches, executed concurrently by all batches
+        """
+        self._service = service
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @staticmethod
+    def _error(status: int, message: str) -> bytes:
+        return json.dumps({"repos": None, "error": {"status": status, "message": message}}).encode()
+
+    async def _search(self, session: ClientSession, spec: BatchSearchSpec) -> bytes:
+        """
+        Execute one search of the batch
+        :return: serialized result of the search
+        """
+        args = SearchArgs(
+            created_from=spec.created_from,
+            lang=spec.language,
+            page_id=spec.page_id,
+        )
+        async with self._semaphore:
+            try:
+                if spec.k is not None:
+                    body = await self._service.get_top_k_popular_repos_json(session=session, args=args, k=spec.k)
+                else:
+                    body = await self._service.get_popular_repos_json(session=session, args=args)
+            except (SearchMaxResultsException, NotExistedLanguageException):
+                # The same as for single searches: there are no repos for the search
+                return b'{"repos":[],"error":null}'
+            except GithubApiRateLimitException as e:
+                metrics.inc("batch_search_errors")
+                return self._error(HTTPStatus.TOO_MANY_REQUESTS, e.message)
+            except GithubApiUnavailableException as e:
+                metrics.inc("batch_search_errors")
+                return self._error(HTTPStatus.SERVICE_UNAVAILABLE, e.message)
+            except Exception as e:
+                metrics.inc("batch_search_errors")
+                logger.exception(f"Search {spec} of the batch failed: {e!r}")
+                return self._error(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal error")
+        return b'{"repos":' + body.content + b',"error":null}'
+
+    async def search(self, session: ClientSession, specs: list[BatchSearchSpec]) -> bytes:
+        """
+        Execute the batch of searches.
+
+        :param session:
+        :param specs: searches of the batch
+        :return: serialized JSON list of results in the order of searches
+        """
+        unique = list(dict.fromkeys(specs))
+        metrics.inc("batch_searches")
+        metrics.inc("batch_search_items", len(specs))
+        metrics.inc("batch_search_duplicates", len(specs) - len(unique))
+
+        results = await asyncio.gather(*(self._search(session, spec) for spec in unique))
+        by_spec = dict(zip(unique, results))
+        return b"[" + b",".join(by_spec[spec] for spec in specs) + b"]"
@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+import time
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class CacheEntry(Generic[T]):
+    """
+    Cached value with the time it was received.
+    The entry is fresh during soft TTL, after that it's stale, but still could be served
+    until the cache evicts it (hard TTL).
+    """
+    value: T
+    created_at: float
+    soft_ttl: float
+
+    @classmethod
+    def create(cls, value: T, soft_ttl: float) -> "CacheEntry[T]":
+        return cls(
+            value=value,
+            created_at=time.time(),
+            soft_ttl=soft_ttl,
+        )
+
+    def age(self, now: float | None = None) -> float:
+        """
+        Seconds since the value was received
+        """
+        now = time.time() if now is None else now
+        return max(now - self.created_at, 0.0)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate size of the value in memory, bytes (AttributeError, if the value doesn't report it)
+        """
+        return self.value.nbytes
+
+    def staleness(self, now: float | None = None) -> float:
+        """
+        Seconds since the value became stale (0, if it's fresh)
+        """
+        return max(self.age(now) - self.soft_ttl, 0.0)
+
+    def is_stale(self, now: float | None = None) -> bool:
+        return self.age(now) >= self.soft_ttl
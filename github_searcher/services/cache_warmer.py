@@ -0,0 +1,125 @@
+from aiohttp import ClientSession
+from typing import Callable
+
+import asyncio
+import logging
+import time
+
+from github_searcher.clients.github.token_pool import TokenPool
+from github_searcher.metrics import metrics
+from github_searcher.services.access_stats import AccessStats
+from github_searcher.services.repos_searching import ReposSearchingService
+
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Background scheduler, which keeps the hottest filters refreshed in cache shortly before they become stale,
+    so popular queries are not missed and are not served with stale data.
+    Warming uses only the configured share of the rate limit quota: the warmer counts its own requests
+    in every rate limit window, and stops warming, when the share of the window is used.
+    """
+    _service: ReposSearchingService
+    _access_stats: AccessStats
+    _get_session: Callable[[], ClientSession]
+    _token_pool: TokenPool | None
+    _top_n: int
+    _interval: float
+    _lead_time: float
+    _budget_share: float
+    # Reset time of the current rate limit window and requests of the warmer in it
+    _window_reset_at: float
+    _window_requests: int
+    _task: asyncio.Task | None
+
+    def __init__(
+            self,
+            service: ReposSearchingService,
+            access_stats: AccessStats,
+            get_session: Callable[[], ClientSession],
+            token_pool: TokenPool | None = None,
+            top_n: int = 20,
+            interval: float = 5,
+            lead_time: float = 15,
+            budget_share: float = 0.2,
+    ):
+        """
+        :param service: service, which cache is warmed
+        :param access_stats: access frequency of filters, collected by the service
+        :param get_session: function, which returns the shared session
+        :param token_pool: pool of GithubAPI tokens to check the rate limit budget
+        :param top_n: number of the hottest filters to keep warm
+        :param interval: seconds between warming rounds
+        :param lead_time: seconds before the cached prefix becomes stale, when it's refreshed
+        :param budget_share: max share of the rate limit quota, used for warming in every window
+        """
+        self._service = service
+        self._access_stats = access_stats
+        self._get_session = get_session
+        self._token_pool = token_pool
+        self._top_n = top_n
+        self._interval = interval
+        self._lead_time = lead_time
+        self._budget_share = budget_share
+        self._window_reset_at = 0.0
+        self._window_requests = 0
+        self._task = None
+
+    def _has_budget(self) -> bool:
+        if self._token_pool is None:
+            return True
+        now = time.time()
+        window = self._token_pool.window(now)
+        if window is None:
+            return True
+        limit, reset_at = window
+        if reset_at != self._window_reset_at or reset_at <= now:
+            # The window is reset, the warmer has its share again.
+            self._window_reset_at = reset_at
+            self._window_requests = 0
+        return self._window_requests < limit * self._budget_share
+
+    async def warm_hottest(self) -> int:
+        """
+        Refresh the hottest filters one by one, while there is the budget for it.
+        :return: number of refreshed filters
+        """
+        warmed = 0
+        for record in self._access_stats.hottest(self._top_n):
+            if not self._has_budget():
+                metrics.inc("cache_warmups_deferred")
+                logger.info("Cache warming is deferred by rate limit")
+                break
+            try:
+                requests = await self._service.warm(self._get_session(), record.args, record.end, self._lead_time)
+            except Exception as e:
+                metrics.inc("cache_warmup_errors")
+                logger.warning(f"Failed to warm cache for args {record.args}: {e!r}")
+                continue
+            self._window_requests += requests
+            if requests:
+                warmed += 1
+        return warmed
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            await self.warm_hottest()
+            self._access_stats.decay()
+            metrics.set("cache_warmer_tracked_filters", len(self._access_stats))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,194 @@
+from array import array
+from datetime import datetime, timezone
+from typing import Iterable, Sequence
+
+import sys
+
+from github_searcher.schemas.github_api.repository import GARepository, RepositoryOwnerModel
+
+
+class CompactRepos:
+    """
+    Compact columnar storage of ranked repos for cache.
+    Every field of repos is kept in its own column: numbers and creation times (epoch seconds) in arrays,
+    repeated strings (owners, languages) are interned, and full names and clone urls are not kept at all,
+    if they could be derived from the owner and the name, as GithubAPI makes them.
+    Repos are materialized into API models only at response time.
+    """
+    __slots__ = (
+        "_ids",
+        "_names",
+        "_full_names",
+        "_owners",
+        "_descriptions",
+        "_created_at",
+        "_naive",
+        "_urls",
+        "_stars",
+        "_watchers",
+        "_languages",
+    )
+
+    _ids: array
+    _names: list[str]
+    # None, if the full name is "{owner}/{name}"
+    _full_names: list[str | None]
+    _owners: list[str]
+    _descriptions: list[str | None]
+    # Epoch seconds
+    _created_at: array
+    # 1, if the creation time is without timezone (it's kept as UTC)
+    _naive: bytearray
+    # None, if the url is "https://github.com/{full_name}.git"
+    _urls: list[str | None]
+    _stars: array
+    _watchers: array
+    _languages: list[str | None]
+
+    def __init__(self, repos: Iterable[GARepository] = ()):
+        self._ids = array("q")
+        self._names = []
+        self._full_names = []
+        self._owners = []
+        self._descriptions = []
+        self._created_at = array("d")
+        self._naive = bytearray()
+        self._urls = []
+        self._stars = array("q")
+        self._watchers = array("q")
+        self._languages = []
+        self.extend(repos)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompactRepos):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: tuple):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate size of the repos in memory, bytes (contents of columns without overhead of objects)
+        """
+        numbers = (self._ids, self._created_at, self._stars, self._watchers)
+        texts = (self._names, self._full_names, self._descriptions, self._urls)
+        size = sum(len(column) * column.itemsize for column in numbers) + len(self._naive)
+        # References of text columns
+        size += len(self) * 8 * (len(texts) + 2)
+        size += sum(len(text) for column in texts for text in column if text is not None)
+        # Interned strings are kept once
+        size += sum(len(text) for text in {*self._owners, *self._languages} if text is not None)
+        return size
+
+    @staticmethod
+    def _intern(value: str | None) -> str | None:
+        return sys.intern(value) if value is not None else None
+
+    @staticmethod
+    def _github_url(full_name: str) -> str:
+        return f"https://github.com/{full_name}.git"
+
+    def append(self, repo: GARepository):
+        owner = sys.intern(repo.owner.login)
+        full_name = f"{owner}/{repo.name}"
+        created_at = repo.created_at
+        naive = created_at.tzinfo is None
+        if naive:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+
+        self._ids.append(repo.id)
+        self._names.append(repo.name)
+        self._full_names.append(None if repo.full_name == full_name else repo.full_name)
+        self._owners.append(owner)
+        self._descriptions.append(repo.description)
+        self._created_at.append(created_at.timestamp())
+        self._naive.append(naive)
+        self._urls.append(None if repo.url == self._github_url(repo.full_name) else repo.url)
+        self._stars.append(repo.stars)
+        self._watchers.append(repo.watchers)
+        self._languages.append(self._intern(repo.language))
+
+    def extend(self, repos: Iterable[GARepository]):
+        for repo in repos:
+            self.append(repo)
+
+    def copy(self) -> "CompactRepos":
+        copied = CompactRepos.__new__(CompactRepos)
+        for name in self.__slots__:
+            setattr(copied, name, getattr(self, name)[:])
+        return copied
+
+    def _materialize(self, i: int) -> GARepository:
+        owner = self._owners[i]
+        full_name = self._full_names[i]
+        if full_name is None:
+            full_name = f"{owner}/{self._names[i]}"
+        url = self._urls[i]
+        if url is None:
+            url = self._github_url(full_name)
+        created_at = datetime.fromtimestamp(self._created_at[i], tz=timezone.utc)
+        if self._naive[i]:
+            created_at = created_at.replace(tzinfo=None)
+        # Values were validated, when repos were received from GithubAPI.
+        return GARepository.model_construct(
+            id=self._ids[i],
+            name=self._names[i],
+            full_name=full_name,
+            owner=RepositoryOwnerModel.model_construct(login=owner),
+            description=self._descriptions[i],
+            created_at=created_at,
+            url=url,
+            stars=self._stars[i],
+            watchers=self._watchers[i],
+            language=self._languages[i],
+        )
+
+    def slice(self, start: int, end: int) -> list[GARepository]:
+        """
+        Materialize repos with ranks in [start, end) into API models
+        """
+        return self.take(range(*slice(start, end).indices(len(self))))
+
+    def take(self, ranks: Iterable[int]) -> list[GARepository]:
+        """
+        Materialize repos with the given ranks into API models
+        """
+        return [self._materialize(i) for i in ranks]
+
+    def select(self, created_after: float | None = None, language: str | None = None) -> list[int]:
+        """
+        Find ranks of repos, which satisfy the narrower filter, without materializing repos
+        :param created_after: min creation time of repos, epoch seconds
+        :param language: language of repos (case-insensitive)
+        :return: ranks in the ascending order
+        """
+        language = language.lower() if language else None
+        return [
+            i for i in range(len(self))
+            if (created_after is None or self._created_at[i] >= created_after)
+            and (language is None or (self._languages[i] or "").lower() == language)
+        ]
+
+    def subset(self, ranks: Sequence[int]) -> "CompactRepos":
+        """
+        Compact repos with the given ranks, without materializing them
+        """
+        subset = CompactRepos.__new__(CompactRepos)
+        for name in self.__slots__:
+            column = getattr(self, name)
+            picked = [column[i] for i in ranks]
+            if isinstance(column, array):
+                picked = array(column.typecode, picked)
+            elif isinstance(column, bytearray):
+                picked = bytearray(picked)
+            setattr(subset, name, picked)
+        return subset
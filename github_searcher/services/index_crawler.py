@@ -0,0 +1,164 @@
+from aiohttp import ClientSession
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable
+
+import asyncio
+import logging
+import time
+import uuid
+
+from github_searcher.clients.github.token_pool import TokenPool
+from github_searcher.clients.index.sqlite_repos_index import SqliteReposIndex
+from github_searcher.exceptions import GithubApiRateLimitException, GithubApiUnavailableException
+from github_searcher.metrics import metrics
+from github_searcher.services.repos_searching import ReposSearchingService
+from github_searcher.services.search_args import SearchArgs
+
+
+logger = logging.getLogger(__name__)
+
+
+class IndexCrawler:
+    """
+    Background crawler, which keeps the local index of the most popular repos
+    for every configured language and creation window.
+    Crawling uses only the configured share of the rate limit budget, the rest is left for clients.
+    If several workers share the index, only the one holding the crawl lock of the index crawls it.
+    """
+    _service: ReposSearchingService
+    _index: SqliteReposIndex
+    _get_session: Callable[[], ClientSession]
+    _token_pool: TokenPool | None
+    _languages: list[str | None]
+    _windows_days: list[int | None]
+    _depth: int
+    _interval: float
+    _budget_share: float
+    # Name of the crawler in the crawl lock of the index
+    _owner: str
+    _task: asyncio.Task | None
+
+    def __init__(
+            self,
+            service: ReposSearchingService,
+            index: SqliteReposIndex,
+            get_session: Callable[[], ClientSession],
+            token_pool: TokenPool | None = None,
+            languages: list[str] | None = None,
+            windows_days: list[int | None] | None = None,
+            depth: int = 300,
+            interval: float = 600,
+            budget_share: float = 0.5,
+    ):
+        """
+        :param service: service to request repos from GithubAPI
+        :param index: index to fill
+        :param get_session: function, which returns the shared session
+        :param token_pool: pool of GithubAPI tokens to check the rate limit budget
+        :param languages: crawled languages ("" or None for all languages)
+        :param windows_days: crawled creation windows, days before the crawl (None for all time)
+        :param depth: number of the most popular repos crawled for every scope
+        :param interval: seconds between crawling rounds
+        :param budget_share: max share of the rate limit budget, used for crawling
+        """
+        self._service = service
+        self._index = index
+        self._get_session = get_session
+        self._token_pool = token_pool
+        self._languages = [lang or None for lang in (languages or [None])]
+        self._windows_days = windows_days or [None]
+        self._depth = depth
+        self._interval = interval
+        self._budget_share = budget_share
+        self._owner = uuid.uuid4().hex
+        self._task = None
+
+    def _has_budget(self) -> bool:
+        return self._token_pool is None or self._token_pool.remaining_share() > 1 - self._budget_share
+
+    def scopes(self, today: date | None = None) -> list[SearchArgs]:
+        """
+        :param today: date of the crawl (UTC, as GithubAPI dates)
+        :return: search arguments of all crawled scopes
+        """
+        today = today or datetime.now(timezone.utc).date()
+        return [
+            SearchArgs(
+                created_from=today - timedelta(days=days) if days is not None else None,
+                lang=lang,
+            )
+            for lang in self._languages
+            for days in self._windows_days
+        ]
+
+    def _acquire_lock(self) -> bool:
+        # The lock is prolonged before every scope, and is released, if the crawler is stopped.
+        return self._index.acquire_crawl_lock(self._owner, ttl=self._interval * 2)
+
+    def _observe_watermarks(self):
+        watermarks = self._index.watermarks()
+        metrics.set("index_scopes", len(watermarks))
+        if watermarks:
+            oldest = min(watermark.crawled_at for watermark in watermarks)
+            metrics.set("index_watermark_age_seconds", time.time() - oldest)
+
+    async def crawl(self) -> int:
+        """
+        Crawl all scopes one by one, while there is the budget for it,
+        and delete stale scopes, which are not crawled anymore.
+        The index is not crawled, while another worker holds its crawl lock.
+        :return: number of crawled scopes
+        """
+        crawled = 0
+        if not self._acquire_lock():
+            metrics.inc("index_crawls_skipped")
+            logger.debug("Index is crawled by another worker")
+            self._observe_watermarks()
+            return crawled
+        scopes = self.scopes()
+        for args in scopes:
+            if not self._acquire_lock():
+                metrics.inc("index_crawls_skipped")
+                logger.warning("Index crawling is interrupted: the crawl lock is taken by another worker")
+                return crawled
+            if not self._has_budget():
+                metrics.inc("index_crawls_deferred")
+                logger.info("Index crawling is deferred by rate limit")
+                break
+            crawled_at = time.time()
+            try:
+                repos, complete = await self._service.fetch_ranked_repos(self._get_session(), args, self._depth)
+            except (GithubApiRateLimitException, GithubApiUnavailableException) as e:
+                metrics.inc("index_crawl_errors")
+                logger.warning(f"Index crawling is interrupted: {e!r}")
+                break
+            except Exception as e:
+                metrics.inc("index_crawl_errors")
+                logger.warning(f"Failed to crawl index scope for args {args}: {e!r}")
+                continue
+            self._index.replace_scope(args.lang, args.created_from, repos, complete, crawled_at)
+            metrics.inc("index_crawled_scopes")
+            crawled += 1
+        pruned = self._index.prune((args.lang, args.created_from) for args in scopes)
+        metrics.inc("index_scopes_pruned", pruned)
+        self._observe_watermarks()
+        return crawled
+
+    async def _run(self):
+        while True:
+            await self.crawl()
+            await asyncio.sleep(self._interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._index.release_crawl_lock(self._owner)
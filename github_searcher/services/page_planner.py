@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+
+
+# Max number of repos, which GithubAPI returns on one page
+MAX_PAGE_SIZE = 100
+# GithubAPI returns only the first 1000 results of a search
+SEARCH_RESULTS_LIMIT = 1000
+
+
+@dataclass(frozen=True)
+class PagesPlan:
+    """
+    Upstream pages, which cover the requested range of ranks.
+    """
+    first_page_id: int
+    last_page_id: int
+    per_page: int
+    # Position of the first requested rank in the concatenation of planned pages
+    offset: int
+    # Number of requested repos
+    count: int
+
+    @property
+    def page_ids(self) -> range:
+        return range(self.first_page_id, self.last_page_id + 1)
+
+
+def plan_pages(
+        start: int,
+        end: int,
+        per_page: int = MAX_PAGE_SIZE,
+) -> PagesPlan:
+    """
+    Plan the fewest upstream pages to get repos with ranks in [start, end).
+    Ranks are zero-based, and the end is clipped by the search results limit.
+
+    :param start: rank of the first required repo
+    :param end: rank after the last required repo
+    :param per_page: size of upstream pages
+    :return: plan of pages
+    """
+    end = min(end, SEARCH_RESULTS_LIMIT)
+    if start < 0 or start >= end:
+        raise ValueError(f"Invalid range of ranks [{start}, {end})")
+
+    first_page_id = start // per_page + 1
+    last_page_id = (end - 1) // per_page + 1
+    return PagesPlan(
+        first_page_id=first_page_id,
+        last_page_id=last_page_id,
+        per_page=per_page,
+        offset=start - (first_page_id - 1) * per_page,
+        count=end - start,
+    )
@@ -0,0 +1,65 @@
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from github_searcher.clients.github.search_repos_page import PageValidators
+from github_searcher.schemas.github_api import GARepository
+from github_searcher.services.compact_repos import CompactRepos
+from github_searcher.services.page_planner import SEARCH_RESULTS_LIMIT
+
+
+@dataclass
+class RankedPrefix:
+    """
+    The most popular repos for one filter (created_from, language), ordered by rank.
+    The prefix is extended lazily by upstream pages, when deeper ranks are requested.
+    Repos are kept in compact form, and are materialized into models only for the requested slice.
+    """
+    repos: CompactRepos = field(default_factory=CompactRepos)
+    # There are no more results after the prefix (the last page or the search results limit is reached)
+    complete: bool = False
+    # Validators of upstream pages, which the prefix consists of (in the page order)
+    validators: list[PageValidators] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.repos)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate size of the prefix in memory, bytes
+        """
+        return self.repos.nbytes + sum(
+            len(validators.etag or "") + len(validators.last_modified or "")
+            for validators in self.validators
+        )
+
+    def covers(self, end: int) -> bool:
+        """
+        Check that all ranks before the end are known
+        """
+        return self.complete or len(self.repos) >= end
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        Check that the prefix holds all results of the search
+        (the complete prefix of the search results limit could be cut by the limit)
+        """
+        return self.complete and len(self.repos) < SEARCH_RESULTS_LIMIT
+
+    def slice(self, start: int, end: int) -> list[GARepository]:
+        return self.repos.slice(start, end)
+
+    def take(self, ranks: Iterable[int]) -> list[GARepository]:
+        return self.repos.take(ranks)
+
+    def page(self, page_id: int, per_page: int) -> list[GARepository]:
+        """
+        Repos of the upstream page, which the prefix consists of
+        """
+        return self.repos.slice((page_id - 1) * per_page, page_id * per_page)
+
+    def page_validators(self, page_id: int) -> PageValidators | None:
+        if page_id > len(self.validators):
+            return None
+        return self.validators[page_id - 1]
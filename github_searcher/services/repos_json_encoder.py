@@ -0,0 +1,44 @@
+from pydantic import TypeAdapter
+from typing import Literal
+
+from github_searcher.schemas.github_api import GARepository
+
+
+class ReposJsonEncoder:
+    """
+    Encoder of repos list to JSON body of response.
+    Produces the same JSON as FastAPI for response_model=list[GARepository] (fields by alias).
+    - pydantic: one pass of pydantic-core serializer from models to bytes
+    - orjson: pydantic-core dumps models to python primitives, orjson encodes them (requires orjson)
+    """
+    _adapter = TypeAdapter(list[GARepository])
+    _item_adapter = TypeAdapter(GARepository)
+
+    def __init__(self, backend: Literal["pydantic", "orjson"] = "pydantic"):
+        if backend == "orjson":
+            try:
+                import orjson
+            except ImportError:
+                raise RuntimeError("orjson JSON encoder requires orjson package to be installed") from None
+            self._orjson = orjson
+        elif backend != "pydantic":
+            raise ValueError(f"Unknown JSON encoder {backend}")
+        self._backend = backend
+
+    def encode(self, repos: list[GARepository]) -> bytes:
+        if self._backend == "orjson":
+            return self._orjson.dumps(
+                self._adapter.dump_python(repos, mode="json", by_alias=True)
+            )
+        return self._adapter.dump_json(repos, by_alias=True)
+
+    def encode_lines(self, repos: list[GARepository]) -> bytes:
+        """
+        Encode repos to NDJSON: one JSON object per line
+        """
+        if self._backend == "orjson":
+            return b"".join(
+                self._orjson.dumps(self._item_adapter.dump_python(repo, mode="json", by_alias=True)) + b"\n"
+                for repo in repos
+            )
+        return b"".join(self._item_adapter.dump_json(repo, by_alias=True) + b"\n" for repo in repos)
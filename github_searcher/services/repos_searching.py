@@ -1,13 +1,37 @@
 from aiohttp import ClientSession
+from contextlib import aclosing
+from dataclasses import replace
+from typing import AsyncIterator, Iterator, Sequence
 
+import asyncio
+import math
 import time
 import logging
 
-from github_searcher.exceptions import NotExistedLanguageException
+from github_searcher.clients.cache.bounded_memory_cache import BoundedMemoryCache
+from github_searcher.exceptions import (
+    NotExistedLanguageException,
+    SearchMaxResultsException,
+)
+from github_searcher.clients.github.circuit_breaker import CircuitBreaker
 from github_searcher.clients.github.client_protocol import GithubAPIClientProtocol
+from github_searcher.clients.github.search_repos_page import PageValidators
+from github_searcher.clients.github.token_pool import TokenPool
+from github_searcher.clients.index.sqlite_repos_index import IndexedSlice, SqliteReposIndex
 from github_searcher.clients.cache.cache_protocol import CacheProtocol
 from github_searcher.schemas.github_api import GARepository
+from github_searcher.metrics import metrics
+from github_searcher.services.access_stats import AccessStats
+from github_searcher.services.cache_entry import CacheEntry
+from github_searcher.services.compact_repos import CompactRepos
+from github_searcher.services.page_planner import MAX_PAGE_SIZE, SEARCH_RESULTS_LIMIT, PagesPlan, plan_pages
+from github_searcher.services.ranked_prefix import RankedPrefix
+from github_searcher.services.repos_json_encoder import ReposJsonEncoder
+from github_searcher.services.response_body import ResponseBody
 from github_searcher.services.search_args import SearchArgs
+from github_searcher.services.search_args_canonicalizer import SearchArgsCanonicalizer
+from github_searcher.services.sharded_search import ShardedSearch
+from github_searcher.services.single_flight import SingleFlight
 
 
 logger = logging.getLogger(__name__)
@@ -17,37 +41,98 @@ class ReposSearchingService:
     """
     Service for interacting with Github API via client, supported protocol.
     Could cache results.
+
+    For each filter (created_from, language) the service keeps one ranked prefix of the most popular repos.
+    Pages and top K are answered as slices of the prefix, which is extended lazily by upstream pages,
+    when deeper ranks are requested.
+    Search arguments are canonicalized, and searches with bucketed created_from are answered
+    by the prefix of the bucket, filtered by the exact date.
+    If the prefix of the search is not cached, but the prefix of a broader filter (all time or all languages)
+    is, and it holds enough repos of the search, the search is answered by it without GithubAPI.
+    If the local index of popular repos is set, queries, which it answers while it's fresh,
+    don't go to the cache and GithubAPI at all.
     """
+    # Number of repos on one page of popular repos (equals to GithubAPI default page size)
+    PAGE_SIZE = 30
+
     _github_api_client: GithubAPIClientProtocol
     _cache: CacheProtocol | None
+    _max_concurrent_pages: int
+    _soft_ttl: float
+    _hard_ttl: float
+    _single_flight: SingleFlight[CacheEntry[RankedPrefix]]
+    _background_tasks: set[asyncio.Task]
+    # Filter keys of prefixes, which are refreshing in background
+    _refreshing: set[str]
+    _json_encoder: ReposJsonEncoder
+    _responses: BoundedMemoryCache
+    _token_pool: TokenPool | None
+    _circuit_breaker: CircuitBreaker | None
+    _access_stats: AccessStats | None
+    _repos_index: SqliteReposIndex | None
+    _sharded_search: ShardedSearch
+    _canonicalizer: SearchArgsCanonicalizer | None
 
     def __init__(
             self,
             api_client: GithubAPIClientProtocol,
             cache: CacheProtocol | None = None,
+            max_concurrent_pages: int = 4,
+            soft_ttl: float = 60,
+            hard_ttl: float = 600,
+            json_encoder: ReposJsonEncoder | None = None,
+            responses_cache_size: int = 1024,
+            token_pool: TokenPool | None = None,
+            circuit_breaker: CircuitBreaker | None = None,
+            access_stats: AccessStats | None = None,
+            repos_index: SqliteReposIndex | None = None,
+            date_shards: int = 4,
+            canonicalizer: SearchArgsCanonicalizer | None = None,
     ):
         self._github_api_client = api_client
         self._cache = cache
+        self._max_concurrent_pages = max_concurrent_pages
+        self._soft_ttl = soft_ttl
+        self._hard_ttl = max(hard_ttl, soft_ttl)
+        self._single_flight = SingleFlight()
+        self._background_tasks = set()
+        self._refreshing = set()
+        self._json_encoder = json_encoder or ReposJsonEncoder()
+        self._responses = BoundedMemoryCache(
+            max_size=responses_cache_size,
+            name="response_body_cache",
+        )
+        self._token_pool = token_pool
+        self._circuit_breaker = circuit_breaker
+        self._access_stats = access_stats
+        self._repos_index = repos_index
+        self._sharded_search = ShardedSearch(
+            api_client=api_client,
+            max_concurrent_pages=max_concurrent_pages,
+            date_shards=date_shards,
+        )
+        self._canonicalizer = canonicalizer
 
-    async def _get_from_cache(self, args: SearchArgs) -> list[GARepository]:
+    async def _get_from_cache(self, args: SearchArgs) -> CacheEntry[RankedPrefix] | None:
         """
-        Try to get cached result
-        :param args: search arguments (key)
-        :return:
+        Try to get cached ranked prefix
+        :param args: search arguments (filter is the key)
+        :return: cached entry, fresh or stale
         """
-        return await self._cache.get(str(args))
+        return await self._cache.get(args.filter_key)
 
-    async def _set_to_cache(self, args: SearchArgs, response: list[GARepository]):
+    async def _set_to_cache(self, args: SearchArgs, entry: CacheEntry[RankedPrefix]):
         """
-        Save results to cache
-        :param args: search arguments (key)
-        :param response: result to save
+        Save ranked prefix to cache.
+        The entry is fresh during soft TTL, and evicted from cache after hard TTL.
+        :param args: search arguments (filter is the key)
+        :param entry: entry to save
         :return:
         """
         return await self._cache.set(
-            key=str(args),
-            value=response,
-            ttl=60,
+            key=args.filter_key,
+            value=entry,
+            ttl=self._hard_ttl,
         )
 
     @staticmethod
@@ -66,44 +151,827 @@ class ReposSearchingService:
             raise NotExistedLanguageException()
         return response
 
-    async def get_popular_repos(
+    async def _fetch_page(
             self,
             session: ClientSession,
             args: SearchArgs,
-    ) -> list[GARepository]:
+            page_id: int,
+            per_page: int,
+            previous: RankedPrefix | None,
+            background: bool = False,
+    ) -> tuple[list[GARepository], PageValidators]:
         """
-        Get list of popular repos (from the first page or from the specified page from args),
-        which satisfy search arguments.
+        Request one page from GithubAPI.
+        If the page is a part of the previous prefix, the request is conditional,
+        and repos of the previous prefix are reused, when the page is not modified.
+
+        :return: repos of the page and its validators
+        """
+        validators = previous.page_validators(page_id) if previous is not None else None
+        page = await self._github_api_client.search_repos_page(
+            session=session,
+            created_from=args.created_from,
+            lang=args.lang,
+            page_id=page_id,
+            per_page=per_page,
+            validators=validators or None,
+            background=background,
+        )
+        if page.not_modified:
+            metrics.inc("github_pages_not_modified")
+            return previous.page(page_id, per_page), page.validators
+        metrics.inc("github_pages_downloaded")
+        return page.items, page.validators
+
+    async def _iter_pages(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            plan: PagesPlan,
+            previous: RankedPrefix | None = None,
+            background: bool = False,
+    ) -> AsyncIterator[tuple[list[GARepository], PageValidators]]:
+        """
+        Request planned pages from GithubAPI concurrently (bounded by max_concurrent_pages),
+        and yield them in the page order, as soon as every page and all pages before it are received.
+        Requesting stops on the first incomplete page or on the search results limit.
+        Pages, which are not yielded yet, are cancelled, when the iteration is stopped (e.g. disconnected client).
+
+        :param session:
+        :param args: search arguments (page_id and per_page are ignored)
+        :param plan: pages to request
+        :param previous: previous prefix to revalidate its pages
+        :param background: pages are requested not for clients (refresh of stale cache)
+        :return: iterator of repos and validators of pages
+        """
+        semaphore = asyncio.Semaphore(self._max_concurrent_pages)
+        # The first found page, after which there are no more results
+        last_page_id = plan.last_page_id
+
+        async def get_page(page_id: int) -> tuple[list[GARepository], PageValidators]:
+            nonlocal last_page_id
+            async with semaphore:
+                if page_id > last_page_id:
+                    return [], PageValidators()
+                try:
+                    page, validators = await self._fetch_page(
+                        session=session,
+                        args=args,
+                        page_id=page_id,
+                        per_page=plan.per_page,
+                        previous=previous,
+                        background=background,
+                    )
+                except SearchMaxResultsException:
+                    last_page_id = min(last_page_id, page_id)
+                    raise
+                if len(page) < plan.per_page:
+                    last_page_id = min(last_page_id, page_id)
+                return page, validators
+
+        tasks = [
+            asyncio.create_task(get_page(page_id))
+            for page_id in plan.page_ids
+        ]
+        try:
+            for page_id, task in zip(plan.page_ids, tasks):
+                try:
+                    page, validators = await task
+                except SearchMaxResultsException:
+                    if page_id == 1:
+                        raise
+                    logger.info(f"Search results limit is reached on page {page_id} for args {args}.")
+                    break
+
+                logger.debug(f"Page {page_id} contains {len(page)} repos")
+                yield page, validators
+                if len(page) < plan.per_page:
+                    logger.info(f"Last page {page_id} for args {args}.")
+                    break
+        finally:
+            # Pages after the last one (or after the failed one) are not needed anymore.
+            # The awaited page is already cancelled, if the iteration is cancelled.
+            cancelled = 0
+            for page_id, task in zip(plan.page_ids, tasks):
+                if (task.cancel() or task.cancelled()) and page_id <= last_page_id:
+                    cancelled += 1
+            if cancelled:
+                metrics.inc("github_pages_cancelled", cancelled)
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _fetch_pages(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            plan: PagesPlan,
+            previous: RankedPrefix | None = None,
+            background: bool = False,
+            pages: asyncio.Queue | None = None,
+    ) -> tuple[list[GARepository], bool, list[PageValidators]]:
+        """
+        Request planned pages from GithubAPI and merge them in the page order.
+
+        :param session:
+        :param args: search arguments (page_id and per_page are ignored)
+        :param plan: pages to request
+        :param previous: previous prefix to revalidate its pages
+        :param background: pages are requested not for clients (refresh of stale cache)
+        :param pages: queue, to which repos of every page are put in the page order, as soon as it's received,
+            and None after the last one (or on error)
+        :return: list of repositories, flag that there are no more results after them, validators of pages
+        """
+        repos = []
+        pages_validators = []
+        try:
+            async with aclosing(self._iter_pages(session, args, plan, previous, background)) as pages_iter:
+                async for page, validators in pages_iter:
+                    repos.extend(page)
+                    pages_validators.append(validators)
+                    if pages is not None:
+                        pages.put_nowait(page)
+        finally:
+            if pages is not None:
+                pages.put_nowait(None)
+        # Requesting stops before the last planned page or on the incomplete page, if there are no more results.
+        complete = len(pages_validators) < len(plan.page_ids) or len(repos) < plan.per_page * len(plan.page_ids)
+        return repos, complete, pages_validators
+
+    async def _extend_prefix(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            base: CacheEntry[RankedPrefix] | None,
+            end: int,
+            previous: CacheEntry[RankedPrefix] | None = None,
+            background: bool = False,
+            pages: asyncio.Queue | None = None,
+    ) -> CacheEntry[RankedPrefix]:
+        """
+        Extend ranked prefix by upstream pages to cover ranks before the end, and save it to cache.
 
         :param session:
         :param args: search arguments
-        :return: list of repositories
+        :param base: fresh cached prefix to extend, or None to build the prefix from scratch
+        :param end: rank after the last required repo
+        :param previous: stale prefix, which pages are revalidated, when the prefix is built from scratch
+        :param background: prefix is extended not for clients (refresh of stale cache)
+        :param pages: queue, to which repos of every received page are put (see _fetch_pages)
+        :return: entry with the extended prefix
+        """
+        repos = base.value.repos.copy() if base is not None else CompactRepos()
+        validators = list(base.value.validators) if base is not None else []
+        plan = plan_pages(start=len(repos), end=end)
+        logger.info(f"Request pages {list(plan.page_ids)} from GithubAPI for args {args}")
+        pages_repos, complete, pages_validators = await self._fetch_pages(
+            session=session,
+            args=args,
+            plan=plan,
+            previous=previous.value if previous is not None else None,
+            background=background,
+            pages=pages,
+        )
+        repos.extend(pages_repos)
+        validators.extend(pages_validators)
+        return await self._save_prefix(args, base, repos, complete, validators)
+
+    async def _save_prefix(
+            self,
+            args: SearchArgs,
+            base: CacheEntry[RankedPrefix] | None,
+            repos: CompactRepos,
+            complete: bool,
+            validators: list[PageValidators],
+    ) -> CacheEntry[RankedPrefix]:
+        """
+        Save the extended ranked prefix to cache.
+
+        :param args: search arguments
+        :param base: extended cached prefix, or None, if the prefix was built from scratch
+        :param repos: repos of the extended prefix
+        :param complete: there are no more results after repos
+        :param validators: validators of pages, which the prefix consists of
+        :return: entry with the extended prefix
+        """
+        entry = CacheEntry(
+            value=RankedPrefix(
+                repos=repos,
+                complete=complete or len(repos) >= SEARCH_RESULTS_LIMIT,
+                validators=validators,
+            ),
+            # Age of the prefix is the age of its oldest part
+            created_at=base.created_at if base is not None else time.time(),
+            soft_ttl=self._soft_ttl,
+        )
+        if self._cache is not None:
+            logger.info(f"Save ranked prefix of {len(repos)} repos to cache for args {args}")
+            await self._set_to_cache(args, entry)
+        return entry
+
+    @staticmethod
+    def _observe_cache_hit(entry: CacheEntry, now: float):
+        """
+        Collect metrics about age of data, served from cache.
+        """
+        metrics.observe("cache_served_age_seconds", entry.age(now))
+        if entry.is_stale(now):
+            metrics.inc("cache_hits_stale")
+            metrics.observe("cache_served_staleness_seconds", entry.staleness(now))
+        else:
+            metrics.inc("cache_hits_fresh")
+
+    @staticmethod
+    def _observe_normalization(args: SearchArgs, hit: bool):
+        """
+        Collect cache hits and misses of requests, changed by every normalization rule.
+        """
+        for rule in args.normalized_by:
+            metrics.inc(f"search_args_{rule}_cache_hits" if hit else f"search_args_{rule}_cache_misses")
+
+    def _canonicalize(self, args: SearchArgs) -> SearchArgs:
+        if self._canonicalizer is None:
+            return args
+        args = self._canonicalizer.canonicalize(args)
+        for rule in args.normalized_by:
+            metrics.inc(f"search_args_normalized_{rule}")
+        return args
+
+    async def _refresh(self, session: ClientSession, args: SearchArgs, entry: CacheEntry[RankedPrefix]):
+        """
+        Refresh cached prefix from scratch, revalidating its pages.
+        Errors are not raised, because nobody waits for the result.
+        """
+        end = max(len(entry.value), 1)
+        try:
+            await self._single_flight.do(
+                key=args.filter_key,
+                func=lambda: self._extend_prefix(session, args, None, end, previous=entry, background=True),
+            )
+            metrics.inc("cache_background_refreshes")
+        except Exception as e:
+            metrics.inc("cache_background_refresh_errors")
+            logger.warning(f"Failed to refresh cache in background for args {args}: {e!r}")
+
+    async def warm(self, session: ClientSession, args: SearchArgs, end: int, lead_time: float = 0) -> int:
+        """
+        Refresh cached prefix for the filter from GithubAPI, if it's missed or becomes stale soon,
+        so clients don't wait for GithubAPI and are not served with stale data.
+
+        :param session:
+        :param args: search arguments (page_id and per_page are ignored)
+        :param end: rank after the last repo, which should be cached
+        :param lead_time: seconds before the prefix becomes stale, when it's refreshed
+        :return: number of pages, requested from GithubAPI (0, if the prefix was not refreshed)
+        """
+        if self._cache is None or args.filter_key in self._single_flight:
+            return 0
+        entry = await self._get_from_cache(args)
+        if entry is not None and entry.value.covers(end) and entry.age() < self._soft_ttl - lead_time:
+            return 0
+
+        end = max(end, len(entry.value) if entry is not None else 0)
+        logger.info(f"Warm cache for args {args} up to rank {end}")
+        warmed = await self._single_flight.do(
+            key=args.filter_key,
+            func=lambda: self._extend_prefix(session, args, None, end, previous=entry, background=True),
+        )
+        metrics.inc("cache_warmups")
+        # Every page of the refreshed prefix is requested (conditionally, if it was cached)
+        return max(len(warmed.value.validators), 1)
+
+    def _refresh_in_background(self, session: ClientSession, args: SearchArgs, entry: CacheEntry[RankedPrefix]):
+        """
+        Start refreshing of stale cached prefix, if it's not refreshing already.
+        """
+        key = args.filter_key
+        if key in self._refreshing or key in self._single_flight:
+            return
+        if self._token_pool is not None and self._token_pool.is_low():
+            # Stale prefix is served until GithubAPI requests are left for clients.
+            metrics.inc("cache_background_refreshes_deferred")
+            logger.info(f"Refresh of stale cache is deferred by rate limit for args {args}")
+            return
+        if self._circuit_breaker is not None and self._circuit_breaker.is_open():
+            # Stale prefix is served, while GithubAPI is unavailable.
+            metrics.inc("cache_background_refreshes_deferred")
+            logger.info(f"Refresh of stale cache is deferred, GithubAPI is unavailable, args {args}")
+            return
+        logger.info(f"Refresh stale cache in background for args {args}")
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(session, args, entry))
+        # Keep reference to the task until it's done.
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        task.add_done_callback(lambda _: self._refreshing.discard(key))
+
+    async def close(self):
+        """
+        Cancel background refreshes and fills, which are still running.
+        """
+        tasks = list(self._background_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._single_flight.close()
+        self._background_tasks.clear()
+        self._refreshing.clear()
+
+    @staticmethod
+    def _broader_filters(args: SearchArgs) -> list[SearchArgs]:
+        """
+        Filters, which results include all results of the search, from the narrowest one
+        """
+        broader = []
+        if args.created_from is not None:
+            broader.append(replace(args, created_from=None))
+        if args.lang is not None:
+            broader.append(replace(args, lang=None))
+            if args.created_from is not None:
+                broader.append(replace(args, created_from=None, lang=None))
+        return broader
+
+    async def _derive_from_broader(
+            self,
+            args: SearchArgs,
+            end: int,
+            cached: CacheEntry[RankedPrefix] | None,
+    ) -> CacheEntry[RankedPrefix] | None:
+        """
+        Derive ranked prefix of the search from the fresh cached prefix of a broader filter.
+        Repos of the broader prefix, which satisfy the search, are the top of the search in the same order,
+        so the derived prefix answers the search, if it covers the end, or the broader prefix holds all results.
+        The derived prefix is not cached: it's derived again, while the broader prefix is fresh.
+
+        :param args: search arguments
+        :param end: rank after the last required repo
+        :param cached: cached prefix of the search, which doesn't cover the end
+        :return: entry with the derived prefix, or None, if no broader prefix proves the answer
+        """
+        for broader in self._broader_filters(args):
+            entry = await self._get_from_cache(broader)
+            if entry is None or entry.is_stale():
+                continue
+            ranks = entry.value.repos.select(
+                created_after=args.created_after,
+                language=args.lang if broader.lang is None else None,
+            )
+            if len(ranks) < end and not entry.value.exhausted:
+                continue
+            # Pages of the search, which would be requested from GithubAPI
+            plan = plan_pages(start=len(cached.value) if cached is not None else 0, end=end)
+            metrics.inc("cache_broader_hits")
+            metrics.inc("github_requests_avoided", len(plan.page_ids))
+            logger.info(f"Args {args} are answered by cached prefix of {broader}")
+            return CacheEntry(
+                value=RankedPrefix(
+                    repos=entry.value.repos.subset(ranks),
+                    complete=entry.value.exhausted,
+                ),
+                created_at=entry.created_at,
+                soft_ttl=entry.soft_ttl,
+            )
+        return None
+
+    async def _lookup_prefix(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            end: int,
+    ) -> tuple[CacheEntry[RankedPrefix] | None, CacheEntry[RankedPrefix] | None]:
+        """
+        Look up ranked prefix, which covers ranks before the end, in cache
+        (own prefix of the search or prefix of a broader filter).
+
+        :param session:
+        :param args: search arguments
+        :param end: rank after the last required repo
+        :return: entry, which answers the search (None on cache miss),
+            and cached entry of the search, which should be extended or revalidated on cache miss
+        """
+        now = time.time()
+        logger.info(f"Try to get result from cache for args {args}")
+        entry = await self._get_from_cache(args)
+        if entry is not None and entry.value.covers(end):
+            logger.info(f"Got result from cache for args {args}.")
+            self._observe_cache_hit(entry, now)
+            self._observe_normalization(args, hit=True)
+            if entry.is_stale(now):
+                self._refresh_in_background(session, args, entry)
+            return entry, entry
+        derived = await self._derive_from_broader(args, end, entry)
+        if derived is not None:
+            self._observe_normalization(args, hit=True)
+            return derived, entry
+        metrics.inc("cache_misses")
+        self._observe_normalization(args, hit=False)
+        logger.info(f"Response not cached for args={args}, try to get it from GithubAPI.")
+        return None, entry
+
+    @staticmethod
+    def _split_cached(
+            entry: CacheEntry[RankedPrefix] | None,
+    ) -> tuple[CacheEntry[RankedPrefix] | None, CacheEntry[RankedPrefix] | None]:
+        """
+        Stale prefix is not extended, because ranks could be changed since it was received,
+        its pages are revalidated instead.
+        :return: fresh prefix to extend and stale prefix to revalidate
+        """
+        stale = entry is not None and entry.is_stale()
+        return (entry if not stale else None), (entry if stale else None)
+
+    async def _get_ranked_prefix(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            end: int,
+    ) -> CacheEntry[RankedPrefix]:
+        """
+        Get ranked prefix, which covers ranks before the end (from cache, if it's possible).
+
+        :param session:
+        :param args: search arguments
+        :param end: rank after the last required repo
+        :return: entry with ranked prefix
         """
-        logger.info(f"Get popular repos for args {args}")
         st_time = time.time()
-        if self._cache:
-            logger.info(f"Try to get result from cache for args {args}")
-            repos_from_cache = await self._get_from_cache(args)
-            if repos_from_cache:
-                logger.info(f"Got result from cache for args {args}.")
+        entry = None
+        if self._cache is not None:
+            answer, entry = await self._lookup_prefix(session, args, end)
+            if answer is not None:
                 logger.debug(f"Exec time [response from cache] = {time.time() - st_time}")
-                return repos_from_cache
-            logger.info(f"Response not cached for args={args}, try to get it from GithubAPI.")
+                return answer
 
-        repos = await self._github_api_client.search_repos(
-            session=session,
+        while entry is None or not entry.value.covers(end):
+            base, previous = self._split_cached(entry)
+            # Only one extension of the prefix is in flight, concurrent callers share its result.
+            entry = await self._single_flight.do(
+                key=args.filter_key,
+                func=lambda: self._extend_prefix(session, args, base, end, previous=previous),
+            )
+
+        logger.debug(f"Exec time [response from API ]= {time.time() - st_time}")
+        return entry
+
+    async def fetch_ranked_repos(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            end: int,
+    ) -> tuple[list[GARepository], bool]:
+        """
+        Request the most popular repos from GithubAPI as a background work (e.g. to crawl them into the index),
+        bypassing the cache.
+        More repos than the search results limit are requested by the search, sharded by dates and stars.
+
+        :param session:
+        :param args: search arguments (page_id and per_page are ignored)
+        :param end: number of repos to request
+        :return: list of repositories, flag that they are all results of the search
+        """
+        if end > SEARCH_RESULTS_LIMIT:
+            repos, complete = await self._sharded_search.top(session, args, end)
+        else:
+            repos, complete, _ = await self._fetch_pages(
+                session=session,
+                args=args,
+                plan=plan_pages(start=0, end=end),
+                background=True,
+            )
+            # Results, cut by the search results limit, are not all results of the search.
+            complete = complete and len(repos) < SEARCH_RESULTS_LIMIT
+        self._check_language(args, repos[:1])
+        return repos, complete
+
+    def _get_indexed_slice(self, args: SearchArgs, start: int, end: int) -> IndexedSlice | None:
+        """
+        Get repos with ranks in [start, end) from the local index, if it's fresh and covers them.
+        The index is not limited by the search results limit, if it's crawled deeper.
+        """
+        if self._repos_index is None:
+            return None
+        indexed = self._repos_index.query(
             created_from=args.created_from,
             lang=args.lang,
-            page_id=args.page_id,
+            start=start,
+            end=end,
+        )
+        if indexed is None:
+            metrics.inc("index_fallbacks")
+            logger.info(f"Index doesn't answer args {args}, fall back to GithubAPI")
+            return None
+        metrics.inc("index_hits")
+        return indexed
+
+    async def _get_ranked_slice(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            start: int,
+            end: int,
+    ) -> tuple[CacheEntry[RankedPrefix] | None, int, int]:
+        """
+        Get entry with ranked prefix, which covers ranks [start, end).
+
+        :param session:
+        :param args: search arguments (page_id and per_page are ignored)
+        :param start: rank of the first repo (zero-based)
+        :param end: rank after the last repo
+        :return: entry (None, if the range is empty) and the range, clipped by the search results limit
+        """
+        if start >= SEARCH_RESULTS_LIMIT:
+            raise SearchMaxResultsException()
+        end = min(end, SEARCH_RESULTS_LIMIT)
+        if start >= end:
+            return None, start, end
+
+        if self._access_stats is not None:
+            self._access_stats.record(args, end)
+        entry = await self._get_ranked_prefix(session, args, end)
+        self._check_language(args, entry.value.slice(0, 1))
+        return entry, start, end
+
+    def _get_superset(self, args: SearchArgs) -> SearchArgs | None:
+        """
+        Get the broader filter, which prefix is filtered locally to answer the search
+        (None, if the search is answered by its own prefix)
+        """
+        if self._canonicalizer is None:
+            return None
+        bucket = self._canonicalizer.bucket(args.created_from)
+        if bucket == args.created_from:
+            return None
+        return replace(args, created_from=bucket)
+
+    async def _select_from_superset(
+            self,
+            session: ClientSession,
+            superset: SearchArgs,
+            args: SearchArgs,
+            start: int,
+            end: int,
+    ) -> tuple[CacheEntry[RankedPrefix], Sequence[int]] | None:
+        """
+        Find repos with ranks in [start, end) of the search in the ranked prefix of the broader filter.
+        Repos of the prefix, which satisfy the search, are the top of the search in the same order,
+        while there are at least end of them, or the prefix holds all results of the broader filter.
+        The prefix is extended until it proves the answer, but not beyond the search results limit.
+
+        :return: entry with the prefix of the broader filter and ranks of repos in it,
+            or None, if the prefix could not prove the answer
+        """
+        prefix_end = end
+        while True:
+            entry, _, _ = await self._get_ranked_slice(session, superset, 0, prefix_end)
+            ranks = entry.value.repos.select(created_after=args.created_after)
+            if len(ranks) >= end or entry.value.exhausted:
+                metrics.inc("search_filtered_locally")
+                return entry, ranks[start:end]
+            if len(entry.value) >= SEARCH_RESULTS_LIMIT:
+                metrics.inc("search_filtered_locally_fallbacks")
+                logger.info(f"Prefix of {superset} doesn't prove the answer for args {args}")
+                return None
+            # Extend the prefix by the share of repos of the search in it.
+            share = max(len(ranks), 1) / max(len(entry.value), 1)
+            prefix_end = min(max(2 * len(entry.value), math.ceil(end / share)), SEARCH_RESULTS_LIMIT)
+
+    async def _get_ranked_selection(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            start: int,
+            end: int,
+    ) -> tuple[CacheEntry[RankedPrefix] | None, Sequence[int]]:
+        """
+        Get entry with ranked prefix, which holds repos with ranks in [start, end) of the search,
+        from the prefix of the broader filter, or from its own one.
+
+        :param session:
+        :param args: search arguments (page_id and per_page are ignored)
+        :param start: rank of the first repo (zero-based)
+        :param end: rank after the last repo
+        :return: entry (None, if the range is empty) and ranks of repos in its prefix
+        """
+        if start >= SEARCH_RESULTS_LIMIT:
+            raise SearchMaxResultsException()
+        end = min(end, SEARCH_RESULTS_LIMIT)
+        if start >= end:
+            return None, range(0)
+
+        superset = self._get_superset(args)
+        if superset is not None:
+            selection = await self._select_from_superset(session, superset, args, start, end)
+            if selection is not None:
+                return selection
+
+        entry, start, end = await self._get_ranked_slice(session, args, start, end)
+        return entry, range(start, min(end, len(entry.value)))
+
+    async def _get_ranked_repos(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            start: int,
+            end: int,
+    ) -> list[GARepository]:
+        """
+        Get repos with ranks in [start, end), which satisfy the searching arguments,
+        as a slice of the ranked prefix.
+
+        :param session:
+        :param args: search arguments (page_id and per_page are ignored)
+        :param start: rank of the first repo (zero-based)
+        :param end: rank after the last repo
+        :return: list of repositories
+        """
+        indexed = self._get_indexed_slice(args, start, end)
+        if indexed is not None:
+            return indexed.repos
+        entry, ranks = await self._get_ranked_selection(session, args, start, end)
+        if entry is None:
+            return []
+        return entry.value.take(ranks)
+
+    async def _get_ranked_repos_json(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            start: int,
+            end: int,
+    ) -> ResponseBody:
+        """
+        Get serialized JSON body with repos with ranks in [start, end).
+        Bodies are kept in memory next to the cached prefix, and reused while the prefix is not changed,
+        so cache hits are not validated and encoded again.
+
+        :param session:
+        :param args: search arguments (page_id and per_page are ignored)
+        :param start: rank of the first repo (zero-based)
+        :param end: rank after the last repo
+        :return: JSON body
+        """
+        indexed = self._get_indexed_slice(args, start, end)
+        if indexed is not None:
+            # The crawler could replace the index at any time, so clients revalidate the body by ETag.
+            return ResponseBody.create(
+                content=self._json_encoder.encode(indexed.repos),
+                created_at=indexed.crawled_at,
+                ttl=0,
+            )
+        entry, ranks = await self._get_ranked_selection(session, args, start, end)
+        # Without cache every request goes to GithubAPI, so the body is never fresh.
+        ttl = self._soft_ttl if self._cache is not None else 0
+        if entry is None:
+            return ResponseBody.create(
+                content=self._json_encoder.encode([]),
+                created_at=time.time(),
+                ttl=ttl,
+            )
+
+        key = f"{args.filter_key};{start};{end}"
+        body = await self._responses.get(key) if self._cache is not None else None
+        # Prefix is rebuilt with the new creation time, extensions don't change already known ranks.
+        if body is not None and body.created_at == entry.created_at:
+            metrics.inc("response_body_hits")
+            return body
+
+        body = ResponseBody.create(
+            content=self._json_encoder.encode(entry.value.take(ranks)),
+            created_at=entry.created_at,
+            ttl=ttl,
+        )
+        if self._cache is not None:
+            await self._responses.set(key, body, ttl=self._hard_ttl)
+        return body
+
+    @staticmethod
+    def _iter_chunks(entry: CacheEntry[RankedPrefix], ranks: Sequence[int]) -> Iterator[list[GARepository]]:
+        """
+        Materialize repos with the ranks of the prefix by chunks of the upstream page size
+        """
+        for i in range(0, len(ranks), MAX_PAGE_SIZE):
+            yield entry.value.take(ranks[i:i + MAX_PAGE_SIZE])
+
+    async def _stream_prefix(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            entry: CacheEntry[RankedPrefix] | None,
+            end: int,
+    ) -> AsyncIterator[list[GARepository]]:
+        """
+        Extend ranked prefix by upstream pages to cover ranks before the end, as _extend_prefix does,
+        but yield repos of every page, as soon as it's received in the rank order.
+        The stream owns the fill of the prefix: concurrent requests of the filter wait for its prefix
+        instead of requesting the same pages. If the stream is stopped (e.g. disconnected client),
+        the fill is cancelled, unless other requests wait for it.
+
+        :param session:
+        :param args: search arguments (page_id and per_page are ignored)
+        :param entry: cached prefix of the search, which doesn't cover the end
+        :param end: rank after the last required repo
+        :return: iterator of repos with ranks before the end by chunks
+        """
+        base, previous = self._split_cached(entry)
+        pages = asyncio.Queue()
+        fill = self._single_flight.start(
+            key=args.filter_key,
+            func=lambda: self._extend_prefix(session, args, base, end, previous=previous, pages=pages),
         )
-        if self._cache:
-            logger.info(f"Save response to cache for args {args}")
-            await self._set_to_cache(args, repos)
+        if fill is None:
+            # The fill was started by another request, while the cache was looked up.
+            answer, ranks = await self._get_ranked_selection(session, args, 0, end)
+            for chunk in self._iter_chunks(answer, ranks):
+                yield chunk
+            return
 
-        repos = self._check_language(args, repos)
+        try:
+            sent = 0
+            if base is not None:
+                self._check_language(args, base.value.slice(0, 1))
+                for chunk in self._iter_chunks(base, range(len(base.value))):
+                    yield chunk
+                sent = len(base.value)
+            logger.info(f"Stream pages from GithubAPI for args {args}")
+            while (page := await pages.get()) is not None:
+                if not sent:
+                    self._check_language(args, page[:1])
+                chunk = page[:end - sent]
+                sent += len(chunk)
+                if chunk:
+                    metrics.inc("stream_chunks")
+                    yield chunk
+            # Errors of the fill are raised
+            await asyncio.shield(fill)
+        finally:
+            await self._single_flight.abandon(args.filter_key, fill)
 
-        logger.debug(f"Exec time [response from API ]= {time.time() - st_time}")
-        return repos
+    async def _stream_ranked_repos(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            end: int,
+    ) -> AsyncIterator[list[GARepository]]:
+        """
+        Get repos with ranks before the end, which satisfy the searching arguments, by chunks in the rank order.
+        Repos, which are answered locally (by the index, by cache or by the fill of the prefix in flight),
+        are yielded from memory, the rest are streamed from GithubAPI page by page.
+
+        :param session:
+        :param args: search arguments (page_id and per_page are ignored)
+        :param end: rank after the last repo
+        :return: iterator of repos by chunks
+        """
+        end = min(end, SEARCH_RESULTS_LIMIT)
+        if end <= 0:
+            return
+        indexed = self._get_indexed_slice(args, 0, end)
+        if indexed is not None:
+            yield indexed.repos
+            return
+        if args.filter_key in self._single_flight or self._get_superset(args) is not None:
+            # The search is answered by the prefix, which is filled for other requests now,
+            # or by the prefix of the bucket, filtered by the exact date.
+            entry, ranks = await self._get_ranked_selection(session, args, 0, end)
+            for chunk in self._iter_chunks(entry, ranks):
+                yield chunk
+            return
+
+        if self._access_stats is not None:
+            self._access_stats.record(args, end)
+        entry = None
+        if self._cache is not None:
+            answer, entry = await self._lookup_prefix(session, args, end)
+            if answer is not None:
+                self._check_language(args, answer.value.slice(0, 1))
+                for chunk in self._iter_chunks(answer, range(min(end, len(answer.value)))):
+                    yield chunk
+                return
+        async with aclosing(self._stream_prefix(session, args, entry, end)) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    async def get_popular_repos(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+    ) -> list[GARepository]:
+        """
+        Get list of popular repos (from the first page or from the specified page from args),
+        which satisfy search arguments.
+        Pages have the size of GithubAPI default page, but are assembled from the bigger upstream pages.
+
+        :param session:
+        :param args: search arguments
+        :return: list of repositories
+        """
+        args = self._canonicalize(args)
+        logger.info(f"Get popular repos for args {args}")
+        page_id = max(args.page_id or 1, 1)
+        return await self._get_ranked_repos(
+            session=session,
+            args=args,
+            start=(page_id - 1) * self.PAGE_SIZE,
+            end=page_id * self.PAGE_SIZE,
+        )
 
     async def get_top_k_popular_repos(
             self,
@@ -120,23 +988,96 @@ class ReposSearchingService:
         :param k: number of repos to find
         :return: list of repositories
         """
+        args = self._canonicalize(args)
         logger.info(f"Get top K popular repos, search args {args}.")
-        args.page_id = 1
-        repos = []
+        return await self._get_ranked_repos(
+            session=session,
+            args=args,
+            start=0,
+            end=k,
+        )
 
-        while len(repos) < k:
-            page = await self.get_popular_repos(
-                session=session,
-                args=args,
-            )
-            logger.debug(f"Page {args.page_id} contains {len(page)} repos")
-            if not page:
-                logger.info(f"Empty page for args {args}.")
-                break
+    async def get_popular_repos_json(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+    ) -> ResponseBody:
+        """
+        The same as get_popular_repos, but returns serialized JSON body.
 
-            repos.extend(page)
-            logger.debug(f"Current length of collected repos for args {args} = {len(repos)}")
-            args.page_id += 1
+        :param session:
+        :param args: search arguments
+        :return: JSON body with list of repositories
+        """
+        args = self._canonicalize(args)
+        logger.info(f"Get popular repos JSON for args {args}")
+        page_id = max(args.page_id or 1, 1)
+        return await self._get_ranked_repos_json(
+            session=session,
+            args=args,
+            start=(page_id - 1) * self.PAGE_SIZE,
+            end=page_id * self.PAGE_SIZE,
+        )
 
-        return repos[:k]
+    async def get_top_k_popular_repos_json(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            k: int = 100,
+    ) -> ResponseBody:
+        """
+        The same as get_top_k_popular_repos, but returns serialized JSON body.
 
+        :param session:
+        :param args: search arguments
+        :param k: number of repos to find
+        :return: JSON body with list of repositories
+        """
+        args = self._canonicalize(args)
+        logger.info(f"Get top K popular repos JSON, search args {args}.")
+        return await self._get_ranked_repos_json(
+            session=session,
+            args=args,
+            start=0,
+            end=k,
+        )
+
+    async def stream_top_k_popular_repos(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            k: int = 100,
+    ) -> AsyncIterator[list[GARepository]]:
+        """
+        The same as get_top_k_popular_repos, but repos are yielded by chunks in the rank order,
+        as soon as every upstream page is received, instead of one list.
+        Stopped iteration cancels requests of the remaining pages.
+
+        :param session:
+        :param args: search arguments
+        :param k: number of repos to find
+        :return: iterator of repos by chunks
+        """
+        args = self._canonicalize(args)
+        logger.info(f"Stream top K popular repos, search args {args}.")
+        async with aclosing(self._stream_ranked_repos(session=session, args=args, end=k)) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    async def stream_top_k_popular_repos_ndjson(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            k: int = 100,
+    ) -> AsyncIterator[bytes]:
+        """
+        The same as stream_top_k_popular_repos, but yields serialized NDJSON lines (one repo per line).
+
+        :param session:
+        :param args: search arguments
+        :param k: number of repos to find
+        :return: iterator of serialized chunks
+        """
+        async with aclosing(self.stream_top_k_popular_repos(session=session, args=args, k=k)) as chunks:
+            async for chunk in chunks:
+                yield self._json_encoder.encode_lines(chunk)
@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+
+import hashlib
+import time
+
+
+@dataclass(frozen=True)
+class ResponseBody:
+    """
+    Serialized JSON body of response, ready to be sent without validation and encoding.
+    """
+    content: bytes
+    # Time when the data of the body was received from GithubAPI
+    created_at: float
+    # Strong entity tag of the content
+    etag: str
+    # Time until the data of the body is fresh in the cache
+    expires_at: float
+
+    @classmethod
+    def create(cls, content: bytes, created_at: float, ttl: float) -> "ResponseBody":
+        """
+        :param content: serialized JSON body
+        :param created_at: time when the data was received from GithubAPI
+        :param ttl: seconds while the data is fresh since created_at
+        """
+        return cls(
+            content=content,
+            created_at=created_at,
+            etag=f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"',
+            expires_at=created_at + ttl,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate size of the body in memory, bytes
+        """
+        return len(self.content) + len(self.etag)
+
+    def max_age(self, now: float | None = None) -> int:
+        """
+        Seconds until the data is fresh (0, if it's stale)
+        """
+        now = time.time() if now is None else now
+        return max(int(self.expires_at - now), 0)
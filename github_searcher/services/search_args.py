@@ -1,5 +1,5 @@
-from datetime import date
-from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -11,6 +11,26 @@ class SearchArgs:
     created_from: date | None
     lang: str | None
     page_id: int = 1
+    per_page: int | None = None
+    # Normalization rules, which changed the arguments of the request (see SearchArgsCanonicalizer)
+    normalized_by: tuple[str, ...] = field(default=(), compare=False)
+
+    @property
+    def filter_key(self) -> str:
+        """
+        Key of the filter, regardless of the page
+        """
+        return f"{self.created_from};{self.lang}"
+
+    @property
+    def created_after(self) -> float | None:
+        """
+        Epoch seconds, from which repos of the search are created
+        (GithubAPI searches repos created after the date, so it's the start of the next day in UTC)
+        """
+        if self.created_from is None:
+            return None
+        return datetime.combine(self.created_from + timedelta(days=1), time(), tzinfo=timezone.utc).timestamp()
 
     def __str__(self):
-        return f"{self.created_from};{self.lang};{self.page_id}"
+        return f"{self.created_from};{self.lang};{self.page_id};{self.per_page}"
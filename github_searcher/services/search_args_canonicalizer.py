@@ -0,0 +1,90 @@
+from dataclasses import replace
+from datetime import date, timedelta
+from typing import Literal
+
+from github_searcher.services.search_args import SearchArgs
+
+
+# Common alternative names of languages in GithubAPI language qualifier
+LANGUAGE_ALIASES = {
+    "golang": "go",
+    "js": "javascript",
+    "node": "javascript",
+    "nodejs": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "cpp": "c++",
+    "cxx": "c++",
+    "csharp": "c#",
+    "cs": "c#",
+    "fsharp": "f#",
+    "rb": "ruby",
+    "rs": "rust",
+    "kt": "kotlin",
+    "objc": "objective-c",
+    "sh": "shell",
+}
+
+Granularity = Literal["day", "week", "month"]
+
+
+class SearchArgsCanonicalizer:
+    """
+    Canonical form of search arguments, so the same searches, written differently, share cache entries.
+    Rules:
+    - lang_case: language is case-insensitive for GithubAPI, so it's lowercased and stripped
+    - lang_alias: alternative names of languages are replaced by GithubAPI names
+    - created_from_bucket: created_from is rounded down to the granularity (the start of its week or month),
+      the service searches the bucket and filters repos by the exact date locally
+    """
+    _language_aliases: dict[str, str]
+    _granularity: Granularity
+
+    def __init__(
+            self,
+            language_aliases: dict[str, str] | None = None,
+            created_from_granularity: Granularity = "day",
+    ):
+        """
+        :param language_aliases: additional aliases of languages (lowercased alias to GithubAPI name)
+        :param created_from_granularity: granularity of created_from buckets ("day" for exact dates)
+        """
+        self._language_aliases = {
+            **LANGUAGE_ALIASES,
+            **{alias.lower(): lang.lower() for alias, lang in (language_aliases or {}).items()},
+        }
+        self._granularity = created_from_granularity
+
+    def bucket(self, created_from: date | None) -> date | None:
+        """
+        Round created_from down to the granularity.
+        Repos created after the bucket are a superset of repos created after the exact date.
+        """
+        if created_from is None or self._granularity == "day":
+            return created_from
+        if self._granularity == "week":
+            return created_from - timedelta(days=created_from.weekday())
+        return created_from.replace(day=1)
+
+    def canonicalize(self, args: SearchArgs) -> SearchArgs:
+        """
+        :param args: search arguments of the request
+        :return: canonical arguments with the applied rules (created_from is kept exact)
+        """
+        rules = []
+        lang = args.lang
+        if lang is not None:
+            canonical = lang.strip().lower()
+            if canonical != lang:
+                rules.append("lang_case")
+            alias = self._language_aliases.get(canonical)
+            if alias is not None and alias != canonical:
+                rules.append("lang_alias")
+                canonical = alias
+            lang = canonical or None
+
+        if self.bucket(args.created_from) != args.created_from:
+            rules.append("created_from_bucket")
+
+        return replace(args, lang=lang, normalized_by=tuple(rules))
@@ -0,0 +1,276 @@
+from aiohttp import ClientSession
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from typing import Iterable
+
+import asyncio
+import heapq
+import logging
+import math
+
+from github_searcher.clients.github.client_protocol import GithubAPIClientProtocol
+from github_searcher.metrics import metrics
+from github_searcher.schemas.github_api import GARepository
+from github_searcher.services.page_planner import SEARCH_RESULTS_LIMIT, plan_pages
+from github_searcher.services.search_args import SearchArgs
+
+
+logger = logging.getLogger(__name__)
+
+# Repos on Github are not created before it
+GITHUB_EPOCH = date(2007, 10, 1)
+# GithubAPI searches only repos with more than one star
+MIN_STARS = 2
+
+
+@dataclass(frozen=True)
+class SearchShard:
+    """
+    Part of the search: repos created in (created_after, created_until] with at most stars_max stars.
+    None bounds are open.
+    """
+    created_after: date | None
+    created_until: date | None
+    stars_max: int | None = None
+
+    @property
+    def is_empty(self) -> bool:
+        return self.stars_max is not None and self.stars_max < MIN_STARS
+
+    def split(self, today: date | None = None) -> tuple["SearchShard", "SearchShard"] | None:
+        """
+        Split the shard into two halves of its creation range
+        :return: halves, or None, if the range is one day
+        """
+        after = self.created_after or GITHUB_EPOCH - timedelta(days=1)
+        until = self.created_until or today or date.today()
+        middle = after + (until - after) // 2
+        if not after < middle < until:
+            return None
+        return (
+            replace(self, created_until=middle),
+            replace(self, created_after=middle),
+        )
+
+
+class _Threshold:
+    """
+    Number of stars of the N-th most popular repo among all found ones.
+    Repos of the search with fewer stars could not get into its top N.
+    """
+    _n: int
+    _stars: list[int]
+
+    def __init__(self, n: int):
+        self._n = n
+        self._stars = []
+
+    def add(self, repos: Iterable[GARepository]):
+        for repo in repos:
+            if len(self._stars) < self._n:
+                heapq.heappush(self._stars, repo.stars)
+            elif repo.stars > self._stars[0]:
+                heapq.heapreplace(self._stars, repo.stars)
+
+    @property
+    def value(self) -> int | None:
+        return self._stars[0] if len(self._stars) >= self._n else None
+
+
+def _merge_by_stars(ranked_lists: Iterable[list[GARepository]]) -> list[GARepository]:
+    """
+    K-way merge of lists, ranked by stars, into one ranked list without duplicates
+    """
+    merged = []
+    seen = set()
+    for repo in heapq.merge(*ranked_lists, key=lambda repo: -repo.stars):
+        if repo.id not in seen:
+            seen.add(repo.id)
+            merged.append(repo)
+    return merged
+
+
+class ShardedSearch:
+    """
+    Search of the top N repos, which is not limited by the first 1000 results of GithubAPI.
+
+    The search is split into creation date ranges, which are requested concurrently.
+    Every shard is walked down by stars: when its first 1000 results are got, the shard continues
+    with the repos, which have at most stars of the last one, and repos with these stars are requested again.
+    When all 1000 results of a shard have the same stars, the shard is split by dates in halves.
+    A shard is stopped, when it has N repos, or its repos could not get into the top N anymore
+    (they have fewer stars than the N-th repo among all found ones).
+    Shards are merged by stars, so the ranking is the same as of one unlimited search.
+    """
+    _github_api_client: GithubAPIClientProtocol
+    _max_concurrent_pages: int
+    _date_shards: int
+
+    def __init__(
+            self,
+            api_client: GithubAPIClientProtocol,
+            max_concurrent_pages: int = 4,
+            date_shards: int = 4,
+    ):
+        """
+        :param api_client: GithubAPI client
+        :param max_concurrent_pages: max number of pages, requested concurrently by all shards
+        :param date_shards: number of creation date ranges, the search is split into initially
+        """
+        self._github_api_client = api_client
+        self._max_concurrent_pages = max_concurrent_pages
+        self._date_shards = date_shards
+
+    def split_dates(self, created_from: date | None, today: date | None = None) -> list[SearchShard]:
+        """
+        Split the creation range of the search into equal date ranges
+        :param created_from: date, after which repos of the search are created
+        :return: shards, from the oldest
+        """
+        today = today or date.today()
+        first = created_from or GITHUB_EPOCH
+        days = max((today - first).days, 0)
+        bounds = sorted({
+            first + timedelta(days=days * i // self._date_shards)
+            for i in range(1, self._date_shards)
+            if days * i // self._date_shards > 0
+        })
+        afters = [created_from, *bounds]
+        # The last shard is open to include repos created today in any timezone.
+        untils = [*bounds, None]
+        return [SearchShard(created_after=after, created_until=until) for after, until in zip(afters, untils)]
+
+    async def _fetch_shard(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            shard: SearchShard,
+            limit: int,
+            semaphore: asyncio.Semaphore,
+    ) -> tuple[list[GARepository], bool]:
+        """
+        Request the first repos of the shard (at most the search results limit)
+        :return: repos and flag that there are no more repos in the shard
+        """
+        if shard.is_empty:
+            return [], True
+        plan = plan_pages(start=0, end=limit)
+
+        async def get_page(page_id: int):
+            async with semaphore:
+                return await self._github_api_client.search_repos_page(
+                    session=session,
+                    created_from=shard.created_after,
+                    lang=args.lang,
+                    page_id=page_id,
+                    per_page=plan.per_page,
+                    background=True,
+                    created_to=shard.created_until,
+                    stars_max=shard.stars_max,
+                )
+
+        # The first page tells, how many repos the shard has, so only the pages with them are requested.
+        first_page_id, *next_page_ids = plan.page_ids
+        first = await get_page(first_page_id)
+        if first.total_count is not None:
+            last_page_id = first_page_id + math.ceil(first.total_count / plan.per_page) - 1
+            next_page_ids = [page_id for page_id in next_page_ids if page_id <= last_page_id]
+        if len(first.items) < plan.per_page:
+            next_page_ids = []
+        pages = [first]
+        tasks = [asyncio.create_task(get_page(page_id)) for page_id in next_page_ids]
+        try:
+            for task in tasks:
+                page = await task
+                pages.append(page)
+                if len(page.items) < plan.per_page:
+                    # Pages after the incomplete one are empty.
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        metrics.inc("github_shard_pages", len(pages))
+        repos = []
+        exhausted = False
+        for page in pages:
+            repos.extend(page.items)
+            if len(page.items) < plan.per_page or (page.total_count is not None and page.total_count <= len(repos)):
+                exhausted = True
+                break
+        return repos[:limit], exhausted
+
+    async def _collect(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            shard: SearchShard,
+            need: int,
+            semaphore: asyncio.Semaphore,
+            threshold: _Threshold,
+    ) -> tuple[list[GARepository], bool]:
+        """
+        Collect the top repos of the shard, which could get into the top N of the search.
+        :return: repos, ranked by stars, and flag that there are no more repos in the shard
+        """
+        repos = []
+        while True:
+            limit = min(need - len(repos), SEARCH_RESULTS_LIMIT)
+            fetched, exhausted = await self._fetch_shard(session, args, shard, limit, semaphore)
+            if exhausted or len(fetched) < SEARCH_RESULTS_LIMIT or len(repos) + len(fetched) >= need:
+                repos.extend(fetched)
+                threshold.add(fetched)
+                return repos, exhausted
+
+            last_stars = fetched[-1].stars
+            above = [repo for repo in fetched if repo.stars > last_stars]
+            if not above:
+                # All results have the same stars, so the shard could be walked only by dates.
+                halves = shard.split()
+                if halves is None:
+                    metrics.inc("github_shards_truncated")
+                    logger.warning(f"More than {SEARCH_RESULTS_LIMIT} repos with {last_stars} stars in {shard}")
+                    repos.extend(fetched)
+                    threshold.add(fetched)
+                    return repos, False
+                metrics.inc("github_shards_split")
+                results = await asyncio.gather(*(
+                    self._collect(session, args, half, need - len(repos), semaphore, threshold)
+                    for half in halves
+                ))
+                repos.extend(_merge_by_stars(half_repos for half_repos, _ in results))
+                return repos, all(half_exhausted for _, half_exhausted in results)
+
+            repos.extend(above)
+            threshold.add(above)
+            if threshold.value is not None and last_stars < threshold.value:
+                # The rest of the shard could not get into the top N.
+                metrics.inc("github_shards_pruned")
+                return repos, False
+            shard = replace(shard, stars_max=last_stars)
+
+    async def top(
+            self,
+            session: ClientSession,
+            args: SearchArgs,
+            n: int,
+    ) -> tuple[list[GARepository], bool]:
+        """
+        Get N most popular repos of the search as a background work.
+
+        :param session:
+        :param args: search arguments (page_id and per_page are ignored)
+        :param n: number of repos
+        :return: list of repositories, flag that there are no more results after them
+        """
+        semaphore = asyncio.Semaphore(self._max_concurrent_pages)
+        threshold = _Threshold(n)
+        shards = self.split_dates(args.created_from)
+        logger.info(f"Search top {n} repos for args {args} in {len(shards)} shards")
+        results = await asyncio.gather(*(
+            self._collect(session, args, shard, n, semaphore, threshold)
+            for shard in shards
+        ))
+        repos = _merge_by_stars(shard_repos for shard_repos, _ in results)
+        complete = len(repos) <= n and all(exhausted for _, exhausted in results)
+        return repos[:n], complete
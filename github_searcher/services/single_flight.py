@@ -0,0 +1,103 @@
+from typing import Awaitable, Callable, Generic, TypeVar
+
+import asyncio
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesce concurrent calls with the same key into one call.
+    While the call for a key is in flight, all other callers with this key wait for it
+    and share its result or exception.
+
+    The call runs in its own task and is shielded from callers,
+    so a cancelled caller (e.g. disconnected client) doesn't cancel the call for others.
+    The call could be also started by the owner, which follows its progress by its own means
+    (e.g. streams its partial results), and cancels it, when it's abandoned by all callers.
+    """
+    _calls: dict[str, asyncio.Task]
+    # Number of callers, which wait for the call
+    _waiters: dict[asyncio.Task, int]
+
+    def __init__(self):
+        self._calls = {}
+        self._waiters = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark exception as retrieved, in case all callers were cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    def _call(self, key: str, func: Callable[[], Awaitable[T]]) -> asyncio.Task:
+        task = asyncio.ensure_future(func())
+        self._calls[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return task
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Call func, if there is no call in flight for the key, otherwise wait for the existing call.
+        :param key: key of the call
+        :param func: function to call
+        :return: result of the call
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = self._call(key, func)
+        else:
+            logger.debug(f"SingleFlight: join the call in flight for key {key}")
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def start(self, key: str, func: Callable[[], Awaitable[T]]) -> asyncio.Task | None:
+        """
+        Start the call, owned by the caller, if there is no call in flight for the key.
+        Other callers with this key wait for it, as for any other call.
+        :param key: key of the call
+        :param func: function to call
+        :return: task of the call, or None, if the call for the key is already in flight
+        """
+        if key in self._calls:
+            return None
+        return self._call(key, func)
+
+    async def abandon(self, key: str, task: asyncio.Task):
+        """
+        Cancel the call, started by the owner, if nobody else waits for it.
+        :param key: key of the call
+        :param task: task of the call
+        """
+        if task.done() or self._waiters.get(task):
+            return
+        # The next callers start a new call instead of joining the cancelled one.
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def close(self):
+        """
+        Cancel all calls in flight and wait for them.
+        """
+        tasks = list(self._calls.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
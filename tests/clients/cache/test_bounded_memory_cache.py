@@ -0,0 +1,114 @@
+from unittest.mock import patch
+
+import asyncio
+import pytest
+
+from github_searcher.clients.cache.bounded_memory_cache import BoundedMemoryCache
+from github_searcher.metrics import metrics
+
+
+class TestBoundedMemoryCache:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("policy", ["lru", "lfu"])
+    async def test_get_set_delete(self, policy):
+        cache = BoundedMemoryCache(max_size=2, policy=policy)
+        assert await cache.get("a") is None
+        await cache.set("a", 1)
+        assert await cache.get("a") == 1
+        assert await cache.delete("a") == 1
+        assert await cache.delete("a") == 0
+        assert await cache.get("a") is None
+        assert cache.resident_bytes == 0
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        cache = BoundedMemoryCache(max_size=2, policy="lru")
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")
+        await cache.set("c", 3)
+
+        assert len(cache) == 2
+        assert cache.evictions == 1
+        assert await cache.get("a") == 1
+        assert await cache.get("b") is None
+        assert await cache.get("c") == 3
+
+    @pytest.mark.asyncio
+    async def test_lfu_eviction(self):
+        cache = BoundedMemoryCache(max_size=2, policy="lfu")
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        for _ in range(3):
+            await cache.get("a")
+        await cache.get("b")
+        await cache.set("a", 10)
+        await cache.set("c", 3)
+
+        assert cache.evictions == 1
+        assert await cache.get("a") == 10
+        assert await cache.get("b") is None
+        assert await cache.get("c") == 3
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("policy", ["lru", "lfu"])
+    async def test_max_bytes(self, policy):
+        value = "x" * 1000
+        cache = BoundedMemoryCache(max_size=100, max_bytes=3500, policy=policy, name="test_cache")
+        evictions = metrics.counter("test_cache_evictions")
+        for key in range(10):
+            await cache.set(str(key), value)
+
+        assert len(cache) == 3
+        assert cache.resident_bytes <= 3500
+        assert metrics.gauge("test_cache_resident_bytes") == cache.resident_bytes
+        assert metrics.counter("test_cache_evictions") == evictions + 7
+        assert await cache.get("9") == value
+
+    @pytest.mark.asyncio
+    async def test_value_bigger_than_max_bytes(self):
+        cache = BoundedMemoryCache(max_bytes=100)
+        assert not await cache.set("a", "x" * 1000)
+        assert await cache.get("a") is None
+        assert cache.resident_bytes == 0
+
+    @pytest.mark.asyncio
+    async def test_reported_size(self):
+        class Value:
+            nbytes = 1000
+
+        cache = BoundedMemoryCache(max_bytes=2500)
+        with patch("pickle.dumps") as dumps:
+            for key in range(3):
+                await cache.set(str(key), Value())
+        dumps.assert_not_called()
+        assert len(cache) == 2
+        assert cache.resident_bytes == 2000
+
+    @pytest.mark.asyncio
+    async def test_no_size_estimation_without_max_bytes(self):
+        cache = BoundedMemoryCache()
+        with patch("pickle.dumps") as dumps:
+            await cache.set("a", "x" * 1000)
+        dumps.assert_not_called()
+        assert await cache.get("a") == "x" * 1000
+
+    @pytest.mark.asyncio
+    async def test_ttl(self):
+        cache = BoundedMemoryCache(ttl=0.05)
+        await cache.set("a", 1)
+        await cache.set("b", 2, ttl=10)
+        await asyncio.sleep(0.1)
+
+        assert await cache.get("a") is None
+        assert await cache.get("b") == 2
+        assert len(cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_clear(self):
+        cache = BoundedMemoryCache()
+        await cache.set("a", 1)
+        await cache.clear()
+        assert len(cache) == 0
+        assert cache.resident_bytes == 0
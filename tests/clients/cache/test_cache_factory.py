@@ -0,0 +1,155 @@
+import pytest
+
+from github_searcher.clients.cache.bounded_memory_cache import BoundedMemoryCache
+from github_searcher.clients.cache.cache_factory import build_cache
+from github_searcher.clients.cache.serializers import CompressedPickleSerializer
+from github_searcher.clients.cache.two_tier_cache import TwoTierCache
+from github_searcher.configs.cache_config import CacheConfig
+from github_searcher.services.repos_searching import ReposSearchingService
+from github_searcher.services.search_args import SearchArgs
+
+from tests.mocked_github_api_client import MockedGithubAPIClient
+
+
+@pytest.fixture
+def redis_cache():
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = build_cache(CacheConfig(
+        enable=True,
+        backend="redis",
+        serializer="pickle_zlib",
+        namespace="test",
+    ))
+    # Replace connection to real Redis with in-process stand-in
+    cache.client = fakeredis.FakeAsyncRedis()
+    return cache
+
+
+def test_cache_disabled():
+    assert build_cache(CacheConfig(enable=False)) is None
+
+
+def test_memory_backend():
+    cache = build_cache(CacheConfig(
+        enable=True,
+        backend="memory",
+        memory_max_size=10,
+        memory_policy="lfu",
+    ))
+    assert isinstance(cache, BoundedMemoryCache)
+    assert cache._max_size == 10
+    assert cache._policy == "lfu"
+
+
+def test_redis_backend():
+    pytest.importorskip("redis")
+    cache = build_cache(CacheConfig(
+        enable=True,
+        backend="redis",
+        endpoint="redis.local",
+        pool_size=5,
+        namespace="ns",
+    ))
+    assert cache.endpoint == "redis.local"
+    assert cache.port == 6379
+    assert cache.pool_max_size == 5
+    assert cache.namespace == "ns"
+
+
+def test_memcached_backend():
+    pytest.importorskip("aiomcache")
+    cache = build_cache(CacheConfig(
+        enable=True,
+        backend="memcached",
+        pool_size=3,
+    ))
+    assert cache.port == 11211
+    assert cache.pool_size == 3
+
+
+class FakeMemcachedClient:
+    """
+    In-process stand-in of aiomcache client, which validates arguments as aiomcache does
+    """
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, key: bytes, value: bytes, exptime: int = 0) -> bool:
+        aiomcache = pytest.importorskip("aiomcache")
+        if not isinstance(exptime, int):
+            raise aiomcache.exceptions.ValidationException("exptime not int", exptime)
+        self.values[key] = (value, exptime)
+        return True
+
+    async def get(self, key: bytes, default=None):
+        value, _ = self.values.get(key, (default, 0))
+        return value
+
+
+@pytest.mark.asyncio
+async def test_memcached_backend_float_ttl():
+    pytest.importorskip("aiomcache")
+    config = CacheConfig(
+        enable=True,
+        backend="memcached",
+        hard_ttl="600.5",
+    )
+    cache = build_cache(config)
+    cache.client = FakeMemcachedClient()
+
+    await cache.set("key", [1, 2, 3], ttl=config.hard_ttl)
+    assert await cache.get("key") == [1, 2, 3]
+    # TTL is rounded up to whole seconds
+    assert [exptime for _, exptime in cache.client.values.values()] == [601]
+
+    client = MockedGithubAPIClient()
+    service = ReposSearchingService(
+        api_client=client,
+        cache=cache,
+        hard_ttl=config.hard_ttl,
+    )
+    args = SearchArgs(created_from=None, lang="go")
+    page = await service.get_popular_repos(session=None, args=args)
+    assert await service.get_popular_repos(session=None, args=args) == page
+
+
+def test_compressed_pickle_serializer():
+    serializer = CompressedPickleSerializer()
+    value = {"key": ["value"] * 100}
+    dumped = serializer.dumps(value)
+    assert isinstance(dumped, bytes)
+    assert serializer.loads(dumped) == value
+    assert serializer.loads(None) is None
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_namespace(redis_cache):
+    await redis_cache.set("key", [1, 2, 3], ttl=10)
+    assert await redis_cache.get("key") == [1, 2, 3]
+    assert await redis_cache.client.exists(b"test:key")
+    await redis_cache.delete("key")
+    assert await redis_cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_service_with_redis_backend(redis_cache):
+    client = MockedGithubAPIClient()
+    service = ReposSearchingService(
+        api_client=client,
+        cache=redis_cache,
+    )
+    args = SearchArgs(created_from=None, lang="go")
+
+    page = await service.get_popular_repos(session=None, args=args)
+    cached_page = await service.get_popular_repos(session=None, args=args)
+    assert cached_page == page
+
+
+def test_redis_backend_with_l1():
+    pytest.importorskip("redis")
+    cache = build_cache(CacheConfig(
+        enable=True,
+        backend="redis",
+        l1_enable=True,
+    ))
+    assert isinstance(cache, TwoTierCache)
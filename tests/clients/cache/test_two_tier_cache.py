@@ -0,0 +1,105 @@
+from aiocache import SimpleMemoryCache
+from unittest.mock import patch
+
+import asyncio
+import uuid
+import pytest
+
+from github_searcher.clients.cache.bounded_memory_cache import BoundedMemoryCache
+from github_searcher.clients.cache.two_tier_cache import TwoTierCache
+from github_searcher.services.repos_searching import ReposSearchingService
+from github_searcher.services.search_args import SearchArgs
+
+from tests.mocked_github_api_client import MockedGithubAPIClient
+
+
+@pytest.fixture
+def l2():
+    return SimpleMemoryCache(namespace=uuid.uuid4().hex)
+
+
+def two_tier_cache(l2, invalidation_interval: float = 0) -> TwoTierCache:
+    return TwoTierCache(
+        l1=BoundedMemoryCache(max_size=16),
+        l2=l2,
+        l1_ttl=10,
+        invalidation_interval=invalidation_interval,
+    )
+
+
+class TestTwoTierCache:
+
+    @pytest.mark.asyncio
+    async def test_write_to_both_tiers(self, l2):
+        cache = two_tier_cache(l2)
+        await cache.set("key", "value", ttl=60)
+
+        assert await cache._l1.get("key") == "value"
+        assert await l2.get("key") == "value"
+
+    @pytest.mark.asyncio
+    async def test_l1_hit_skips_l2(self, l2):
+        cache = two_tier_cache(l2, invalidation_interval=60)
+        await cache.set("key", "value")
+        await cache.get("key")
+
+        with patch.object(l2, "get") as l2_get:
+            assert await cache.get("key") == "value"
+            l2_get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_l2_hit_fills_l1(self, l2):
+        cache = two_tier_cache(l2)
+        await l2.set("key", "value")
+
+        assert await cache.get("key") == "value"
+        assert await cache._l1.get("key") == "value"
+
+    @pytest.mark.asyncio
+    async def test_l1_ttl_is_bounded(self, l2):
+        cache = TwoTierCache(
+            l1=BoundedMemoryCache(max_size=16),
+            l2=l2,
+            l1_ttl=0.05,
+        )
+        await cache.set("key", "value", ttl=60)
+        await l2.set("key", "new value")
+        await asyncio.sleep(0.1)
+
+        assert await cache.get("key") == "new value"
+
+    @pytest.mark.asyncio
+    async def test_invalidation_across_workers(self, l2):
+        worker_1 = two_tier_cache(l2)
+        worker_2 = two_tier_cache(l2)
+
+        await worker_1.set("key", "value")
+        assert await worker_2.get("key") == "value"
+
+        await worker_1.delete("key")
+        assert await worker_2.get("key") is None
+
+    @pytest.mark.asyncio
+    async def test_invalidation_after_clear(self, l2):
+        worker_1 = two_tier_cache(l2)
+        worker_2 = two_tier_cache(l2)
+
+        await worker_1.set("key", "value")
+        assert await worker_2.get("key") == "value"
+
+        await worker_1.clear()
+        assert await worker_2.get("key") is None
+
+    @pytest.mark.asyncio
+    async def test_service_with_two_tier_cache(self, l2):
+        client = MockedGithubAPIClient()
+        service = ReposSearchingService(
+            api_client=client,
+            cache=two_tier_cache(l2),
+        )
+        args = SearchArgs(created_from=None, lang="go")
+
+        with patch.object(client, "search_repos", side_effect=client.search_repos) as mocked_search:
+            page = await service.get_popular_repos(session=None, args=args)
+            assert await service.get_popular_repos(session=None, args=args) == page
+            assert mocked_search.call_count == 1
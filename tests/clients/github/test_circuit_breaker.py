@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+import pytest
+import time
+
+from github_searcher.clients.github.circuit_breaker import CircuitBreaker, CircuitState
+from github_searcher.exceptions import GithubApiUnavailableException
+
+
+class TestCircuitBreaker:
+    def test_open_after_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, recovery_time=30)
+        for _ in range(2):
+            breaker.before_call()
+            breaker.on_failure()
+        breaker.before_call()
+        breaker.on_success()
+        # Failures are counted only in a row
+        for _ in range(2):
+            breaker.before_call()
+            breaker.on_failure()
+        assert breaker.state == CircuitState.CLOSED
+
+        breaker.before_call()
+        breaker.on_failure()
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.is_open()
+        with pytest.raises(GithubApiUnavailableException):
+            breaker.before_call()
+
+    def test_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=30)
+        breaker.before_call()
+        breaker.on_failure()
+        assert breaker.is_open()
+
+        with patch("time.time", return_value=time.time() + 31):
+            # Only one probe call is allowed
+            breaker.before_call()
+            assert breaker.state == CircuitState.HALF_OPEN
+            with pytest.raises(GithubApiUnavailableException):
+                breaker.before_call()
+
+            # Failed probe opens the circuit again
+            breaker.on_failure()
+            assert breaker.state == CircuitState.OPEN
+            assert breaker.is_open()
+
+        with patch("time.time", return_value=time.time() + 62):
+            breaker.before_call()
+            breaker.on_success()
+            assert breaker.state == CircuitState.CLOSED
+            assert not breaker.is_open()
+
+    def test_lost_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=30)
+        breaker.before_call()
+        breaker.on_failure()
+
+        with patch("time.time", return_value=time.time() + 31):
+            breaker.before_call()
+        # The probe is not finished, the next one is allowed after the recovery time
+        with patch("time.time", return_value=time.time() + 62):
+            breaker.before_call()
+            assert breaker.state == CircuitState.HALF_OPEN
+
+    def test_skipped_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=30)
+        breaker.before_call()
+        breaker.on_failure()
+
+        with patch("time.time", return_value=time.time() + 31):
+            breaker.before_call()
+            # The probe was not made, so the circuit is not closed, but the next probe is allowed
+            breaker.on_skipped()
+            assert breaker.state == CircuitState.HALF_OPEN
+            assert not breaker.is_open()
@@ -32,14 +32,12 @@ class TestCustomAsyncGithubAPIClient:
             check_order(result)
 
     @pytest.mark.asyncio
-    @patch.object(ClientResponse, "json")
-    async def test_rate_limit(self, mocked_json):
-        async def json(*args, **kwargs) -> dict:
-            return {
-                "message": "API rate limit exceeded"
-            }
-
-        mocked_json.side_effect = json
+    @patch.object(ClientResponse, "read")
+    async def test_rate_limit(self, mocked_read):
+        async def read(*args, **kwargs) -> bytes:
+            return b'{"message": "API rate limit exceeded"}'
+
+        mocked_read.side_effect = read
         async with ClientSession() as session:
             with pytest.raises(GithubApiRateLimitException) as e:
                 await self._client.search_repos(
@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+import time
+
+from github_searcher.clients.github.rate_limit_budget import RateLimitBudget
+from github_searcher.exceptions import GithubApiRateLimitException
+from github_searcher.metrics import metrics
+
+from tests.utils import rate_limit_headers
+
+
+class TestRateLimitBudget:
+    def test_update(self):
+        budget = RateLimitBudget()
+        assert budget.available() is None
+        assert not budget.is_low()
+
+        headers = rate_limit_headers(remaining=20, reset_in=60)
+        budget.update(headers)
+        assert budget.available() == 20
+        assert metrics.gauge("github_rate_limit_remaining") == 20
+        assert metrics.gauge("github_rate_limit_limit") == 30
+
+        # Response of the earlier request comes later
+        budget.update({**headers, "X-RateLimit-Remaining": "22"})
+        assert budget.available() == 20
+
+        # New window
+        budget.update(rate_limit_headers(remaining=29, reset_in=120))
+        assert budget.available() == 29
+
+        # Broken headers are ignored
+        budget.update({"X-RateLimit-Remaining": "many", "Retry-After": "later"})
+        assert budget.available() == 29
+
+    def test_window_is_reset(self):
+        budget = RateLimitBudget()
+        budget.update(rate_limit_headers(remaining=0, reset_in=-1))
+        assert budget.available() is None
+
+    @pytest.mark.asyncio
+    async def test_queue_until_reset(self):
+        budget = RateLimitBudget(max_wait=5)
+        budget.update(rate_limit_headers(remaining=0, reset_in=0))
+        # Reset is rounded to seconds
+        budget._reset_at = time.time() + 0.2
+        queued = metrics.counter("github_requests_queued")
+
+        st_time = time.time()
+        async with budget.admit():
+            pass
+
+        assert time.time() - st_time >= 0.2
+        assert metrics.counter("github_requests_queued") == queued + 1
+
+    @pytest.mark.asyncio
+    async def test_reject_when_exhausted(self):
+        budget = RateLimitBudget(max_wait=5)
+        budget.update(rate_limit_headers(remaining=0, reset_in=60))
+        rejected = metrics.counter("github_requests_rejected")
+
+        with pytest.raises(GithubApiRateLimitException):
+            async with budget.admit():
+                pass
+
+        assert metrics.counter("github_requests_rejected") == rejected + 1
+
+    @pytest.mark.asyncio
+    async def test_retry_after(self):
+        budget = RateLimitBudget(max_wait=5)
+        budget.update({"Retry-After": "60"})
+        assert budget.is_low()
+
+        with pytest.raises(GithubApiRateLimitException):
+            async with budget.admit():
+                pass
+
+    @pytest.mark.asyncio
+    async def test_background_reserve(self):
+        budget = RateLimitBudget(background_reserve=3, pace_threshold=0)
+        budget.update(rate_limit_headers(remaining=4, reset_in=60))
+
+        async with budget.admit(background=True):
+            # Request in flight reduces the budget
+            assert budget.available() == 3
+            assert budget.is_low()
+            with pytest.raises(GithubApiRateLimitException):
+                async with budget.admit(background=True):
+                    pass
+            # Reserved requests are used by clients
+            async with budget.admit():
+                assert budget.available() == 2
+
+        assert budget.available() == 4
+
+    @pytest.mark.asyncio
+    async def test_pace(self):
+        budget = RateLimitBudget(background_reserve=0, pace_threshold=5, max_wait=1)
+        budget.update(rate_limit_headers(remaining=0, reset_in=0))
+        # 4 requests in 2 seconds
+        budget._remaining = 4
+        budget._reset_at = time.time() + 2
+
+        admitted = []
+
+        async def request():
+            async with budget.admit():
+                admitted.append(time.time())
+
+        st_time = time.time()
+        results = await asyncio.gather(*[request() for _ in range(4)], return_exceptions=True)
+
+        # Requests are spaced by 0.5 seconds, the last one is rejected after max_wait
+        assert len(admitted) == 3
+        assert [round(t - st_time, 1) for t in admitted] == [0.0, 0.5, 1.0]
+        assert isinstance(results[-1], GithubApiRateLimitException)
@@ -0,0 +1,220 @@
+from aiohttp import ClientConnectionError
+from http import HTTPStatus
+from pydantic import ValidationError
+from unittest.mock import patch
+
+import asyncio
+import pytest
+import time
+
+from github_searcher.clients.github.circuit_breaker import CircuitBreaker, CircuitState
+from github_searcher.clients.github.custom_async_client import CustomAsyncGithubAPIClient
+from github_searcher.clients.github.latency_window import LatencyWindow
+from github_searcher.clients.github.request_policy import RequestPolicy
+from github_searcher.exceptions import GithubApiRateLimitException, GithubApiUnavailableException
+from github_searcher.metrics import metrics
+
+from tests.fake_github_session import EMPTY_SEARCH_RESPONSE, FakeResponse, FakeSession
+from tests.utils import rate_limit_headers
+
+
+def ok(delay: float = 0) -> FakeResponse:
+    return FakeResponse(status=HTTPStatus.OK, body=EMPTY_SEARCH_RESPONSE, delay=delay)
+
+
+def client(circuit_breaker: CircuitBreaker | None = None, **policy) -> CustomAsyncGithubAPIClient:
+    return CustomAsyncGithubAPIClient(
+        request_policy=RequestPolicy(backoff_base=0.01, backoff_max=0.05, **policy),
+        circuit_breaker=circuit_breaker,
+    )
+
+
+class TestRequestPolicy:
+    def test_backoff(self):
+        policy = RequestPolicy(backoff_base=0.2, backoff_max=1)
+        for retry, max_backoff in [(0, 0.2), (1, 0.4), (2, 0.8), (5, 1)]:
+            assert all(0 <= policy.backoff(retry) <= max_backoff for _ in range(100))
+
+    def test_latency_window(self):
+        window = LatencyWindow(size=100)
+        assert window.quantile(0.95) is None
+        for latency in range(200, 0, -1):
+            window.observe(latency)
+        assert len(window) == 100
+        assert window.quantile(0.95) == 95
+        assert window.quantile(0) == 1
+        assert window.quantile(1) == 100
+
+
+class TestRetries:
+    @pytest.mark.asyncio
+    async def test_retry_server_errors(self):
+        session = FakeSession([
+            FakeResponse(status=HTTPStatus.BAD_GATEWAY),
+            ClientConnectionError(),
+            ok(),
+        ])
+        retries = metrics.counter("github_request_retries")
+
+        page = await client(retries=2).search_repos_page(session=session)
+        assert page.items == []
+        assert len(session.tokens) == 3
+        assert metrics.counter("github_request_retries") == retries + 2
+
+    @pytest.mark.asyncio
+    async def test_retries_are_exhausted(self):
+        session = FakeSession([ClientConnectionError()] * 2 + [ok()])
+
+        with pytest.raises(GithubApiUnavailableException):
+            await client(retries=1).search_repos_page(session=session)
+        assert len(session.tokens) == 2
+
+    @pytest.mark.asyncio
+    async def test_attempt_timeout(self):
+        session = FakeSession([ok(delay=1), ok()])
+
+        page = await client(attempt_timeout=0.1).search_repos_page(session=session)
+        assert page.items == []
+        assert len(session.tokens) == 2
+
+    @pytest.mark.asyncio
+    async def test_total_timeout(self):
+        session = FakeSession([ok(delay=1)] * 10)
+
+        with pytest.raises(GithubApiUnavailableException):
+            await client(attempt_timeout=0.1, total_timeout=0.25, retries=10).search_repos_page(session=session)
+        assert len(session.tokens) <= 3
+
+    @pytest.mark.asyncio
+    async def test_refused_request_is_not_retried(self):
+        session = FakeSession([
+            FakeResponse(status=HTTPStatus.FORBIDDEN, body={"message": "API rate limit exceeded"}),
+            ok(),
+        ])
+
+        with pytest.raises(GithubApiRateLimitException):
+            await client().search_repos_page(session=session)
+        assert len(session.tokens) == 1
+
+    @pytest.mark.asyncio
+    async def test_not_json_error_body(self):
+        session = FakeSession([FakeResponse(status=HTTPStatus.BAD_REQUEST, body=b"<html>Bad request</html>")])
+
+        with pytest.raises(GithubApiUnavailableException):
+            await client().search_repos_page(session=session)
+        assert len(session.tokens) == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_error_body(self):
+        session = FakeSession([FakeResponse(status=HTTPStatus.UNPROCESSABLE_ENTITY, body=["Validation Failed"])])
+
+        with pytest.raises(ValidationError):
+            await client().search_repos_page(session=session)
+        assert len(session.tokens) == 1
+
+
+class TestCircuitBreaking:
+    @pytest.mark.asyncio
+    async def test_fail_fast(self):
+        breaker = CircuitBreaker(failure_threshold=3, recovery_time=30)
+        github_api_client = client(circuit_breaker=breaker, retries=5)
+        session = FakeSession([ClientConnectionError()] * 10)
+
+        with pytest.raises(GithubApiUnavailableException):
+            await github_api_client.search_repos_page(session=session)
+        # Retries are stopped, when the circuit is opened
+        assert len(session.tokens) == 3
+
+        with pytest.raises(GithubApiUnavailableException):
+            await github_api_client.search_repos_page(session=session)
+        assert len(session.tokens) == 3
+
+    @pytest.mark.asyncio
+    async def test_rejected_probe_does_not_close_circuit(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=30)
+        github_api_client = client(circuit_breaker=breaker, retries=0)
+        session = FakeSession([ClientConnectionError(), ok()])
+        with pytest.raises(GithubApiUnavailableException):
+            await github_api_client.search_repos_page(session=session)
+
+        now = time.time() + 31
+        budget = github_api_client._token_pool.choose().budget
+        budget.update(rate_limit_headers(remaining=0, reset_in=3600))
+        with patch("time.time", return_value=now):
+            # The budget rejects the probe before it's sent
+            with pytest.raises(GithubApiRateLimitException):
+                await github_api_client.search_repos_page(session=session, background=True)
+            assert len(session.tokens) == 1
+            assert breaker.state == CircuitState.HALF_OPEN
+            assert not breaker.is_open()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("response, state", [
+        (FakeResponse(status=HTTPStatus.UNPROCESSABLE_ENTITY, body=["Validation Failed"]), CircuitState.CLOSED),
+        (FakeResponse(status=HTTPStatus.BAD_GATEWAY, body=b"<html>Bad gateway</html>"), CircuitState.OPEN),
+        (FakeResponse(status=HTTPStatus.OK, body=b"<html>Maintenance</html>"), CircuitState.OPEN),
+    ])
+    async def test_probe_resolves_circuit(self, response, state):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=30)
+        github_api_client = client(circuit_breaker=breaker, retries=0)
+        session = FakeSession([ClientConnectionError(), response])
+        with pytest.raises(GithubApiUnavailableException):
+            await github_api_client.search_repos_page(session=session)
+
+        with patch("time.time", return_value=time.time() + 31):
+            with pytest.raises(Exception):
+                await github_api_client.search_repos_page(session=session)
+            assert len(session.tokens) == 2
+            assert breaker.state == state
+
+    @pytest.mark.asyncio
+    async def test_cancelled_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=30)
+        github_api_client = client(circuit_breaker=breaker, retries=0, attempt_timeout=10, total_timeout=10)
+        session = FakeSession([ClientConnectionError(), ok(delay=1)])
+        with pytest.raises(GithubApiUnavailableException):
+            await github_api_client.search_repos_page(session=session)
+
+        with patch("time.time", return_value=time.time() + 31):
+            probe = asyncio.create_task(github_api_client.search_repos_page(session=session))
+            await asyncio.sleep(0.05)
+            assert breaker.is_open()
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+            # The next probe is allowed at once
+            assert breaker.state == CircuitState.HALF_OPEN
+            assert not breaker.is_open()
+
+
+class TestHedging:
+    @pytest.mark.asyncio
+    async def test_hedge_slow_request(self):
+        github_api_client = client(hedge=True, hedge_min_samples=20)
+        for _ in range(20):
+            github_api_client._latencies.observe(0.05)
+        session = FakeSession([ok(delay=1), ok()])
+        wins = metrics.counter("github_hedge_wins")
+
+        page = await github_api_client.search_repos_page(session=session)
+        assert page.items == []
+        assert len(session.tokens) == 2
+        assert metrics.counter("github_hedge_wins") == wins + 1
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_for_background(self):
+        github_api_client = client(hedge=True, hedge_min_samples=20)
+        for _ in range(20):
+            github_api_client._latencies.observe(0.05)
+        session = FakeSession([ok(delay=0.2), ok()])
+
+        await github_api_client.search_repos_page(session=session, background=True)
+        assert len(session.tokens) == 1
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_samples(self):
+        github_api_client = client(hedge=True, hedge_min_samples=20)
+        session = FakeSession([ok(delay=0.2), ok()])
+
+        await github_api_client.search_repos_page(session=session)
+        assert len(session.tokens) == 1
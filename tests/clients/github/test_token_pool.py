@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+import time
+
+from github_searcher.clients.github.custom_async_client import CustomAsyncGithubAPIClient
+from github_searcher.clients.github.token_pool import TokenPool
+from github_searcher.metrics import metrics
+
+from tests.fake_github_session import EMPTY_SEARCH_RESPONSE, FakeResponse, FakeSession
+from tests.utils import rate_limit_headers
+
+
+class TestTokenPool:
+    def test_anonymous(self):
+        pool = TokenPool()
+        assert len(pool) == 1
+        assert pool.choose().headers == {}
+
+    def test_choose_most_remaining(self):
+        pool = TokenPool(tokens=["a", "b", "c", "a"])
+        assert len(pool) == 3
+        a, b, c = pool.tokens
+        assert a.headers == {"Authorization": "Bearer a"}
+
+        a.budget.update(rate_limit_headers(remaining=10, reset_in=60))
+        b.budget.update(rate_limit_headers(remaining=20, reset_in=60))
+        # Unknown quota is considered as full
+        assert pool.choose() is c
+
+        c.budget.update(rate_limit_headers(remaining=20, reset_in=30))
+        # The same quota, but earlier reset
+        assert pool.choose() is c
+
+        c.budget.update(rate_limit_headers(remaining=5, reset_in=30))
+        assert pool.choose() is b
+
+    def test_quarantine_refused(self):
+        pool = TokenPool(tokens=["a", "b"], quarantine_time=300)
+        a, b = pool.tokens
+        quarantines = metrics.counter("github_token_0_quarantines")
+
+        pool.update(a, HTTPStatus.UNAUTHORIZED, {})
+        assert a.is_quarantined()
+        assert a.quarantined_until >= time.time() + 299
+        assert metrics.counter("github_token_0_quarantines") == quarantines + 1
+        assert pool.choose() is b
+        assert not pool.has_usable(exclude=b)
+
+        # All tokens are quarantined, the token released first is chosen
+        pool.update(b, HTTPStatus.UNAUTHORIZED, {})
+        assert pool.choose() is a
+
+    def test_quarantine_rate_limited(self):
+        pool = TokenPool(tokens=["a", "b"], quarantine_time=300)
+        a, b = pool.tokens
+
+        pool.update(a, HTTPStatus.FORBIDDEN, rate_limit_headers(remaining=0, reset_in=30))
+        assert a.is_quarantined()
+        # Quarantined until the reset
+        assert a.quarantined_until <= time.time() + 30
+        assert pool.choose() is b
+
+    def test_is_low(self):
+        pool = TokenPool(tokens=["a", "b"], background_reserve=3)
+        a, b = pool.tokens
+
+        pool.update(a, HTTPStatus.OK, rate_limit_headers(remaining=2, reset_in=60))
+        assert not pool.is_low()
+        pool.update(b, HTTPStatus.OK, rate_limit_headers(remaining=3, reset_in=60))
+        assert pool.is_low()
+        assert metrics.gauge("github_rate_limit_remaining") == 5
+
+
+class TestTokenRotation:
+    @pytest.mark.asyncio
+    async def test_repeat_with_another_token(self):
+        pool = TokenPool(tokens=["a", "b"])
+        client = CustomAsyncGithubAPIClient(token_pool=pool)
+        session = FakeSession({
+            "a": FakeResponse(
+                status=HTTPStatus.FORBIDDEN,
+                headers=rate_limit_headers(remaining=0, reset_in=60),
+                body={"message": "API rate limit exceeded"},
+            ),
+            "b": FakeResponse(
+                status=HTTPStatus.OK,
+                headers={**rate_limit_headers(remaining=29, reset_in=60), "ETag": '"b"'},
+                body=EMPTY_SEARCH_RESPONSE,
+            ),
+        })
+        requests_b = metrics.counter("github_token_1_requests")
+
+        page = await client.search_repos_page(session=session)
+        assert page.items == []
+        assert page.validators.etag == '"b"'
+        assert session.tokens == ["a", "b"]
+
+        # Rate limited token is not used until the reset
+        await client.search_repos_page(session=session)
+        assert session.tokens == ["a", "b", "b"]
+        assert metrics.counter("github_token_1_requests") == requests_b + 2
@@ -0,0 +1,64 @@
+from datetime import date
+
+import pytest
+import yarl
+
+from github_searcher.clients.github.url_builder import GithubAPIUrlBuilder
+
+
+def test_search_url_default():
+    url = GithubAPIUrlBuilder.get_search_repositories_url()
+    assert url == "https://api.github.com/search/repositories?q=is:public+stars:>1&sort=stars&order=desc"
+
+
+def test_search_url_filters():
+    url = GithubAPIUrlBuilder.get_search_repositories_url(
+        page_id=3,
+        created_from=date(2024, 1, 2),
+        lang="python",
+        per_page=100,
+    )
+    assert url == (
+        "https://api.github.com/search/repositories"
+        "?q=is:public+stars:>1+created:>2024-01-02+language:python"
+        "&sort=stars&order=desc&per_page=100&page=3"
+    )
+
+
+@pytest.mark.parametrize("lang, encoded", [("c++", "c%2B%2B"), ("c#", "c%23"), ("Objective-C", "Objective-C")])
+def test_search_url_encodes_language(lang, encoded):
+    url = GithubAPIUrlBuilder.get_search_repositories_url(
+        page_id=2,
+        lang=lang,
+        per_page=100,
+    )
+    assert url == (
+        "https://api.github.com/search/repositories"
+        f"?q=is:public+stars:>1+language:{encoded}"
+        "&sort=stars&order=desc&per_page=100&page=2"
+    )
+    # The query is not cut by the language
+    query = yarl.URL(url).query
+    assert query["q"] == f"is:public stars:>1 language:{lang}"
+    assert query["page"] == "2"
+
+
+@pytest.mark.parametrize("per_page", [0, -1, 101])
+def test_search_url_invalid_per_page(per_page):
+    with pytest.raises(ValueError):
+        GithubAPIUrlBuilder.get_search_repositories_url(per_page=per_page)
+
+
+def test_search_url_shard():
+    url = GithubAPIUrlBuilder.get_search_repositories_url(
+        created_from=date(2024, 1, 2),
+        created_to=date(2024, 2, 1),
+        stars_max=500,
+    )
+    assert url == (
+        "https://api.github.com/search/repositories"
+        "?q=is:public+stars:2..500+created:2024-01-03..2024-02-01"
+        "&sort=stars&order=desc"
+    )
+    url = GithubAPIUrlBuilder.get_search_repositories_url(created_to=date(2024, 2, 1))
+    assert "created:*..2024-02-01" in url
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from github_searcher.clients.http.session_manager import ClientSessionManager
+from github_searcher.configs.http_client_config import HttpClientConfig
+
+
+class TestClientSessionManager:
+
+    @pytest.mark.asyncio
+    async def test_session_is_shared(self):
+        manager = ClientSessionManager(config=HttpClientConfig())
+        session = await manager.start()
+
+        assert manager.get_session() is session
+        assert manager.get_session() is session
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_connection_pool_configured(self):
+        config = HttpClientConfig(
+            pool_size=7,
+            limit_per_host=3,
+            dns_cache_ttl=42,
+        )
+        manager = ClientSessionManager(config=config)
+        session = manager.get_session()
+
+        assert session.connector.limit == 7
+        assert session.connector.limit_per_host == 3
+        assert session.connector.use_dns_cache
+        assert session.connector._cached_hosts._ttl == 42
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_close(self):
+        manager = ClientSessionManager(config=HttpClientConfig())
+        session = manager.get_session()
+        await manager.close()
+
+        assert session.closed
+        assert manager.get_session() is not session
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_session_of_closed_loop(self):
+        manager = ClientSessionManager(config=HttpClientConfig())
+
+        async def open_session():
+            return manager.get_session()
+
+        # The session is opened in the loop, which is closed after it
+        session = await asyncio.to_thread(asyncio.run, open_session())
+        new_session = manager.get_session()
+
+        assert new_session is not session
+        # The previous session is released, not left unclosed
+        assert session.closed
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_session_of_another_running_loop(self):
+        manager = ClientSessionManager(config=HttpClientConfig())
+        session = manager.get_session()
+
+        async def open_session():
+            return manager.get_session()
+
+        with pytest.raises(RuntimeError):
+            await asyncio.to_thread(asyncio.run, open_session())
+        assert manager.get_session() is session
+        await manager.close()
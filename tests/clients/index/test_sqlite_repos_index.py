@@ -0,0 +1,156 @@
+from datetime import date, datetime, timezone
+
+import time
+
+from github_searcher.clients.index.sqlite_repos_index import SqliteReposIndex
+from github_searcher.schemas.github_api import GARepository
+
+
+def gen_repo(rank: int, stars: int, created_at: datetime, lang: str = "Go") -> GARepository:
+    return GARepository(
+        id=rank,
+        name=f"repo_{rank}",
+        full_name=f"owner/repo_{rank}",
+        owner=dict(login="owner"),
+        description=None,
+        created_at=created_at,
+        clone_url=f"https://github.com/owner/repo_{rank}.git",
+        stargazers_count=stars,
+        watchers_count=stars,
+        language=lang,
+    )
+
+
+def gen_repos(n: int) -> list[GARepository]:
+    # Odd ranks are created in 2020, even ranks in 2023
+    return [
+        gen_repo(
+            rank=rank,
+            stars=1000 - rank,
+            created_at=datetime(2020 if rank % 2 else 2023, 6, 1, tzinfo=timezone.utc),
+        )
+        for rank in range(n)
+    ]
+
+
+class TestSqliteReposIndex:
+    def test_query_scope(self):
+        index = SqliteReposIndex()
+        index.open()
+        repos = gen_repos(10)
+        index.replace_scope("Go", None, repos, complete=False)
+
+        indexed = index.query(created_from=None, lang="go", start=2, end=5)
+        assert indexed.repos == repos[2:5]
+        # Deeper ranks than the scope holds are not answered
+        assert index.query(created_from=None, lang="go", start=0, end=11) is None
+        # Other languages are not answered
+        assert index.query(created_from=None, lang="python", start=0, end=5) is None
+
+    def test_query_narrower_window(self):
+        index = SqliteReposIndex()
+        index.open()
+        repos = gen_repos(10)
+        index.replace_scope("go", None, repos, complete=False)
+
+        # Repos of the scope created since 2023 are the top of the narrower query
+        indexed = index.query(created_from=date(2023, 1, 1), lang="go", start=0, end=5)
+        assert indexed.repos == repos[0::2]
+        # The scope is not complete, so the 6th repo created since 2023 could be out of it
+        assert index.query(created_from=date(2023, 1, 1), lang="go", start=0, end=6) is None
+
+        index.replace_scope("go", None, repos, complete=True)
+        indexed = index.query(created_from=date(2023, 1, 1), lang="go", start=0, end=6)
+        assert indexed.repos == repos[0::2]
+
+    def test_query_narrowest_scope(self):
+        index = SqliteReposIndex()
+        index.open()
+        index.replace_scope("go", None, gen_repos(2), complete=False)
+        recent = [repo for repo in gen_repos(20) if repo.created_at.year == 2023]
+        index.replace_scope("go", date(2023, 1, 1), recent, complete=False)
+
+        indexed = index.query(created_from=date(2023, 3, 1), lang="go", start=0, end=10)
+        assert indexed.repos == recent
+        # The window doesn't include older repos
+        assert index.query(created_from=date(2022, 1, 1), lang="go", start=0, end=2) is None
+
+    def test_stale_scope(self):
+        index = SqliteReposIndex(max_staleness=60)
+        index.open()
+        index.replace_scope(None, None, gen_repos(10), complete=False, crawled_at=time.time() - 120)
+        assert index.query(created_from=None, lang=None, start=0, end=5) is None
+
+        index.replace_scope(None, None, gen_repos(10), complete=False)
+        indexed = index.query(created_from=None, lang=None, start=0, end=5)
+        assert len(indexed.repos) == 5
+
+    def test_replace_scope(self):
+        index = SqliteReposIndex()
+        index.open()
+        index.replace_scope("go", None, gen_repos(10), complete=False)
+        index.replace_scope("go", None, gen_repos(3), complete=True)
+
+        assert len(index.query(created_from=None, lang="go", start=0, end=10).repos) == 3
+        [watermark] = index.watermarks()
+        assert watermark.lang == "go"
+        assert watermark.created_from is None
+        assert watermark.depth == 3
+        assert watermark.complete
+
+    def test_watermarks(self):
+        index = SqliteReposIndex()
+        index.open()
+        index.replace_scope("go", date(2023, 1, 1), [], complete=True, crawled_at=100)
+        [watermark] = index.watermarks()
+        assert watermark.created_from == date(2023, 1, 1)
+        assert watermark.crawled_at == 100
+
+    def test_query_deep_ranks(self):
+        index = SqliteReposIndex()
+        index.open()
+        repos = [
+            gen_repo(rank=rank, stars=5000 - rank, created_at=datetime(2023, 6, 1, tzinfo=timezone.utc))
+            for rank in range(1500)
+        ]
+        index.replace_scope(None, None, repos, complete=False)
+        assert index.query(created_from=None, lang=None, start=1200, end=1230).repos == repos[1200:1230]
+
+    def test_query_created_after(self):
+        # GithubAPI searches repos created after created_from
+        index = SqliteReposIndex()
+        index.open()
+        repos = gen_repos(10)
+        index.replace_scope("go", None, repos, complete=True)
+        indexed = index.query(created_from=date(2023, 6, 1), lang="go", start=0, end=5)
+        assert indexed.repos == []
+        indexed = index.query(created_from=date(2023, 5, 31), lang="go", start=0, end=5)
+        assert indexed.repos == repos[0::2]
+
+    def test_prune(self):
+        index = SqliteReposIndex(max_staleness=100)
+        index.open()
+        now = time.time()
+        index.replace_scope("go", date(2024, 1, 1), gen_repos(10), complete=False, crawled_at=now - 200)
+        index.replace_scope("go", date(2024, 1, 2), gen_repos(10), complete=False, crawled_at=now - 200)
+        index.replace_scope("go", date(2024, 1, 3), gen_repos(10), complete=False, crawled_at=now - 50)
+
+        # Crawled scopes and fresh scopes are kept
+        assert index.prune(keep=[("Go", date(2024, 1, 2))], now=now) == 1
+        assert sorted(watermark.created_from for watermark in index.watermarks()) == [date(2024, 1, 2), date(2024, 1, 3)]
+        assert index._connection.execute("SELECT COUNT(*) FROM repos").fetchone() == (20,)
+
+    def test_crawl_lock(self):
+        index = SqliteReposIndex()
+        index.open()
+        assert index.acquire_crawl_lock("first", ttl=60, now=100)
+        # The lock is prolonged by its owner, and is not taken by others until it expires
+        assert index.acquire_crawl_lock("first", ttl=60, now=150)
+        assert not index.acquire_crawl_lock("second", ttl=60, now=200)
+        assert index.acquire_crawl_lock("second", ttl=60, now=211)
+        assert not index.acquire_crawl_lock("first", ttl=60, now=220)
+
+        index.release_crawl_lock("first")
+        assert not index.acquire_crawl_lock("first", ttl=60, now=220)
+        index.release_crawl_lock("second")
+        assert index.acquire_crawl_lock("first", ttl=60, now=220)
@@ -0,0 +1,97 @@
+from aiohttp import ClientSession
+from datetime import date, datetime, timedelta, timezone
+
+import random
+
+from github_searcher.clients.github.search_repos_page import PageValidators, SearchReposPage
+from github_searcher.exceptions import SearchMaxResultsException
+from github_searcher.schemas.github_api import GARepository
+
+
+class DatasetGithubAPIClient:
+    """
+    Client, which searches repos in the dataset as GithubAPI does:
+    results are sorted by stars, only the first 1000 of them are available, and the total count is returned.
+    """
+    MAX_RESULTS_COUNT = 1000
+
+    def __init__(self, repos: list[GARepository]):
+        self.repos = sorted(repos, key=lambda repo: -repo.stars)
+        self.requests = 0
+
+    async def search_repos_page(
+            self,
+            session: ClientSession,
+            page_id: int | None = None,
+            created_from: date | None = None,
+            lang: str | None = None,
+            per_page: int | None = None,
+            validators: PageValidators | None = None,
+            background: bool = False,
+            created_to: date | None = None,
+            stars_max: int | None = None,
+    ) -> SearchReposPage:
+        self.requests += 1
+        page_id = page_id or 1
+        per_page = per_page or 30
+        first_rank = (page_id - 1) * per_page
+        if first_rank >= self.MAX_RESULTS_COUNT:
+            raise SearchMaxResultsException()
+
+        found = [
+            repo for repo in self.repos
+            if repo.stars > 1
+            and (stars_max is None or repo.stars <= stars_max)
+            and (created_from is None or repo.created_at.date() > created_from)
+            and (created_to is None or repo.created_at.date() <= created_to)
+            and (lang is None or (repo.language or "").lower() == lang.lower())
+        ]
+        return SearchReposPage(
+            items=found[first_rank:min(first_rank + per_page, self.MAX_RESULTS_COUNT)],
+            validators=PageValidators(),
+            total_count=len(found),
+        )
+
+    async def search_repos(self, session: ClientSession, **kwargs) -> list[GARepository]:
+        page = await self.search_repos_page(session, **kwargs)
+        return page.items
+
+
+def gen_dataset(n: int, max_stars: int, seed: int = 0) -> list[GARepository]:
+    """
+    Repos with random stars, creation dates (since 2010) and languages
+    """
+    rnd = random.Random(seed)
+    return [
+        GARepository(
+            id=i,
+            name=f"repo_{i}",
+            full_name=f"owner/repo_{i}",
+            owner=dict(login="owner"),
+            created_at=datetime(2010, 1, 1, tzinfo=timezone.utc) + timedelta(days=rnd.randint(0, 4000)),
+            clone_url=f"https://github.com/owner/repo_{i}.git",
+            stargazers_count=rnd.randint(2, max_stars),
+            watchers_count=0,
+            language=rnd.choice(["Go", "Python"]),
+        )
+        for i in range(n)
+    ]
+
+
+def reference_top(
+        dataset: list[GARepository],
+        n: int,
+        created_from: date | None = None,
+        lang: str | None = None,
+) -> list[GARepository]:
+    """
+    Top N repos of the dataset for the filter, as one unlimited search returns them
+    """
+    return sorted(
+        (
+            repo for repo in dataset
+            if (lang is None or repo.language.lower() == lang.lower())
+            and (created_from is None or repo.created_at.date() > created_from)
+        ),
+        key=lambda repo: -repo.stars,
+    )[:n]
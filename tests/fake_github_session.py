@@ -0,0 +1,54 @@
+from aiohttp import ClientResponseError
+from contextlib import asynccontextmanager
+
+import asyncio
+import json
+
+
+class FakeResponse:
+    def __init__(
+            self,
+            status: int,
+            headers: dict[str, str] | None = None,
+            body: dict | bytes | None = None,
+            delay: float = 0,
+    ):
+        self.status = status
+        self.headers = headers or {}
+        self._body = body
+        self._delay = delay
+
+    async def read(self) -> bytes:
+        if isinstance(self._body, bytes):
+            return self._body
+        return json.dumps(self._body).encode()
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise ClientResponseError(request_info=None, history=(), status=self.status)
+
+
+EMPTY_SEARCH_RESPONSE = {"total_count": 0, "incomplete_results": False, "items": []}
+
+
+class FakeSession:
+    """
+    Session, which answers GithubAPI requests by the token of request,
+    or by the list of responses (and errors) in order.
+    """
+    def __init__(self, responses: dict[str | None, FakeResponse] | list[FakeResponse | Exception]):
+        self._responses = responses
+        self.tokens = []
+
+    @asynccontextmanager
+    async def get(self, url: str, headers: dict[str, str]):
+        token = headers.get("Authorization", "").removeprefix("Bearer ") or None
+        self.tokens.append(token)
+        if isinstance(self._responses, dict):
+            response = self._responses[token]
+        else:
+            response = self._responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        await asyncio.sleep(response._delay)
+        yield response
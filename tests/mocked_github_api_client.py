@@ -4,6 +4,7 @@ from datetime import date, timedelta
 import asyncio
 import random
 
+from github_searcher.clients.github.search_repos_page import PageValidators, SearchReposPage
 from github_searcher.schemas.github_api import (
     GARepository,
 )
@@ -13,8 +14,8 @@ from github_searcher.exceptions import SearchMaxResultsException
 class MockedGithubAPIClient:
     VALID_LANGS = ["python", "go", "c", "c++"]
 
-    PAGE_LEN = 10
-    MAX_PAGE_COUNT = 50
+    PAGE_LEN = 30
+    MAX_RESULTS_COUNT = 1000
 
     @staticmethod
     def gen_repo(
@@ -48,11 +49,14 @@ class MockedGithubAPIClient:
             page_id: int | None = None,
             created_from: date | None = None,
             lang: str | None = None,
+            per_page: int | None = None,
     ) -> list[GARepository]:
-        page_id = page_id or 0
+        page_id = page_id or 1
+        per_page = per_page or self.PAGE_LEN
         await asyncio.sleep(0.1)
 
-        if page_id > self.MAX_PAGE_COUNT:
+        first_rank = (page_id - 1) * per_page
+        if first_rank >= self.MAX_RESULTS_COUNT:
             raise SearchMaxResultsException()
 
         if created_from and created_from > date.today():
@@ -61,10 +65,45 @@ class MockedGithubAPIClient:
         return [
             GARepository(
                 **self.gen_repo(
-                    stars=50 * (self.MAX_PAGE_COUNT - page_id) - 3 * idx,
+                    stars=3 * (self.MAX_RESULTS_COUNT - rank),
                     created_from=created_from,
                     lang=lang,
                 )
             )
-            for idx in range(self.PAGE_LEN)
+            for rank in range(first_rank, min(first_rank + per_page, self.MAX_RESULTS_COUNT))
         ]
+
+    @staticmethod
+    def page_etag(
+            page_id: int | None = None,
+            created_from: date | None = None,
+            lang: str | None = None,
+            per_page: int | None = None,
+    ) -> str:
+        return f'"{page_id or 1};{created_from};{lang};{per_page}"'
+
+    async def search_repos_page(
+            self,
+            session: ClientSession,
+            page_id: int | None = None,
+            created_from: date | None = None,
+            lang: str | None = None,
+            per_page: int | None = None,
+            validators: PageValidators | None = None,
+            background: bool = False,
+            created_to: date | None = None,
+            stars_max: int | None = None,
+    ) -> SearchReposPage:
+        etag = self.page_etag(page_id, created_from, lang, per_page)
+        if validators and validators.etag == etag:
+            await asyncio.sleep(0.1)
+            return SearchReposPage(items=None, validators=validators, not_modified=True)
+
+        items = await self.search_repos(
+            session=session,
+            page_id=page_id,
+            created_from=created_from,
+            lang=lang,
+            per_page=per_page,
+        )
+        return SearchReposPage(items=items, validators=PageValidators(etag=etag))
@@ -0,0 +1,54 @@
+from github_searcher.services.access_stats import AccessStats
+from github_searcher.services.search_args import SearchArgs
+
+
+class TestAccessStats:
+    def test_hottest(self):
+        stats = AccessStats()
+        for lang, count in [("go", 3), (None, 5), ("python", 1)]:
+            for _ in range(count):
+                stats.record(SearchArgs(created_from=None, lang=lang, page_id=2), end=60)
+        stats.record(SearchArgs(created_from=None, lang="go"), end=100)
+
+        hottest = stats.hottest(2)
+        assert [record.args.lang for record in hottest] == [None, "go"]
+        assert [record.count for record in hottest] == [5, 4]
+        # The deepest requested rank is kept
+        assert hottest[1].end == 100
+        assert hottest[1].args.page_id == 1
+
+    def test_decay(self):
+        stats = AccessStats(decay=0.5, min_count=0.2)
+        stats.record(SearchArgs(created_from=None, lang="go"), end=10)
+        stats.record(SearchArgs(created_from=None, lang="c"), end=10)
+        stats.record(SearchArgs(created_from=None, lang="c"), end=10)
+
+        stats.decay()
+        assert [record.count for record in stats.hottest(2)] == [1, 0.5]
+        stats.decay()
+        stats.decay()
+        # Not accessed filters are forgotten
+        assert [record.args.lang for record in stats.hottest(2)] == ["c"]
+
+    def test_max_keys(self):
+        stats = AccessStats(max_keys=2)
+        stats.record(SearchArgs(created_from=None, lang="go"), end=10)
+        stats.record(SearchArgs(created_from=None, lang="go"), end=10)
+        stats.record(SearchArgs(created_from=None, lang="c"), end=10)
+        stats.record(SearchArgs(created_from=None, lang="python"), end=10)
+
+        assert len(stats) == 2
+        assert {record.args.lang for record in stats.hottest(2)} == {"go", "python"}
+
+    def test_forget_rarest(self):
+        stats = AccessStats(max_keys=3, decay=0.5)
+        for lang, count in [("go", 3), ("c", 1), ("python", 2)]:
+            for _ in range(count):
+                stats.record(SearchArgs(created_from=None, lang=lang), end=10)
+        stats.decay()
+        stats.record(SearchArgs(created_from=None, lang="c"), end=10)
+        # Counts after decay: go 1.5, python 1, c 1.5
+        stats.record(SearchArgs(created_from=None, lang="rust"), end=10)
+        assert {record.args.lang for record in stats.hottest(3)} == {"go", "c", "rust"}
+        # Outdated entries of the heap are compacted
+        assert len(stats._heap) <= 2 * len(stats)
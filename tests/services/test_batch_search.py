@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+import pytest
+
+from github_searcher.metrics import metrics
+from github_searcher.schemas.api import BatchSearchSpec
+from github_searcher.services.batch_search import BatchSearcher
+from github_searcher.services.repos_searching import ReposSearchingService
+
+from tests.dataset_github_api_client import DatasetGithubAPIClient, gen_dataset, reference_top
+
+
+class TestBatchSearcher:
+    @pytest.mark.asyncio
+    async def test_search(self):
+        dataset = gen_dataset(500, max_stars=1000)
+        service = ReposSearchingService(api_client=DatasetGithubAPIClient(dataset))
+        searcher = BatchSearcher(service=service)
+        specs = [
+            BatchSearchSpec(language="go", k=10),
+            BatchSearchSpec(language="python", page_id=2),
+            BatchSearchSpec(language="go", k=10),
+        ]
+        duplicates = metrics.counter("batch_search_duplicates")
+
+        results = json.loads(await searcher.search(session=None, specs=specs))
+        assert [[repo["id"] for repo in result["repos"]] for result in results] == [
+            [repo.id for repo in reference_top(dataset, 10, lang="go")],
+            [repo.id for repo in reference_top(dataset, 60, lang="python")[30:]],
+            [repo.id for repo in reference_top(dataset, 10, lang="go")],
+        ]
+        assert metrics.counter("batch_search_duplicates") == duplicates + 1
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        service = ReposSearchingService(api_client=DatasetGithubAPIClient(gen_dataset(100, max_stars=100)))
+        searcher = BatchSearcher(service=service, max_concurrency=2)
+        in_flight = max_in_flight = 0
+        search = service.get_popular_repos_json
+
+        async def get_popular_repos_json(*args, **kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            try:
+                return await search(*args, **kwargs)
+            finally:
+                in_flight -= 1
+
+        service.get_popular_repos_json = get_popular_repos_json
+        specs = [BatchSearchSpec(page_id=page_id) for page_id in range(1, 6)]
+        await asyncio.gather(
+            searcher.search(session=None, specs=specs[:3]),
+            searcher.search(session=None, specs=specs[3:]),
+        )
+        # The limit is shared by batches
+        assert max_in_flight == 2
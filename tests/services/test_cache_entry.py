@@ -0,0 +1,22 @@
+from github_searcher.services.cache_entry import CacheEntry
+from github_searcher.services.response_body import ResponseBody
+
+
+def test_fresh_entry():
+    entry = CacheEntry(value=[], created_at=100, soft_ttl=60)
+    assert not entry.is_stale(now=130)
+    assert entry.age(now=130) == 30
+    assert entry.staleness(now=130) == 0
+
+
+def test_stale_entry():
+    entry = CacheEntry(value=[], created_at=100, soft_ttl=60)
+    assert entry.is_stale(now=190)
+    assert entry.age(now=190) == 90
+    assert entry.staleness(now=190) == 30
+
+
+def test_nbytes():
+    body = ResponseBody.create(content=b"[]", created_at=100, ttl=60)
+    assert CacheEntry(value=body, created_at=100, soft_ttl=60).nbytes == body.nbytes
+    assert getattr(CacheEntry(value=[], created_at=100, soft_ttl=60), "nbytes", None) is None
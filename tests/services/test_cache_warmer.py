@@ -0,0 +1,118 @@
+from http import HTTPStatus
+from unittest.mock import patch
+
+import aiocache
+import asyncio
+import pytest
+
+from github_searcher.clients.github.token_pool import TokenPool
+from github_searcher.metrics import metrics
+from github_searcher.services.access_stats import AccessStats
+from github_searcher.services.cache_warmer import CacheWarmer
+from github_searcher.services.repos_searching import ReposSearchingService
+from github_searcher.services.search_args import SearchArgs
+
+from tests.mocked_github_api_client import MockedGithubAPIClient
+from tests.utils import rate_limit_headers
+
+
+def build_warmer(soft_ttl: float = 60, token_pool: TokenPool | None = None, **kwargs) -> CacheWarmer:
+    access_stats = AccessStats()
+    service = ReposSearchingService(
+        api_client=MockedGithubAPIClient(),
+        cache=aiocache.Cache(),
+        soft_ttl=soft_ttl,
+        access_stats=access_stats,
+    )
+    return CacheWarmer(
+        service=service,
+        access_stats=access_stats,
+        get_session=lambda: None,
+        token_pool=token_pool,
+        **kwargs,
+    )
+
+
+class TestCacheWarmer:
+    @pytest.mark.asyncio
+    async def test_warm_hottest(self):
+        warmer = build_warmer(soft_ttl=60, top_n=1, lead_time=10)
+        service = warmer._service
+        go_args = SearchArgs(created_from=None, lang="go")
+        python_args = SearchArgs(created_from=None, lang="python")
+        for _ in range(3):
+            warmer._access_stats.record(go_args, end=100)
+        warmer._access_stats.record(python_args, end=100)
+
+        assert await warmer.warm_hottest() == 1
+        # Only the hottest filter is warmed
+        misses = metrics.counter("cache_misses")
+        await service.get_top_k_popular_repos(session=None, args=go_args, k=100)
+        assert metrics.counter("cache_misses") == misses
+        await service.get_top_k_popular_repos(session=None, args=python_args, k=100)
+        assert metrics.counter("cache_misses") == misses + 1
+
+        # Fresh entries are not refreshed
+        assert await warmer.warm_hottest() == 0
+
+    @pytest.mark.asyncio
+    async def test_refresh_before_stale(self):
+        warmer = build_warmer(soft_ttl=1, lead_time=0.5)
+        args = SearchArgs(created_from=None, lang="go")
+        await warmer._service.get_top_k_popular_repos(session=None, args=args, k=50)
+
+        assert await warmer.warm_hottest() == 0
+        await asyncio.sleep(0.6)
+        warmups = metrics.counter("cache_warmups")
+        assert await warmer.warm_hottest() == 1
+        assert metrics.counter("cache_warmups") == warmups + 1
+
+        stale_hits = metrics.counter("cache_hits_stale")
+        await asyncio.sleep(0.5)
+        await warmer._service.get_top_k_popular_repos(session=None, args=args, k=50)
+        assert metrics.counter("cache_hits_stale") == stale_hits
+
+    @pytest.mark.asyncio
+    async def test_budget_share(self):
+        token_pool = TokenPool(tokens=["a"])
+        warmer = build_warmer(token_pool=token_pool, budget_share=0.2)
+        for lang in ["go", "python", "rust"]:
+            warmer._access_stats.record(SearchArgs(created_from=None, lang=lang), end=200)
+        deferred = metrics.counter("cache_warmups_deferred")
+
+        # Requests of clients don't use the share of the warmer
+        token_pool.update(token_pool.tokens[0], HTTPStatus.OK, rate_limit_headers(remaining=10, limit=30, reset_in=60))
+        # 6 requests of the window: 2 pages of every filter
+        assert await warmer.warm_hottest() == 3
+        assert warmer._window_requests == 6
+
+        await warmer._service._cache.clear()
+        assert await warmer.warm_hottest() == 0
+        assert metrics.counter("cache_warmups_deferred") == deferred + 1
+
+        # The share is renewed in the next window
+        token_pool.update(token_pool.tokens[0], HTTPStatus.OK, rate_limit_headers(remaining=30, limit=30, reset_in=120))
+        assert await warmer.warm_hottest() == 3
+
+    @pytest.mark.asyncio
+    async def test_warmup_error(self):
+        warmer = build_warmer()
+        warmer._access_stats.record(SearchArgs(created_from=None, lang="go"), end=10)
+        errors = metrics.counter("cache_warmup_errors")
+
+        with patch.object(ReposSearchingService, "warm", side_effect=RuntimeError()):
+            assert await warmer.warm_hottest() == 0
+        assert metrics.counter("cache_warmup_errors") == errors + 1
+
+    @pytest.mark.asyncio
+    async def test_start_and_close(self):
+        warmer = build_warmer(interval=0.05)
+        warmer._access_stats.record(SearchArgs(created_from=None, lang="go"), end=10)
+        warmups = metrics.counter("cache_warmups")
+
+        warmer.start()
+        await asyncio.sleep(0.5)
+        await warmer.close()
+
+        assert metrics.counter("cache_warmups") == warmups + 1
+        assert warmer._task is None
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+
+import pickle
+
+from github_searcher.schemas.github_api import GARepository
+from github_searcher.services.compact_repos import CompactRepos
+
+from tests.dataset_github_api_client import gen_dataset
+from tests.mocked_github_api_client import MockedGithubAPIClient
+
+
+def gen_repos(count: int) -> list[GARepository]:
+    return [
+        GARepository(**MockedGithubAPIClient.gen_repo(stars=count - rank, lang="go"))
+        for rank in range(count)
+    ]
+
+
+class TestCompactRepos:
+    def test_materialize(self):
+        repos = gen_repos(10) + [
+            GARepository(
+                id=1,
+                name="repo",
+                full_name="owner/repo",
+                owner={"login": "owner"},
+                description="Repo",
+                created_at="2020-01-01T10:00:00Z",
+                clone_url="https://github.com/owner/repo.git",
+                stargazers_count=1,
+                watchers_count=2,
+                language=None,
+            ),
+            GARepository(
+                id=2,
+                name="repo",
+                full_name="renamed/repo",
+                owner={"login": "owner"},
+                created_at=datetime(2020, 1, 1, 13, tzinfo=timezone(timedelta(hours=3))),
+                clone_url="https://example.com/repo.git",
+                stargazers_count=0,
+                watchers_count=0,
+            ),
+        ]
+        compact = CompactRepos(repos)
+
+        assert len(compact) == len(repos)
+        assert compact.slice(0, len(repos)) == repos
+        assert compact.slice(5, 7) == repos[5:7]
+        assert compact.slice(10, 100) == repos[10:]
+        assert compact.slice(100, 200) == []
+        # Naive time stays naive, aware time is kept in UTC
+        assert compact.slice(0, 1)[0].created_at.tzinfo is None
+        assert compact.slice(10, 11)[0].created_at == datetime(2020, 1, 1, 10, tzinfo=timezone.utc)
+        assert compact.slice(0, len(repos))[-1].model_dump(by_alias=True)["clone_url"] == "https://example.com/repo.git"
+
+    def test_copy(self):
+        repos = gen_repos(10)
+        compact = CompactRepos(repos[:5])
+        copied = compact.copy()
+        copied.extend(repos[5:])
+
+        assert len(compact) == 5
+        assert copied.slice(0, 10) == repos
+
+    def test_pickle(self):
+        repos = gen_repos(100)
+        compact = CompactRepos(repos)
+
+        unpickled = pickle.loads(pickle.dumps(compact))
+        assert unpickled == compact
+        assert unpickled.slice(0, 100) == repos
+        assert len(pickle.dumps(compact)) < len(pickle.dumps(repos)) / 2
+
+    def test_nbytes(self):
+        compact = CompactRepos(gen_repos(100))
+        half = compact.subset(range(50))
+
+        assert CompactRepos().nbytes == 0
+        assert 0 < half.nbytes < compact.nbytes
+        assert compact.nbytes < len(pickle.dumps(gen_repos(100)))
+
+    def test_select_and_subset(self):
+        repos = gen_dataset(100, max_stars=100)
+        compact = CompactRepos(repos)
+        created_after = datetime(2015, 1, 1, tzinfo=timezone.utc).timestamp()
+
+        ranks = compact.select(created_after=created_after, language="GO")
+        assert ranks == [
+            i for i, repo in enumerate(repos)
+            if repo.created_at.timestamp() >= created_after and repo.language == "Go"
+        ]
+        assert compact.select() == list(range(100))
+        subset = compact.subset(ranks)
+        assert subset.slice(0, len(ranks)) == [repos[i] for i in ranks]
+        assert subset == CompactRepos(repos[i] for i in ranks)
@@ -0,0 +1,130 @@
+from datetime import date, datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from github_searcher.clients.index.sqlite_repos_index import SqliteReposIndex
+from github_searcher.metrics import metrics
+from github_searcher.services.index_crawler import IndexCrawler
+from github_searcher.services.repos_searching import ReposSearchingService
+from github_searcher.services.search_args import SearchArgs
+
+from tests.dataset_github_api_client import DatasetGithubAPIClient, gen_dataset, reference_top
+from tests.mocked_github_api_client import MockedGithubAPIClient
+
+
+def build_crawler(**kwargs) -> IndexCrawler:
+    index = SqliteReposIndex()
+    index.open()
+    service = ReposSearchingService(
+        api_client=MockedGithubAPIClient(),
+        repos_index=index,
+    )
+    return IndexCrawler(
+        service=service,
+        index=index,
+        get_session=lambda: None,
+        **kwargs,
+    )
+
+
+class TestIndexCrawler:
+    def test_scopes(self):
+        crawler = build_crawler(languages=["", "go"], windows_days=[None, 30])
+        assert crawler.scopes(today=date(2024, 2, 1)) == [
+            SearchArgs(created_from=None, lang=None),
+            SearchArgs(created_from=date(2024, 1, 2), lang=None),
+            SearchArgs(created_from=None, lang="go"),
+            SearchArgs(created_from=date(2024, 1, 2), lang="go"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_crawl(self):
+        crawler = build_crawler(languages=["go", "not_existed_lang"], depth=200)
+        assert await crawler.crawl() == 1
+        [watermark] = crawler._index.watermarks()
+        assert watermark.lang == "go"
+        assert watermark.depth == 200
+        assert not watermark.complete
+
+    def test_scopes_in_utc(self):
+        crawler = build_crawler(windows_days=[0])
+        with patch("github_searcher.services.index_crawler.datetime") as mocked_datetime:
+            mocked_datetime.now.return_value = datetime(2024, 2, 1, 23, tzinfo=timezone.utc)
+            [args] = crawler.scopes()
+        mocked_datetime.now.assert_called_once_with(timezone.utc)
+        assert args.created_from == date(2024, 2, 1)
+
+    @pytest.mark.asyncio
+    async def test_crawl_lock(self):
+        crawler = build_crawler(languages=["go"], depth=100)
+        other = IndexCrawler(service=crawler._service, index=crawler._index, get_session=lambda: None)
+
+        skipped = metrics.counter("index_crawls_skipped")
+        assert await crawler.crawl() == 1
+        # Only the worker holding the lock crawls the shared index
+        assert await other.crawl() == 0
+        assert metrics.counter("index_crawls_skipped") == skipped + 1
+
+        await crawler.close()
+        assert await other.crawl() == 1
+
+    @pytest.mark.asyncio
+    async def test_prune_previous_windows(self):
+        crawler = build_crawler(languages=["go"], windows_days=[30], depth=100)
+        # The scope of the window, crawled a day before, is stale
+        crawler._index.replace_scope("go", date(2000, 1, 1), [], complete=True, crawled_at=0)
+
+        pruned = metrics.counter("index_scopes_pruned")
+        await crawler.crawl()
+        [watermark] = crawler._index.watermarks()
+        assert watermark.created_from == crawler.scopes()[0].created_from
+        assert metrics.counter("index_scopes_pruned") == pruned + 1
+
+    @pytest.mark.asyncio
+    async def test_serve_from_index(self):
+        crawler = build_crawler(languages=["go"], depth=200)
+        service = crawler._service
+        args = SearchArgs(created_from=None, lang="go")
+
+        fallbacks = metrics.counter("index_fallbacks")
+        live = await service.get_top_k_popular_repos(session=None, args=args, k=100)
+        assert metrics.counter("index_fallbacks") == fallbacks + 1
+
+        await crawler.crawl()
+        hits = metrics.counter("index_hits")
+        indexed = await service.get_top_k_popular_repos(session=None, args=args, k=100)
+        assert metrics.counter("index_hits") == hits + 1
+        assert [repo.stars for repo in indexed] == [repo.stars for repo in live]
+
+        body = await service.get_popular_repos_json(session=None, args=SearchArgs(created_from=None, lang="go", page_id=2))
+        assert metrics.counter("index_hits") == hits + 2
+        assert body.max_age() == 0
+
+        # Ranks, which are not crawled, are requested from GithubAPI
+        repos = await service.get_top_k_popular_repos(session=None, args=args, k=300)
+        assert len(repos) == 300
+        assert metrics.counter("index_fallbacks") == fallbacks + 2
+
+    @pytest.mark.asyncio
+    async def test_crawl_up_to_search_results_limit(self):
+        # The crawl of the first 1000 results doesn't hold all results, so narrower windows fall back to GithubAPI.
+        dataset = gen_dataset(5000, max_stars=100000)
+        index = SqliteReposIndex()
+        index.open()
+        service = ReposSearchingService(api_client=DatasetGithubAPIClient(dataset), repos_index=index)
+        crawler = IndexCrawler(service=service, index=index, get_session=lambda: None, depth=1000)
+        await crawler.crawl()
+        [watermark] = index.watermarks()
+        assert watermark.depth == 1000
+        assert not watermark.complete
+
+        created_from = date(2020, 6, 1)
+        fallbacks = metrics.counter("index_fallbacks")
+        repos = await service.get_top_k_popular_repos(
+            session=None,
+            args=SearchArgs(created_from=created_from, lang=None),
+            k=100,
+        )
+        assert metrics.counter("index_fallbacks") == fallbacks + 1
+        assert [repo.id for repo in repos] == [repo.id for repo in reference_top(dataset, 100, created_from=created_from)]
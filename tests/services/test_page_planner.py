@@ -0,0 +1,26 @@
+import pytest
+
+from github_searcher.services.page_planner import plan_pages
+
+
+@pytest.mark.parametrize("start, end, page_ids, offset, count", [
+    (0, 10, [1], 0, 10),
+    (0, 100, [1], 0, 100),
+    (0, 101, [1, 2], 0, 101),
+    (90, 120, [1, 2], 90, 30),
+    (120, 150, [2], 20, 30),
+    (990, 1020, [10], 90, 10),
+    (0, 5000, list(range(1, 11)), 0, 1000),
+])
+def test_plan_pages(start, end, page_ids, offset, count):
+    plan = plan_pages(start=start, end=end)
+    assert list(plan.page_ids) == page_ids
+    assert plan.per_page == 100
+    assert plan.offset == offset
+    assert plan.count == count
+
+
+@pytest.mark.parametrize("start, end", [(10, 10), (-1, 10), (1000, 1030)])
+def test_plan_pages_invalid_range(start, end):
+    with pytest.raises(ValueError):
+        plan_pages(start=start, end=end)
@@ -2,11 +2,24 @@ from datetime import date, timedelta
 from unittest.mock import patch
 
 import asyncio
+import time
 import aiocache
+import json
 import pytest
 
+from github_searcher.clients.cache.bounded_memory_cache import BoundedMemoryCache
+from github_searcher.schemas.github_api import GARepository
+from github_searcher.metrics import metrics
+from github_searcher.services.cache_entry import CacheEntry
+from github_searcher.services.compact_repos import CompactRepos
+from github_searcher.services.ranked_prefix import RankedPrefix
+from github_searcher.clients.github.circuit_breaker import CircuitBreaker
+from github_searcher.clients.github.search_repos_page import PageValidators
+from github_searcher.clients.github.token_pool import TokenPool
+from github_searcher.services.repos_json_encoder import ReposJsonEncoder
 from github_searcher.services.repos_searching import ReposSearchingService
 from github_searcher.services.search_args import SearchArgs
+from github_searcher.services.search_args_canonicalizer import SearchArgsCanonicalizer
 from github_searcher.exceptions import (
     GithubApiRateLimitException,
     NotExistedLanguageException,
@@ -14,6 +27,7 @@ from github_searcher.exceptions import (
 )
 
 
+from tests.dataset_github_api_client import DatasetGithubAPIClient, gen_dataset, reference_top
 from tests.mocked_github_api_client import MockedGithubAPIClient
 from tests.utils import (
     check_sorted_pages,
@@ -196,7 +210,17 @@ class TestReposService:
             page_id=0,
         )
 
-        if not page_cached:
+        if page_cached:
+            get_from_cache.return_value = CacheEntry.create(
+                value=RankedPrefix(
+                    repos=CompactRepos(
+                        GARepository(**MockedGithubAPIClient.gen_repo(stars=100, lang=lang))
+                        for _ in range(100)
+                    ),
+                ),
+                soft_ttl=60,
+            )
+        else:
             get_from_cache.return_value = None
 
         page = await service.get_popular_repos(
@@ -205,11 +229,706 @@ class TestReposService:
         )
 
         if use_cache:
-            get_from_cache.assert_called_once_with(args)
             if page_cached:
+                get_from_cache.assert_called_once_with(args)
                 set_to_cache.assert_not_called()
             else:
-                set_to_cache.assert_called_once_with(args, page)
+                # Missed filter is looked up first, then broader filters, which could answer it
+                assert [call.args[0].filter_key for call in get_from_cache.call_args_list] == [
+                    args.filter_key,
+                    *(broader.filter_key for broader in ReposSearchingService._broader_filters(args)),
+                ]
+                # The first page is a slice of the ranked prefix, filled by the upstream page of the max size
+                set_to_cache.assert_called_once()
+                cached_args, cached_entry = set_to_cache.call_args.args
+                assert cached_args == args
+                assert len(cached_entry.value) == 100
+                assert cached_entry.value.slice(0, len(page)) == page
         else:
             get_from_cache.assert_not_called()
             set_to_cache.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_service_with_bounded_memory_cache(self):
+        # The empty cache is falsy (it has __len__), but it's used
+        client = MockedGithubAPIClient()
+        service = ReposSearchingService(
+            api_client=client,
+            cache=BoundedMemoryCache(),
+        )
+        args = SearchArgs(created_from=None, lang="go")
+
+        with patch.object(client, "search_repos", side_effect=client.search_repos) as mocked_search:
+            page = await service.get_popular_repos(session=None, args=args)
+            assert await service.get_popular_repos(session=None, args=args) == page
+            assert mocked_search.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_get_top_k_repos_does_not_change_args(self):
+        args = SearchArgs(created_from=None, lang=None)
+        await self._service.get_top_k_popular_repos(
+            session=None,
+            k=100,
+            args=args,
+        )
+        assert args == SearchArgs(created_from=None, lang=None)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("max_concurrent_pages", [1, 2, 4])
+    async def test_get_top_k_repos_concurrency(self, max_concurrent_pages):
+        client = MockedGithubAPIClient()
+        service = ReposSearchingService(
+            api_client=client,
+            max_concurrent_pages=max_concurrent_pages,
+        )
+        in_flight = 0
+        max_in_flight = 0
+        search_repos = client.search_repos
+
+        async def tracked_search_repos(*args, **kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            try:
+                return await search_repos(*args, **kwargs)
+            finally:
+                in_flight -= 1
+
+        with patch.object(client, "search_repos", side_effect=tracked_search_repos):
+            top_k = await service.get_top_k_popular_repos(
+                session=None,
+                k=1000,
+                args=SearchArgs(created_from=None, lang=None),
+            )
+
+        assert len(top_k) == 1000
+        check_order(top_k)
+        assert max_in_flight == max_concurrent_pages
+
+    @pytest.mark.asyncio
+    async def test_get_top_k_repos_stops_on_short_page(self):
+        client = MockedGithubAPIClient()
+        service = ReposSearchingService(
+            api_client=client,
+            max_concurrent_pages=1,
+        )
+        search_repos = client.search_repos
+        requested_pages = []
+
+        async def short_second_page(*args, page_id=None, **kwargs):
+            requested_pages.append(page_id)
+            page = await search_repos(*args, page_id=page_id, **kwargs)
+            return page[:5] if page_id == 2 else page
+
+        with patch.object(client, "search_repos", side_effect=short_second_page):
+            top_k = await service.get_top_k_popular_repos(
+                session=None,
+                k=300,
+                args=SearchArgs(created_from=None, lang=None),
+            )
+
+        assert len(top_k) == 100 + 5
+        assert requested_pages == [1, 2]
+
+    @pytest.mark.asyncio
+    @patch.object(MockedGithubAPIClient, "search_repos")
+    async def test_get_top_k_repos_rate_limit(self, mocked_search):
+        async def raise_rate_limit_on_second_page(*args, page_id=None, per_page=None, **kwargs):
+            if page_id == 2:
+                raise GithubApiRateLimitException()
+            return [
+                GARepository(**MockedGithubAPIClient.gen_repo(stars=100))
+                for _ in range(per_page)
+            ]
+
+        mocked_search.side_effect = raise_rate_limit_on_second_page
+        with pytest.raises(GithubApiRateLimitException):
+            await self._service.get_top_k_popular_repos(
+                session=None,
+                k=200,
+                args=SearchArgs(created_from=None, lang=None),
+            )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("k, pages_count", [(10, 1), (50, 1), (100, 1), (101, 2), (250, 3), (1000, 10)])
+    @patch.object(MockedGithubAPIClient, "search_repos")
+    async def test_get_top_k_repos_pages_count(self, mocked_search, k, pages_count):
+        async def search_repos(*args, per_page=None, **kwargs):
+            return [
+                GARepository(**MockedGithubAPIClient.gen_repo(stars=100))
+                for _ in range(per_page)
+            ]
+
+        mocked_search.side_effect = search_repos
+        top_k = await self._service.get_top_k_popular_repos(
+            session=None,
+            k=k,
+            args=SearchArgs(created_from=None, lang=None),
+        )
+        assert len(top_k) == k
+        assert mocked_search.call_count == pages_count
+        for call in mocked_search.call_args_list:
+            assert call.kwargs["per_page"] == 100
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("page_id", [1, 3, 4, 34])
+    async def test_get_popular_repos_pages_mapping(self, page_id):
+        top_k = await self._service.get_top_k_popular_repos(
+            session=None,
+            k=1000,
+            args=SearchArgs(created_from=None, lang=None),
+        )
+        page = await self._service.get_popular_repos(
+            session=None,
+            args=SearchArgs(created_from=None, lang=None, page_id=page_id),
+        )
+        page_size = ReposSearchingService.PAGE_SIZE
+        assert [r.stars for r in page] == [
+            r.stars for r in top_k[(page_id - 1) * page_size:page_id * page_size]
+        ]
+
+    @pytest.mark.asyncio
+    async def test_coalesce_concurrent_searches(self):
+        client = MockedGithubAPIClient()
+        service = ReposSearchingService(
+            api_client=client,
+            cache=aiocache.Cache(),
+        )
+        args = SearchArgs(created_from=None, lang=None)
+
+        with patch.object(client, "search_repos", side_effect=client.search_repos) as mocked_search:
+            pages = await asyncio.gather(*[
+                service.get_popular_repos(session=None, args=args)
+                for _ in range(10)
+            ])
+
+        assert mocked_search.call_count == 1
+        assert all(page == pages[0] for page in pages)
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self):
+        client = MockedGithubAPIClient()
+        service = ReposSearchingService(
+            api_client=client,
+            cache=aiocache.Cache(),
+            soft_ttl=0.2,
+            hard_ttl=10,
+        )
+        args = SearchArgs(created_from=None, lang=None)
+        stale_hits = metrics.counter("cache_hits_stale")
+        refreshes = metrics.counter("cache_background_refreshes")
+
+        with patch.object(client, "search_repos", side_effect=client.search_repos) as mocked_search:
+            page = await service.get_popular_repos(session=None, args=args)
+            assert mocked_search.call_count == 1
+
+            # Fresh entry is served from cache without refresh
+            assert await service.get_popular_repos(session=None, args=args) == page
+            assert mocked_search.call_count == 1
+
+            # Stale entry is served immediately, and only one refresh is started
+            await asyncio.sleep(0.3)
+            stale_pages = await asyncio.gather(*[
+                service.get_popular_repos(session=None, args=args)
+                for _ in range(5)
+            ])
+            assert all(stale_page == page for stale_page in stale_pages)
+            assert metrics.counter("cache_hits_stale") == stale_hits + 5
+            await asyncio.gather(*service._background_tasks)
+            # Not modified page is revalidated without downloading
+            assert mocked_search.call_count == 1
+            assert metrics.counter("cache_background_refreshes") == refreshes + 1
+
+            # Refreshed entry is fresh again
+            await service.get_popular_repos(session=None, args=args)
+            assert not service._background_tasks
+            assert metrics.counter("cache_background_refreshes") == refreshes + 1
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_background_refresh(self):
+        client = MockedGithubAPIClient()
+        service = ReposSearchingService(
+            api_client=client,
+            cache=aiocache.Cache(),
+            soft_ttl=0,
+        )
+        args = SearchArgs(created_from=None, lang=None)
+        await service.get_popular_repos(session=None, args=args)
+
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        with patch.object(client, "search_repos_page", side_effect=hang):
+            await service.get_popular_repos(session=None, args=args)
+            tasks = list(service._background_tasks)
+            assert tasks and service._refreshing
+
+            await service.close()
+
+        assert all(task.cancelled() for task in tasks)
+        assert not service._background_tasks
+        assert not service._refreshing
+        assert not len(service._single_flight)
+
+    @pytest.mark.asyncio
+    async def test_defer_refresh_near_rate_limit(self):
+        client = MockedGithubAPIClient()
+        token_pool = TokenPool(tokens=["token"], background_reserve=3)
+        service = ReposSearchingService(
+            api_client=client,
+            cache=aiocache.Cache(),
+            soft_ttl=0,
+            token_pool=token_pool,
+        )
+        args = SearchArgs(created_from=None, lang=None)
+        deferred = metrics.counter("cache_background_refreshes_deferred")
+        page = await service.get_popular_repos(session=None, args=args)
+
+        token_pool.tokens[0].budget.update({
+            "X-RateLimit-Remaining": "3",
+            "X-RateLimit-Reset": str(int(time.time() + 60)),
+        })
+        with patch.object(client, "search_repos_page") as mocked_page:
+            # Stale entry is served from cache without refresh
+            assert await service.get_popular_repos(session=None, args=args) == page
+            assert not service._background_tasks
+            mocked_page.assert_not_called()
+        assert metrics.counter("cache_background_refreshes_deferred") == deferred + 1
+
+    @pytest.mark.asyncio
+    async def test_defer_refresh_while_github_unavailable(self):
+        client = MockedGithubAPIClient()
+        circuit_breaker = CircuitBreaker(failure_threshold=1)
+        service = ReposSearchingService(
+            api_client=client,
+            cache=aiocache.Cache(),
+            soft_ttl=0,
+            circuit_breaker=circuit_breaker,
+        )
+        args = SearchArgs(created_from=None, lang=None)
+        deferred = metrics.counter("cache_background_refreshes_deferred")
+        page = await service.get_popular_repos(session=None, args=args)
+
+        circuit_breaker.on_failure()
+        with patch.object(client, "search_repos_page") as mocked_page:
+            # Stale entry is served from cache without refresh
+            assert await service.get_popular_repos(session=None, args=args) == page
+            assert not service._background_tasks
+            mocked_page.assert_not_called()
+        assert metrics.counter("cache_background_refreshes_deferred") == deferred + 1
+
+    @pytest.mark.asyncio
+    async def test_background_refresh_error(self):
+        client = MockedGithubAPIClient()
+        service = ReposSearchingService(
+            api_client=client,
+            cache=aiocache.Cache(),
+            soft_ttl=0,
+            hard_ttl=10,
+        )
+        args = SearchArgs(created_from=None, lang=None)
+        page = await service.get_popular_repos(session=None, args=args)
+        errors = metrics.counter("cache_background_refresh_errors")
+
+        async def raise_rate_limit(*args, **kwargs):
+            raise GithubApiRateLimitException()
+
+        with patch.object(client, "search_repos_page", side_effect=raise_rate_limit):
+            assert await service.get_popular_repos(session=None, args=args) == page
+            await asyncio.gather(*service._background_tasks)
+
+        assert metrics.counter("cache_background_refresh_errors") == errors + 1
+
+    @pytest.mark.asyncio
+    async def test_ranked_prefix_serves_all_endpoints(self):
+        client = MockedGithubAPIClient()
+        service = ReposSearchingService(
+            api_client=client,
+            cache=aiocache.Cache(),
+        )
+        args = SearchArgs(created_from=None, lang="go")
+
+        with patch.object(client, "search_repos", side_effect=client.search_repos) as mocked_search:
+            top_100 = await service.get_top_k_popular_repos(session=None, args=args, k=100)
+            top_10 = await service.get_top_k_popular_repos(session=None, args=args, k=10)
+            top_50 = await service.get_top_k_popular_repos(session=None, args=args, k=50)
+            pages = [
+                await service.get_popular_repos(
+                    session=None,
+                    args=SearchArgs(created_from=None, lang="go", page_id=page_id),
+                )
+                for page_id in (1, 2, 3)
+            ]
+
+        assert mocked_search.call_count == 1
+        assert top_10 == top_100[:10]
+        assert top_50 == top_100[:50]
+        assert pages[0] + pages[1] + pages[2] == top_100[:90]
+
+    @pytest.mark.asyncio
+    async def test_ranked_prefix_extended_lazily(self):
+        client = MockedGithubAPIClient()
+        service = ReposSearchingService(
+            api_client=client,
+            cache=aiocache.Cache(),
+        )
+        args = SearchArgs(created_from=None, lang="c")
+
+        with patch.object(client, "search_repos", side_effect=client.search_repos) as mocked_search:
+            top_100 = await service.get_top_k_popular_repos(session=None, args=args, k=100)
+            top_250 = await service.get_top_k_popular_repos(session=None, args=args, k=250)
+            page_4 = await service.get_popular_repos(
+                session=None,
+                args=SearchArgs(created_from=None, lang="c", page_id=4),
+            )
+
+        assert [call.kwargs["page_id"] for call in mocked_search.call_args_list] == [1, 2, 3]
+        assert top_250[:100] == top_100
+        check_order(top_250)
+        assert page_4 == top_250[90:120]
+
+    @pytest.mark.asyncio
+    async def test_reuse_json_body(self):
+        service = ReposSearchingService(
+            api_client=MockedGithubAPIClient(),
+            cache=aiocache.Cache(),
+        )
+        args = SearchArgs(created_from=None, lang="go")
+        top_10 = await service.get_top_k_popular_repos(session=None, args=args, k=10)
+
+        body = await service.get_top_k_popular_repos_json(session=None, args=args, k=10)
+        assert [GARepository(**r) for r in json.loads(body.content)] == top_10
+
+        with patch.object(ReposJsonEncoder, "encode") as mocked_encode:
+            assert await service.get_top_k_popular_repos_json(session=None, args=args, k=10) is body
+            mocked_encode.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_json_body_etag_and_max_age(self):
+        service = ReposSearchingService(
+            api_client=MockedGithubAPIClient(),
+            cache=aiocache.Cache(),
+            soft_ttl=60,
+        )
+        args = SearchArgs(created_from=None, lang="go")
+        with patch("random.randint", return_value=1):
+            top_10 = await service.get_top_k_popular_repos_json(session=None, args=args, k=10)
+            top_50 = await service.get_top_k_popular_repos_json(session=None, args=args, k=50)
+
+        assert top_10.etag != top_50.etag
+        assert top_10.expires_at == top_50.expires_at == top_10.created_at + 60
+        assert 0 < top_10.max_age() <= 60
+        assert top_10.max_age(now=top_10.created_at + 100) == 0
+
+        service_without_cache = ReposSearchingService(
+            api_client=MockedGithubAPIClient(),
+            cache=None,
+        )
+        with patch("random.randint", return_value=1):
+            body = await service_without_cache.get_top_k_popular_repos_json(session=None, args=args, k=10)
+        # The same data has the same tag
+        assert body.etag == top_10.etag
+        assert body.max_age() == 0
+
+    @pytest.mark.asyncio
+    async def test_revalidate_stale_prefix(self):
+        client = MockedGithubAPIClient()
+        service = ReposSearchingService(
+            api_client=client,
+            cache=aiocache.Cache(),
+            soft_ttl=0.1,
+        )
+        args = SearchArgs(created_from=None, lang="go")
+        top_250 = await service.get_top_k_popular_repos(session=None, args=args, k=250)
+        await asyncio.sleep(0.2)
+
+        not_modified = metrics.counter("github_pages_not_modified")
+        with patch.object(client, "search_repos_page", side_effect=client.search_repos_page) as mocked_page:
+            # The stale prefix doesn't cover the request, it's rebuilt with revalidation of known pages
+            top_400 = await service.get_top_k_popular_repos(session=None, args=args, k=400)
+
+        assert [call.kwargs["validators"] for call in mocked_page.call_args_list] == [
+            PageValidators(etag=MockedGithubAPIClient.page_etag(page_id, None, "go", 100))
+            for page_id in (1, 2, 3)
+        ] + [None]
+        assert metrics.counter("github_pages_not_modified") == not_modified + 3
+        # Not modified pages are reused as is
+        assert top_400[:250] == top_250
+        check_order(top_400)
+
+    @pytest.mark.asyncio
+    async def test_revalidate_modified_page(self):
+        client = MockedGithubAPIClient()
+        service = ReposSearchingService(
+            api_client=client,
+            cache=aiocache.Cache(),
+            soft_ttl=0,
+        )
+        args = SearchArgs(created_from=None, lang="go")
+        await service.get_top_k_popular_repos(session=None, args=args, k=100)
+
+        with patch.object(MockedGithubAPIClient, "page_etag", return_value='"modified"'):
+            with patch.object(client, "search_repos", side_effect=client.search_repos) as mocked_search:
+                await service.get_top_k_popular_repos(session=None, args=args, k=100)
+                await asyncio.gather(*service._background_tasks)
+
+        assert mocked_search.call_count == 1
+        entry = await service._get_from_cache(args)
+        assert entry.value.validators == [PageValidators(etag='"modified"')]
+
+
+class TestCanonicalSearchArgs:
+    @pytest.mark.asyncio
+    async def test_share_cache(self):
+        client = DatasetGithubAPIClient(gen_dataset(500, max_stars=1000))
+        service = ReposSearchingService(
+            api_client=client,
+            cache=aiocache.Cache(),
+            canonicalizer=SearchArgsCanonicalizer(),
+        )
+        hits = metrics.counter("search_args_lang_alias_cache_hits")
+        go = await service.get_popular_repos(session=None, args=SearchArgs(created_from=None, lang="go"))
+        for lang in ("Go", "GO", "golang"):
+            assert await service.get_popular_repos(
+                session=None,
+                args=SearchArgs(created_from=None, lang=lang, page_id=None),
+            ) == go
+        assert client.requests == 1
+        assert metrics.counter("search_args_lang_alias_cache_hits") == hits + 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("created_from", [date(2015, 3, 18), date(2019, 12, 30), date(2020, 11, 2)])
+    async def test_bucketed_created_from(self, created_from):
+        dataset = gen_dataset(3000, max_stars=3000)
+        client = DatasetGithubAPIClient(dataset)
+        service = ReposSearchingService(
+            api_client=client,
+            cache=aiocache.Cache(),
+            canonicalizer=SearchArgsCanonicalizer(created_from_granularity="month"),
+        )
+        args = SearchArgs(created_from=created_from, lang=None)
+        repos = await service.get_top_k_popular_repos(session=None, args=args, k=100)
+        assert [repo.id for repo in repos] == [repo.id for repo in reference_top(dataset, 100, created_from=created_from)]
+
+        # Other dates of the same month are answered by the cached prefix of the month
+        requests = client.requests
+        next_day = created_from + timedelta(days=1)
+        repos = await service.get_top_k_popular_repos(
+            session=None,
+            args=SearchArgs(created_from=next_day, lang=None),
+            k=50,
+        )
+        assert [repo.id for repo in repos] == [repo.id for repo in reference_top(dataset, 50, created_from=next_day)]
+        assert client.requests == requests
+
+        body = await service.get_popular_repos_json(session=None, args=SearchArgs(created_from=created_from, lang=None))
+        assert [repo["id"] for repo in json.loads(body.content)] == [repo.id for repo in reference_top(dataset, 30, created_from=created_from)]
+
+
+class TestBroaderFilters:
+    @staticmethod
+    async def build_service(dataset, k: int = 1000) -> tuple[ReposSearchingService, DatasetGithubAPIClient]:
+        client = DatasetGithubAPIClient(dataset)
+        service = ReposSearchingService(api_client=client, cache=aiocache.Cache())
+        await service.get_top_k_popular_repos(session=None, args=SearchArgs(created_from=None, lang=None), k=k)
+        return service, client
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("created_from, lang, k", [
+        (None, "go", 100),
+        (None, "Python", 300),
+        (date(2016, 1, 1), None, 100),
+        (date(2016, 1, 1), "go", 50),
+    ])
+    async def test_answer_by_broader_filter(self, created_from, lang, k):
+        dataset = gen_dataset(3000, max_stars=3000)
+        service, client = await self.build_service(dataset)
+        requests = client.requests
+        avoided = metrics.counter("github_requests_avoided")
+
+        args = SearchArgs(created_from=created_from, lang=lang)
+        repos = await service.get_top_k_popular_repos(session=None, args=args, k=k)
+        assert [repo.id for repo in repos] == [repo.id for repo in reference_top(dataset, k, created_from, lang)]
+        assert client.requests == requests
+        # One upstream page of 100 repos is avoided for every 100 repos of the search
+        assert metrics.counter("github_requests_avoided") == avoided + (k + 99) // 100
+
+    @pytest.mark.asyncio
+    async def test_broader_filter_is_not_enough(self):
+        dataset = gen_dataset(3000, max_stars=3000)
+        service, client = await self.build_service(dataset, k=100)
+        requests = client.requests
+
+        args = SearchArgs(created_from=date(2019, 1, 1), lang="go")
+        repos = await service.get_top_k_popular_repos(session=None, args=args, k=100)
+        assert [repo.id for repo in repos] == [repo.id for repo in reference_top(dataset, 100, args.created_from, args.lang)]
+        assert client.requests == requests + 1
+
+    @pytest.mark.asyncio
+    async def test_exhausted_broader_filter(self):
+        # The broader prefix holds all results, so any number of repos of the search is proven
+        dataset = gen_dataset(300, max_stars=3000)
+        service, client = await self.build_service(dataset)
+        requests = client.requests
+
+        repos = await service.get_top_k_popular_repos(session=None, args=SearchArgs(created_from=None, lang="go"), k=1000)
+        assert [repo.id for repo in repos] == [repo.id for repo in reference_top(dataset, 1000, lang="go")]
+        assert client.requests == requests
+
+
+class TestStreamTopK:
+    @staticmethod
+    async def collect(service: ReposSearchingService, args: SearchArgs, k: int) -> list[list[GARepository]]:
+        return [chunk async for chunk in service.stream_top_k_popular_repos(session=None, args=args, k=k)]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_cache", [False, True])
+    @pytest.mark.parametrize("lang", [None, "go"])
+    async def test_stream_by_pages(self, use_cache, lang):
+        dataset = gen_dataset(2000, max_stars=10000)
+        service = ReposSearchingService(
+            api_client=DatasetGithubAPIClient(dataset),
+            cache=aiocache.SimpleMemoryCache() if use_cache else None,
+        )
+        args = SearchArgs(created_from=None, lang=lang)
+
+        chunks = await self.collect(service, args, k=250)
+        # Every upstream page is sent as soon as it's received
+        assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+        assert [repo.id for chunk in chunks for repo in chunk] == \
+            [repo.id for repo in reference_top(dataset, 250, lang=lang)]
+
+    @pytest.mark.asyncio
+    async def test_stream_fills_cache(self):
+        dataset = gen_dataset(500, max_stars=10000)
+        api_client = DatasetGithubAPIClient(dataset)
+        service = ReposSearchingService(api_client=api_client, cache=aiocache.SimpleMemoryCache())
+        args = SearchArgs(created_from=None, lang=None)
+
+        streamed = await self.collect(service, args, k=200)
+        assert api_client.requests == 2
+        # The streamed prefix is cached, deeper streams extend it
+        top = await service.get_top_k_popular_repos(session=None, args=args, k=200)
+        assert [repo.id for repo in top] == [repo.id for chunk in streamed for repo in chunk]
+        chunks = await self.collect(service, args, k=300)
+        assert [len(chunk) for chunk in chunks] == [100, 100, 100]
+        assert api_client.requests == 3
+
+    @pytest.mark.asyncio
+    async def test_stream_short_results(self):
+        dataset = gen_dataset(150, max_stars=10000)
+        service = ReposSearchingService(api_client=DatasetGithubAPIClient(dataset))
+
+        chunks = await self.collect(service, SearchArgs(created_from=None, lang=None), k=1000)
+        assert [len(chunk) for chunk in chunks] == [100, 50]
+
+    @pytest.mark.asyncio
+    async def test_stream_not_existed_lang(self):
+        service = ReposSearchingService(api_client=MockedGithubAPIClient())
+        with pytest.raises(NotExistedLanguageException):
+            await self.collect(service, SearchArgs(created_from=None, lang="notexistedlang"), k=100)
+
+    @pytest.mark.asyncio
+    async def test_cancel_remaining_pages(self):
+        api_client = DatasetGithubAPIClient(gen_dataset(1000, max_stars=10000))
+        search = api_client.search_repos_page
+        started = []
+        cancelled = []
+
+        async def slow_search_repos_page(*args, page_id=None, **kwargs):
+            if page_id == 1:
+                return await search(*args, page_id=page_id, **kwargs)
+            started.append(page_id)
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(page_id)
+                raise
+
+        api_client.search_repos_page = slow_search_repos_page
+        service = ReposSearchingService(api_client=api_client, max_concurrent_pages=4)
+        pages_cancelled = metrics.counter("github_pages_cancelled")
+
+        chunks = service.stream_top_k_popular_repos(session=None, args=SearchArgs(created_from=None, lang=None), k=500)
+        first = await anext(chunks)
+        assert len(first) == 100
+        # The client is disconnected after the first page
+        await chunks.aclose()
+
+        assert sorted(cancelled) == sorted(started)
+        assert metrics.counter("github_pages_cancelled") == pages_cancelled + 4
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("stream_first", [True, False])
+    @pytest.mark.parametrize("use_cache", [False, True])
+    async def test_stream_and_request_share_fill(self, stream_first, use_cache):
+        dataset = gen_dataset(1000, max_stars=10000)
+        api_client = DatasetGithubAPIClient(dataset)
+        search = api_client.search_repos_page
+        requested_pages = []
+
+        async def slow_search_repos_page(*args, page_id=None, **kwargs):
+            requested_pages.append(page_id)
+            await asyncio.sleep(0.05)
+            return await search(*args, page_id=page_id, **kwargs)
+
+        api_client.search_repos_page = slow_search_repos_page
+        service = ReposSearchingService(
+            api_client=api_client,
+            cache=aiocache.SimpleMemoryCache() if use_cache else None,
+            max_concurrent_pages=1,
+        )
+        args = SearchArgs(created_from=None, lang=None)
+
+        async def request():
+            if stream_first:
+                await asyncio.sleep(0.01)
+            return await service.get_top_k_popular_repos(session=None, args=args, k=300)
+
+        async def stream():
+            if not stream_first:
+                await asyncio.sleep(0.01)
+            return await self.collect(service, args, k=300)
+
+        top, chunks = await asyncio.gather(request(), stream())
+        # Every upstream page is requested once, and the stream gets pages as they arrive
+        assert sorted(requested_pages) == [1, 2, 3]
+        reference = [repo.id for repo in reference_top(dataset, 300)]
+        assert [repo.id for repo in top] == reference
+        assert [repo.id for chunk in chunks for repo in chunk] == reference
+        if stream_first:
+            assert [len(chunk) for chunk in chunks] == [100, 100, 100]
+
+    @pytest.mark.asyncio
+    async def test_abandoned_stream_fill_is_kept_for_others(self):
+        api_client = DatasetGithubAPIClient(gen_dataset(1000, max_stars=10000))
+        search = api_client.search_repos_page
+
+        async def slow_search_repos_page(*args, **kwargs):
+            await asyncio.sleep(0.05)
+            return await search(*args, **kwargs)
+
+        api_client.search_repos_page = slow_search_repos_page
+        service = ReposSearchingService(api_client=api_client, max_concurrent_pages=1)
+        args = SearchArgs(created_from=None, lang=None)
+
+        chunks = service.stream_top_k_popular_repos(session=None, args=args, k=300)
+        assert len(await anext(chunks)) == 100
+        request = asyncio.create_task(service.get_top_k_popular_repos(session=None, args=args, k=300))
+        await asyncio.sleep(0.01)
+        # The client of the stream is disconnected, but the fill is awaited by the request
+        await chunks.aclose()
+
+        assert len(await request) == 300
+        assert api_client.requests == 3
+
+    @pytest.mark.asyncio
+    async def test_stream_ndjson(self):
+        service = ReposSearchingService(api_client=DatasetGithubAPIClient(gen_dataset(300, max_stars=10000)))
+        args = SearchArgs(created_from=None, lang=None)
+
+        content = b"".join([
+            chunk async for chunk in service.stream_top_k_popular_repos_ndjson(session=None, args=args, k=150)
+        ])
+        body = await service.get_top_k_popular_repos_json(session=None, args=args, k=150)
+        assert [json.loads(line) for line in content.splitlines()] == json.loads(body.content)
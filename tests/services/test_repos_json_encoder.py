@@ -0,0 +1,51 @@
+from fastapi.encoders import jsonable_encoder
+from unittest.mock import patch
+
+import json
+import pytest
+import sys
+
+from github_searcher.schemas.github_api import GARepository
+from github_searcher.services.repos_json_encoder import ReposJsonEncoder
+
+from tests.mocked_github_api_client import MockedGithubAPIClient
+
+
+@pytest.mark.parametrize("backend", ["pydantic", "orjson"])
+def test_encode_as_response_model(backend):
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    repos = [
+        GARepository(**MockedGithubAPIClient.gen_repo(stars=stars))
+        for stars in range(10)
+    ]
+    encoded = ReposJsonEncoder(backend=backend).encode(repos)
+
+    assert isinstance(encoded, bytes)
+    # The same JSON, as FastAPI produces for response_model=list[GARepository]
+    assert json.loads(encoded) == jsonable_encoder(repos, by_alias=True)
+
+
+@pytest.mark.parametrize("backend", ["pydantic", "orjson"])
+def test_encode_lines(backend):
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    repos = [
+        GARepository(**MockedGithubAPIClient.gen_repo(stars=stars))
+        for stars in range(10)
+    ]
+    encoded = ReposJsonEncoder(backend=backend).encode_lines(repos)
+
+    assert encoded.endswith(b"\n")
+    assert [json.loads(line) for line in encoded.splitlines()] == jsonable_encoder(repos, by_alias=True)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        ReposJsonEncoder(backend="unknown")
+
+
+def test_orjson_is_not_installed():
+    with patch.dict(sys.modules, {"orjson": None}):
+        with pytest.raises(RuntimeError, match="orjson"):
+            ReposJsonEncoder(backend="orjson")
@@ -0,0 +1,49 @@
+from datetime import date
+
+import pytest
+
+from github_searcher.services.search_args import SearchArgs
+from github_searcher.services.search_args_canonicalizer import SearchArgsCanonicalizer
+
+
+class TestSearchArgsCanonicalizer:
+    @pytest.mark.parametrize("lang, canonical, rules", [
+        ("python", "python", ()),
+        ("Python", "python", ("lang_case",)),
+        (" PYTHON ", "python", ("lang_case",)),
+        ("golang", "go", ("lang_alias",)),
+        ("GoLang", "go", ("lang_case", "lang_alias")),
+        ("CPP", "c++", ("lang_case", "lang_alias")),
+        (None, None, ()),
+    ])
+    def test_language(self, lang, canonical, rules):
+        args = SearchArgsCanonicalizer().canonicalize(SearchArgs(created_from=None, lang=lang))
+        assert args.lang == canonical
+        assert args.normalized_by == rules
+
+    def test_custom_aliases(self):
+        canonicalizer = SearchArgsCanonicalizer(language_aliases={"Golang2": "Go"})
+        assert canonicalizer.canonicalize(SearchArgs(created_from=None, lang="golang2")).lang == "go"
+
+    def test_same_filter(self):
+        canonicalizer = SearchArgsCanonicalizer()
+        keys = {
+            canonicalizer.canonicalize(SearchArgs(created_from=None, lang=lang, page_id=page_id)).filter_key
+            for lang in ("python", "Python", "PYTHON", "py")
+            for page_id in (None, 1)
+        }
+        assert len(keys) == 1
+
+    @pytest.mark.parametrize("granularity, bucket", [
+        ("day", date(2024, 5, 16)),
+        ("week", date(2024, 5, 13)),
+        ("month", date(2024, 5, 1)),
+    ])
+    def test_bucket(self, granularity, bucket):
+        canonicalizer = SearchArgsCanonicalizer(created_from_granularity=granularity)
+        assert canonicalizer.bucket(date(2024, 5, 16)) == bucket
+        assert canonicalizer.bucket(None) is None
+        args = canonicalizer.canonicalize(SearchArgs(created_from=date(2024, 5, 16), lang=None))
+        # The exact date is kept in arguments, the service filters the bucket by it
+        assert args.created_from == date(2024, 5, 16)
+        assert ("created_from_bucket" in args.normalized_by) == (granularity != "day")
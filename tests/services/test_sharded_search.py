@@ -0,0 +1,105 @@
+from datetime import date
+
+import pytest
+
+from github_searcher.services.repos_searching import ReposSearchingService
+from github_searcher.services.search_args import SearchArgs
+from github_searcher.services.sharded_search import SearchShard, ShardedSearch
+
+from tests.dataset_github_api_client import DatasetGithubAPIClient, gen_dataset, reference_top
+
+
+class TestSearchShard:
+    def test_split_dates(self):
+        search = ShardedSearch(api_client=None, date_shards=4)
+        shards = search.split_dates(date(2020, 1, 1), today=date(2020, 1, 9))
+        assert shards == [
+            SearchShard(date(2020, 1, 1), date(2020, 1, 3)),
+            SearchShard(date(2020, 1, 3), date(2020, 1, 5)),
+            SearchShard(date(2020, 1, 5), date(2020, 1, 7)),
+            SearchShard(date(2020, 1, 7), None),
+        ]
+        # Ranges are not shorter than one day
+        assert search.split_dates(date(2020, 1, 1), today=date(2020, 1, 3)) == [
+            SearchShard(date(2020, 1, 1), date(2020, 1, 2)),
+            SearchShard(date(2020, 1, 2), None),
+        ]
+        assert search.split_dates(None)[0].created_after is None
+
+    def test_split(self):
+        shard = SearchShard(date(2020, 1, 1), date(2020, 1, 5), stars_max=10)
+        assert shard.split() == (
+            SearchShard(date(2020, 1, 1), date(2020, 1, 3), stars_max=10),
+            SearchShard(date(2020, 1, 3), date(2020, 1, 5), stars_max=10),
+        )
+        assert SearchShard(date(2020, 1, 1), date(2020, 1, 2)).split() is None
+
+
+class TestShardedSearch:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("n", [500, 2500, 6000])
+    async def test_top(self, n):
+        dataset = gen_dataset(5000, max_stars=2000)
+        search = ShardedSearch(api_client=DatasetGithubAPIClient(dataset), date_shards=3)
+
+        repos, complete = await search.top(session=None, args=SearchArgs(created_from=None, lang=None), n=n)
+        reference = reference_top(dataset, n)
+        assert [repo.stars for repo in repos] == [repo.stars for repo in reference]
+        assert len({repo.id for repo in repos}) == len(repos)
+        assert complete == (n >= len(dataset))
+
+    @pytest.mark.asyncio
+    async def test_top_language(self):
+        dataset = gen_dataset(5000, max_stars=2000)
+        search = ShardedSearch(api_client=DatasetGithubAPIClient(dataset))
+
+        repos, _ = await search.top(session=None, args=SearchArgs(created_from=None, lang="go"), n=1500)
+        assert [repo.stars for repo in repos] == [repo.stars for repo in reference_top(dataset, 1500, lang="go")]
+        assert all(repo.language == "Go" for repo in repos)
+
+    @pytest.mark.asyncio
+    async def test_same_stars(self):
+        # More than 1000 repos with the same stars are walked by dates
+        dataset = gen_dataset(3000, max_stars=3)
+        search = ShardedSearch(api_client=DatasetGithubAPIClient(dataset), date_shards=1)
+
+        repos, _ = await search.top(session=None, args=SearchArgs(created_from=None, lang=None), n=2000)
+        assert [repo.stars for repo in repos] == [repo.stars for repo in reference_top(dataset, 2000)]
+        assert len({repo.id for repo in repos}) == 2000
+
+    @pytest.mark.asyncio
+    async def test_pruned_shards(self):
+        dataset = gen_dataset(5000, max_stars=2000)
+        client = DatasetGithubAPIClient(dataset)
+        search = ShardedSearch(api_client=client, date_shards=2)
+
+        await search.top(session=None, args=SearchArgs(created_from=None, lang=None), n=1200)
+        # Shards don't walk below the 1200-th repo: at most 2 walks of 10 pages by each shard
+        assert client.requests <= 40
+
+    @pytest.mark.asyncio
+    async def test_small_shard_pages(self):
+        dataset = gen_dataset(250, max_stars=2000)
+        client = DatasetGithubAPIClient(dataset)
+        search = ShardedSearch(api_client=client, date_shards=1)
+
+        repos, complete = await search.top(session=None, args=SearchArgs(created_from=None, lang=None), n=1000)
+        assert len(repos) == 250
+        assert complete
+        # Only pages with repos are requested: the first one tells their total count
+        assert client.requests == 3
+
+
+class TestDeepCrawl:
+    @pytest.mark.asyncio
+    async def test_fetch_ranked_repos(self):
+        dataset = gen_dataset(3000, max_stars=5000)
+        service = ReposSearchingService(api_client=DatasetGithubAPIClient(dataset))
+
+        repos, complete = await service.fetch_ranked_repos(
+            session=None,
+            args=SearchArgs(created_from=None, lang=None),
+            end=2000,
+        )
+        assert [repo.stars for repo in repos] == [repo.stars for repo in reference_top(dataset, 2000)]
+        assert not complete
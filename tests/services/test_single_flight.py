@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+
+from github_searcher.services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_coalesce_calls(self):
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def func():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return calls
+
+        results = await asyncio.gather(*[
+            single_flight.do("key", func)
+            for _ in range(10)
+        ])
+
+        assert results == [1] * 10
+        assert calls == 1
+        assert "key" not in single_flight
+
+    @pytest.mark.asyncio
+    async def test_different_keys(self):
+        single_flight = SingleFlight()
+
+        async def func(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            single_flight.do("a", lambda: func("a")),
+            single_flight.do("b", lambda: func("b")),
+        )
+        assert results == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_share_exception(self):
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def func():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError()
+
+        results = await asyncio.gather(
+            *[single_flight.do("key", func) for _ in range(3)],
+            return_exceptions=True,
+        )
+        assert calls == 1
+        assert all(isinstance(r, ValueError) for r in results)
+        assert len(single_flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_call(self):
+        single_flight = SingleFlight()
+
+        async def func():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        first = asyncio.create_task(single_flight.do("key", func))
+        second = asyncio.create_task(single_flight.do("key", func))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == "result"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    @pytest.mark.asyncio
+    async def test_new_call_after_finish(self):
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def func():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await single_flight.do("key", func) == 1
+        assert await single_flight.do("key", func) == 2
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_calls(self):
+        single_flight = SingleFlight()
+
+        async def func():
+            await asyncio.sleep(10)
+
+        caller = asyncio.create_task(single_flight.do("key", func))
+        await asyncio.sleep(0.01)
+        await single_flight.close()
+
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        assert "key" not in single_flight
@@ -2,12 +2,14 @@ from datetime import date, timedelta
 from fastapi.testclient import TestClient
 from unittest.mock import patch
 
+import json
 import pytest
 
 from github_searcher.app import app
-from github_searcher.deps import get_repos_searching_service
-from github_searcher.exceptions import GithubApiRateLimitException
+from github_searcher.deps import get_batch_searcher, get_repos_searching_service
+from github_searcher.exceptions import GithubApiRateLimitException, GithubApiUnavailableException
 from github_searcher.schemas.github_api import GARepository
+from github_searcher.services.batch_search import BatchSearcher
 from github_searcher.services.repos_searching import ReposSearchingService
 
 from tests.mocked_github_api_client import MockedGithubAPIClient
@@ -24,6 +26,7 @@ def override_get_repos_searching_service() -> ReposSearchingService:
 
 
 app.dependency_overrides[get_repos_searching_service] = override_get_repos_searching_service
+app.dependency_overrides[get_batch_searcher] = lambda: BatchSearcher(service=repos_searching_service)
 
 client = TestClient(app)
 
@@ -32,6 +35,7 @@ TOP_K_HANDLERS = [
     "/api/v0/repos/top10",
     "/api/v0/repos/top50",
     "/api/v0/repos/top100",
+    "/api/v0/repos/top",
 ]
 
 HANDLERS_WITH_COMMON_BEHAVIOUR = [POPULAR_REPOS_HANDLER] + TOP_K_HANDLERS
@@ -105,6 +109,21 @@ def test_catch_rate_limit(mocked_search, handler):
     assert response.status_code == 429
 
 
+@pytest.mark.parametrize("handler", HANDLERS_WITH_COMMON_BEHAVIOUR)
+@patch.object(MockedGithubAPIClient, "search_repos")
+def test_github_unavailable(mocked_search, handler):
+    async def raise_unavailable(*args, **kwargs):
+        raise GithubApiUnavailableException()
+
+    mocked_search.side_effect = raise_unavailable
+
+    response = client.get(
+        url=handler,
+    )
+
+    assert response.status_code == 503
+
+
 @pytest.mark.parametrize("handler", HANDLERS_WITH_COMMON_BEHAVIOUR)
 @pytest.mark.parametrize("created_from", [None, date.today() - timedelta(days=120)])
 @pytest.mark.parametrize("language", [None, "go", "python"])
@@ -132,3 +151,136 @@ def test_app_valid_requests(handler, created_from, language):
         check_language(language, response)
     if created_from:
         check_created_from(created_from, response)
+
+
+@pytest.mark.parametrize("handler", HANDLERS_WITH_COMMON_BEHAVIOUR)
+@patch("random.randint", return_value=1)
+def test_not_modified(_, handler):
+    response = client.get(url=handler, params={"language": "go"})
+
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    # Service is without cache, so responses are not fresh
+    assert response.headers["Cache-Control"] == "max-age=0"
+
+    for if_none_match in [etag, f'W/{etag}', f'"other", {etag}', "*"]:
+        response = client.get(url=handler, params={"language": "go"}, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    response = client.get(url=handler, params={"language": "python"}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@patch("random.randint", return_value=1)
+@pytest.mark.parametrize("k", [1, 25, 250, 1000])
+def test_top_k(_, k):
+    response = client.get(url="/api/v0/repos/top", params={"k": k, "language": "go"})
+
+    assert response.status_code == 200
+    repos = [GARepository(**repo) for repo in response.json()]
+    assert len(repos) == k
+    check_order(repos)
+    check_language("go", repos)
+
+
+@pytest.mark.parametrize("k", [10, 50, 100])
+def test_top_k_aliases(k):
+    params = {"language": "python", "created_from": str(date.today() - timedelta(days=10))}
+    alias = client.get(url=f"/api/v0/repos/top{k}", params=params)
+    top_k = client.get(url="/api/v0/repos/top", params={**params, "k": k})
+
+    assert alias.status_code == top_k.status_code == 200
+    assert len(alias.json()) == len(top_k.json()) == k
+
+
+@pytest.mark.parametrize("k", [0, -1, 1001])
+def test_top_k_invalid_k(k):
+    response = client.get(url="/api/v0/repos/top", params={"k": k})
+    assert response.status_code == 422
+
+
+@patch("random.randint", return_value=1)
+@pytest.mark.parametrize("k", [1, 100, 250])
+@pytest.mark.parametrize("lang", [None, "python"])
+def test_stream_top_k(_, k, lang):
+    response = client.get(url="/api/v0/repos/top/stream", params={"k": k, "language": lang})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    repos = [GARepository(**json.loads(line)) for line in response.iter_lines()]
+    assert len(repos) == k
+    check_order(repos)
+    if lang is not None:
+        check_language(lang, repos)
+
+
+def test_stream_top_k_not_existed_lang():
+    response = client.get(url="/api/v0/repos/top/stream", params={"language": "notexistedlang"})
+    assert response.status_code == 200
+    assert response.content == b""
+
+
+@pytest.mark.parametrize("k", [0, 1001])
+def test_stream_top_k_invalid_k(k):
+    response = client.get(url="/api/v0/repos/top/stream", params={"k": k})
+    assert response.status_code == 422
+
+
+@patch("random.randint", return_value=1)
+def test_batch(_):
+    searches = [
+        {"language": "go", "k": 10},
+        {"language": "python", "page_id": 2},
+        {"language": "go", "k": 10},
+        {"language": "notexistedlang"},
+    ]
+    response = client.post(url="/api/v0/repos/batch", json={"searches": searches})
+
+    assert response.status_code == 200
+    results = response.json()
+    assert len(results) == 4
+    top10 = client.get(url="/api/v0/repos/top10", params={"language": "go"}).json()
+    assert results[0] == results[2] == {"repos": top10, "error": None}
+    page = client.get(url=POPULAR_REPOS_HANDLER, params={"language": "python", "page_id": 2}).json()
+    assert results[1] == {"repos": page, "error": None}
+    assert results[3] == {"repos": [], "error": None}
+
+
+@patch.object(MockedGithubAPIClient, "search_repos")
+def test_batch_errors(mocked_search):
+    async def raise_rate_limit(*args, lang=None, **kwargs):
+        if lang == "python":
+            raise GithubApiRateLimitException()
+        return []
+
+    mocked_search.side_effect = raise_rate_limit
+    searches = [{"language": "python"}, {"language": "go"}]
+    response = client.post(url="/api/v0/repos/batch", json={"searches": searches})
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"repos": None, "error": {"status": 429, "message": GithubApiRateLimitException.message}},
+        {"repos": [], "error": None},
+    ]
+
+
+@pytest.mark.parametrize("searches", [
+    [],
+    [{"page_id": 1, "k": 10}],
+    [{"k": 1001}],
+    [{"page_id": 0}],
+    [{}] * 101,
+])
+def test_invalid_batch(searches):
+    response = client.post(url="/api/v0/repos/batch", json={"searches": searches})
+    assert response.status_code == 422
+
+
+def test_metrics():
+    response = client.get(url="/api/v0/metrics")
+
+    assert response.status_code == 200
+    assert set(response.json().keys()) == {"counters", "gauges", "summaries"}
@@ -1,5 +1,7 @@
 from datetime import date
 
+import time
+
 from github_searcher.schemas.github_api.repository import GARepository
 
 
@@ -36,3 +38,10 @@ def check_language(
     for r in response:
         assert r.language.lower() == lang, f"All repos should be with language {lang}"
 
+
+def rate_limit_headers(remaining: int, reset_in: float, limit: int = 30) -> dict[str, str]:
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(time.time() + reset_in)),
+    }